@@ -0,0 +1,175 @@
+# -*- coding: utf-8 -*-
+"""
+响应存档模块 - 原始响应的录制与回放
+
+存档由两个文件组成：
+- 数据文件：每个响应单独压缩为一个 gzip 成员后追加写入（整个文件仍是合法的 .gz），
+  成员内容为一行JSON头（URL、抓取时间、状态码、编码）加原始响应体
+- 索引文件 (JSON Lines)：<path>.idx.jsonl，每个响应一行，记录URL、抓取时间和数据文件中的偏移量
+
+提取规则变化后，可以用存档离线重新解析，不再需要重新抓取。
+"""
+
+import os
+import gzip
+import json
+import threading
+from datetime import datetime
+from typing import List, Dict, Optional
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+class ArchivedResponse:
+    """存档中的一个响应"""
+    
+    def __init__(self, url: str, fetched_at: datetime, status: int, encoding: str, body: bytes):
+        self.url = url
+        self.fetched_at = fetched_at
+        self.status = status
+        self.encoding = encoding
+        self.body = body
+    
+    @property
+    def text(self) -> str:
+        """按录制时确定的编码解码响应体"""
+        return self.body.decode(self.encoding or 'utf-8', errors='replace')
+
+
+class ResponseArchive:
+    """只追加的响应存档（线程安全）"""
+    
+    INDEX_SUFFIX = ".idx.jsonl"
+    
+    def __init__(self, path: str):
+        """
+        初始化存档
+        
+        Args:
+            path: 数据文件路径（建议以 .gz 结尾），索引保存在 <path>.idx.jsonl
+        """
+        self.path = path
+        self.index_path = path + self.INDEX_SUFFIX
+        
+        self._lock = threading.Lock()
+        self._data_file = None
+        self._index_file = None
+        self._entries: Optional[List[Dict]] = None
+    
+    def exists(self) -> bool:
+        """存档是否存在"""
+        return os.path.exists(self.path) and os.path.exists(self.index_path)
+    
+    def record(self, url: str, status: int, encoding: str, body: bytes, fetched_at: datetime = None):
+        """
+        追加一个响应
+        
+        Args:
+            url: 完整请求URL（含查询参数）
+            status: HTTP状态码
+            encoding: 响应体编码
+            body: 原始响应体
+            fetched_at: 抓取时间，默认当前时间
+        """
+        fetched_at = (fetched_at or datetime.now()).isoformat(timespec='seconds')
+        header = json.dumps({
+            "url": url,
+            "fetched_at": fetched_at,
+            "status": status,
+            "encoding": encoding,
+        }, ensure_ascii=False).encode('utf-8')
+        member = gzip.compress(header + b"\n" + body)
+        
+        with self._lock:
+            if self._data_file is None:
+                directory = os.path.dirname(self.path)
+                if directory and not os.path.exists(directory):
+                    os.makedirs(directory)
+                self._data_file = open(self.path, 'ab')
+                self._index_file = open(self.index_path, 'a', encoding='utf-8')
+            
+            offset = self._data_file.tell()
+            self._data_file.write(member)
+            self._data_file.flush()
+            # 先写数据再写索引：中途崩溃最多留下一段没有索引的数据
+            entry = {
+                "url": url,
+                "fetched_at": fetched_at,
+                "status": status,
+                "offset": offset,
+                "length": len(member),
+            }
+            self._index_file.write(json.dumps(entry, ensure_ascii=False) + "\n")
+            self._index_file.flush()
+            if self._entries is not None:
+                self._entries.append(entry)
+    
+    def entries(self) -> List[Dict]:
+        """
+        读取索引
+        
+        Returns:
+            按写入顺序排列的索引项
+        """
+        with self._lock:
+            if self._entries is None:
+                self._entries = self._load_index()
+            return list(self._entries)
+    
+    def _load_index(self) -> List[Dict]:
+        entries = []
+        if not os.path.exists(self.index_path):
+            return entries
+        with open(self.index_path, 'r', encoding='utf-8') as f:
+            for line in f:
+                try:
+                    entries.append(json.loads(line))
+                except ValueError:
+                    # 写入时被中断的最后一行
+                    logger.warning("存档索引中有不完整的行，已跳过")
+        return entries
+    
+    def read(self, entry: Dict) -> ArchivedResponse:
+        """
+        读取索引项对应的响应
+        
+        Args:
+            entry: entries() 返回的索引项
+        
+        Returns:
+            存档响应
+        """
+        with open(self.path, 'rb') as f:
+            f.seek(entry["offset"])
+            member = f.read(entry["length"])
+        header, _, body = gzip.decompress(member).partition(b"\n")
+        header = json.loads(header)
+        return ArchivedResponse(
+            url=header["url"],
+            fetched_at=datetime.fromisoformat(header["fetched_at"]),
+            status=header["status"],
+            encoding=header["encoding"],
+            body=body,
+        )
+    
+    def latest(self) -> Dict[str, Dict]:
+        """
+        每个URL最近一次抓取的索引项
+        
+        Returns:
+            {URL: 索引项}
+        """
+        latest = {}
+        for entry in self.entries():
+            latest[entry["url"]] = entry
+        return latest
+    
+    def close(self):
+        """关闭写入的文件"""
+        with self._lock:
+            for f in (self._data_file, self._index_file):
+                if f:
+                    f.close()
+            self._data_file = None
+            self._index_file = None
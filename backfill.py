@@ -0,0 +1,411 @@
+# -*- coding: utf-8 -*-
+"""
+回溯模块 - 按日期窗口抓取历史公告
+
+网站列表最多翻 max_pages 页，一年的公告无法在一次搜索中翻完。回溯抓取把日期范围
+切成若干窗口，每个窗口单独按日期检索：
+- 窗口内的公告超过 max_pages 页时，丢弃该窗口的结果并对半拆分后重新抓取（最小1天）
+- 多个窗口并行抓取，所有请求共用一个限速器
+- 每个窗口有自己的断点；完成的窗口结果写入JSON Lines分片（可同时写入公告库），
+  不在内存中保留全部结果
+
+回溯目录中的文件：
+- manifest.json：回溯参数和窗口清单（待抓取 / 已完成 / 已拆分），中断后据此继续
+- window_<首日>_<末日>.jsonl：已完成窗口的记录分片（抓取中为 .part）
+- window_<首日>_<末日>.checkpoint.json：进行中窗口的断点
+"""
+
+import os
+import json
+import queue
+import threading
+from datetime import date, datetime, time, timedelta
+from typing import List, Dict, Tuple, Iterator, Callable
+import logging
+
+from checkpoint import CrawlCheckpoint
+from config import BACKFILL_CONFIG, YFBZB_CONFIG
+
+logger = logging.getLogger(__name__)
+
+# 等待窗口任务时检查停止信号的间隔（秒）
+WAIT_POLL_INTERVAL = 0.2
+
+# 写入公告库时每批的记录数
+STORE_BATCH_SIZE = 200
+
+# 时间窗口：[首日, 末日+1)
+Window = Tuple[date, date]
+
+
+def date_windows(start: date, end: date, days: int) -> List[Window]:
+    """
+    把日期范围切成时间窗口
+    
+    Args:
+        start: 首日
+        end: 末日（含）
+        days: 每个窗口的天数
+    
+    Returns:
+        时间窗口列表（较新的在前，与网站列表的排列顺序一致）
+    """
+    windows = []
+    stop = end + timedelta(days=1)
+    while stop > start:
+        windows.append((max(start, stop - timedelta(days=days)), stop))
+        stop -= timedelta(days=days)
+    return windows
+
+
+def window_label(window: Window) -> str:
+    """窗口的显示文本，如 2025-01-01 ~ 2025-01-07"""
+    return f"{window[0].isoformat()} ~ {(window[1] - timedelta(days=1)).isoformat()}"
+
+
+class BackfillManifest:
+    """回溯窗口清单（线程安全）"""
+    
+    PENDING = "pending"
+    DONE = "done"
+    SPLIT = "split"
+    
+    VERSION = 1
+    
+    def __init__(self, path: str):
+        """
+        初始化清单
+        
+        Args:
+            path: 清单文件路径
+        """
+        self.path = path
+        self.state: Dict = {}
+        self._lock = threading.Lock()
+    
+    def exists(self) -> bool:
+        """清单文件是否存在"""
+        return os.path.exists(self.path)
+    
+    def start(self, params: Dict, windows: List[Window]):
+        """
+        开始新的回溯
+        
+        Args:
+            params: 回溯参数（用于恢复时校验）
+            windows: 初始时间窗口
+        """
+        self.state = {
+            "version": self.VERSION,
+            "params": params,
+            "windows": [self._entry(window) for window in windows],
+        }
+        self.save()
+    
+    def resume(self, params: Dict) -> bool:
+        """
+        加载清单
+        
+        Args:
+            params: 本次回溯参数，与清单不一致时不恢复
+        
+        Returns:
+            是否成功加载
+        """
+        if not self.exists():
+            return False
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                state = json.load(f)
+        except (OSError, ValueError) as e:
+            logger.warning(f"回溯清单损坏，将从头开始: {e}")
+            return False
+        if state.get("version") != self.VERSION or state.get("params") != params:
+            logger.warning("回溯清单的参数与本次不一致，将从头开始")
+            return False
+        self.state = state
+        return True
+    
+    @staticmethod
+    def _entry(window: Window) -> Dict:
+        return {"start": window[0].isoformat(), "end": window[1].isoformat(),
+                "status": BackfillManifest.PENDING, "records": 0, "truncated": False}
+    
+    @staticmethod
+    def _window(entry: Dict) -> Window:
+        return date.fromisoformat(entry["start"]), date.fromisoformat(entry["end"])
+    
+    def _find(self, window: Window) -> Dict:
+        start, end = window[0].isoformat(), window[1].isoformat()
+        for entry in self.state["windows"]:
+            if entry["start"] == start and entry["end"] == end and entry["status"] == self.PENDING:
+                return entry
+        raise KeyError(f"清单中没有待抓取的窗口: {window_label(window)}")
+    
+    def windows(self, status: str) -> List[Window]:
+        """
+        某个状态的窗口
+        
+        Args:
+            status: PENDING / DONE / SPLIT
+        
+        Returns:
+            时间窗口列表（较新的在前）
+        """
+        with self._lock:
+            entries = [entry for entry in self.state["windows"] if entry["status"] == status]
+        return sorted((self._window(entry) for entry in entries), reverse=True)
+    
+    def summary(self) -> Dict:
+        """已完成窗口数、记录数和未抓完的窗口数"""
+        with self._lock:
+            done = [entry for entry in self.state["windows"] if entry["status"] == self.DONE]
+            return {
+                "windows": len(done),
+                "records": sum(entry["records"] for entry in done),
+                "truncated": sum(1 for entry in done if entry["truncated"]),
+            }
+    
+    def done(self, window: Window, records: int, truncated: bool = False):
+        """
+        记录窗口完成
+        
+        Args:
+            window: 时间窗口
+            records: 窗口的记录数
+            truncated: 窗口已不能再拆分、仍超出 max_pages 页
+        """
+        with self._lock:
+            entry = self._find(window)
+            entry.update(status=self.DONE, records=records, truncated=truncated)
+            self.save()
+    
+    def split(self, window: Window, parts: List[Window]):
+        """
+        记录窗口拆分
+        
+        Args:
+            window: 被拆分的时间窗口
+            parts: 拆分后的窗口
+        """
+        with self._lock:
+            self._find(window)["status"] = self.SPLIT
+            self.state["windows"].extend(self._entry(part) for part in parts)
+            self.save()
+    
+    def save(self):
+        """保存清单文件（先写临时文件再替换）"""
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(self.state, f, ensure_ascii=False, indent=1)
+        os.replace(tmp_path, self.path)
+
+
+class Backfill:
+    """历史回溯抓取"""
+    
+    def __init__(self, scraper_factory: Callable[[], object], directory: str, start: date, end: date,
+                 fetch_details: bool = True, window_days: int = None, workers: int = None, store=None):
+        """
+        初始化回溯
+        
+        Args:
+            scraper_factory: 创建爬虫的函数；每个窗口一个爬虫，应共用限速器和HTTP传输，
+                             关键词、合并搜索等参数一致
+            directory: 回溯目录（清单、断点和结果分片）
+            start: 首日
+            end: 末日（含）
+            fetch_details: 是否抓取详情页
+            window_days: 初始窗口天数，默认取 BACKFILL_CONFIG["window_days"]
+            workers: 同时抓取的窗口数，默认取 BACKFILL_CONFIG["workers"]
+            store: 公告库（可选），见 store.AnnouncementStore；设置后窗口的记录同时写入公告库
+        """
+        self.scraper_factory = scraper_factory
+        self.directory = directory
+        self.start = start
+        self.end = end
+        self.fetch_details = fetch_details
+        self.window_days = window_days or BACKFILL_CONFIG["window_days"]
+        self.workers = workers or BACKFILL_CONFIG["workers"]
+        self.store = store
+        
+        if not os.path.exists(directory):
+            os.makedirs(directory)
+        self.manifest = BackfillManifest(os.path.join(directory, "manifest.json"))
+        
+        self.failed = 0
+        self.stop_event = threading.Event()
+        self._scrapers = set()
+        self._pending = 0
+        self._queue: "queue.Queue[Window]" = queue.Queue()
+        self._lock = threading.Lock()
+    
+    @property
+    def stopped(self) -> bool:
+        """是否已请求停止"""
+        return self.stop_event.is_set()
+    
+    def stop(self):
+        """停止回溯：进行中的窗口保存断点，下次 prepare(resume=True) 后继续"""
+        self.stop_event.set()
+        with self._lock:
+            scrapers = list(self._scrapers)
+        for scraper in scrapers:
+            scraper.stop()
+    
+    def _path(self, window: Window, suffix: str) -> str:
+        name = f"window_{window[0].strftime('%Y%m%d')}_{(window[1] - timedelta(days=1)).strftime('%Y%m%d')}"
+        return os.path.join(self.directory, name + suffix)
+    
+    def prepare(self, params: Dict, resume: bool = False) -> bool:
+        """
+        建立或加载窗口清单
+        
+        Args:
+            params: 影响抓取结果的参数（关键词等），与日期范围一起写入清单
+            resume: 是否尝试从已有清单继续
+        
+        Returns:
+            是否从已有清单继续
+        """
+        params = dict(params, start=self.start.isoformat(), end=self.end.isoformat(),
+                      fetch_details=self.fetch_details)
+        if resume and self.manifest.resume(params):
+            summary = self.manifest.summary()
+            logger.info(f"已加载回溯清单: 已完成 {summary['windows']} 个窗口 {summary['records']} 条，"
+                        f"待抓取 {len(self.manifest.windows(BackfillManifest.PENDING))} 个窗口")
+            return True
+        
+        # 从头开始：删除上一次回溯的分片和断点
+        for name in os.listdir(self.directory):
+            if name.startswith("window_"):
+                os.remove(os.path.join(self.directory, name))
+        self.manifest.start(params, date_windows(self.start, self.end, self.window_days))
+        return False
+    
+    def run(self) -> bool:
+        """
+        抓取清单中全部待抓取的窗口（先调用 prepare）
+        
+        Returns:
+            是否全部完成（被停止或有窗口出错时为False）
+        """
+        pending = self.manifest.windows(BackfillManifest.PENDING)
+        logger.info(f"回溯 {self.start} ~ {self.end}: 待抓取 {len(pending)} 个窗口，并行 {self.workers} 个")
+        self._pending = len(pending)
+        for window in pending:
+            self._queue.put(window)
+        
+        threads = [threading.Thread(target=self._work, name=f"backfill-{i}", daemon=True)
+                   for i in range(min(self.workers, max(1, len(pending))))]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        
+        summary = self.manifest.summary()
+        logger.info(f"回溯结束: 已完成 {summary['windows']} 个窗口，共 {summary['records']} 条")
+        if summary["truncated"]:
+            logger.warning(f"{summary['truncated']} 个单日窗口超出 {YFBZB_CONFIG['max_pages']} 页，部分公告未抓取")
+        return not self.stopped and not self.failed
+    
+    def _work(self):
+        while not self.stopped:
+            try:
+                window = self._queue.get(timeout=WAIT_POLL_INTERVAL)
+            except queue.Empty:
+                with self._lock:
+                    if self._pending == 0:
+                        return
+                continue
+            
+            try:
+                parts = self._crawl_window(window)
+            except Exception as e:
+                # 出错的窗口留在清单中，下次继续时重新抓取
+                logger.error(f"窗口 {window_label(window)} 抓取出错: {e}")
+                with self._lock:
+                    self.failed += 1
+                parts = []
+            
+            with self._lock:
+                self._pending += len(parts) - 1
+            for part in parts:
+                self._queue.put(part)
+    
+    def _crawl_window(self, window: Window) -> List[Window]:
+        """
+        抓取一个窗口
+        
+        Returns:
+            窗口被拆分时为拆分后的窗口，否则为空列表
+        """
+        start, end = window
+        days = (end - start).days
+        scraper = self.scraper_factory()
+        scraper.set_window(datetime.combine(start, time()), datetime.combine(end, time()))
+        scraper.stop_when_truncated = days > 1
+        
+        with self._lock:
+            if self.stopped:
+                return []
+            self._scrapers.add(scraper)
+        
+        checkpoint = CrawlCheckpoint(self._path(window, ".checkpoint.json"))
+        shard_path = self._path(window, ".jsonl")
+        part_path = f"{shard_path}.part"
+        count = 0
+        try:
+            if scraper.use_checkpoint(checkpoint, self.fetch_details, resume=checkpoint.exists()):
+                logger.info(f"窗口 {window_label(window)} 从断点继续")
+            else:
+                logger.info(f"开始抓取窗口 {window_label(window)}")
+            
+            # 断点恢复时已完成的记录会被重新产出，分片总是从头写
+            batch = []
+            with open(part_path, 'w', encoding='utf-8') as f:
+                for record in scraper.iter_records(fetch_details=self.fetch_details, show_progress=False):
+                    f.write(json.dumps(record, ensure_ascii=False, default=str))
+                    f.write("\n")
+                    count += 1
+                    if self.store is not None:
+                        batch.append(record)
+                        if len(batch) >= STORE_BATCH_SIZE:
+                            self.store.save_records(batch)
+                            batch = []
+            if self.store is not None and batch:
+                self.store.save_records(batch)
+        finally:
+            checkpoint.close()
+            with self._lock:
+                self._scrapers.discard(scraper)
+        
+        if scraper.stopped:
+            return []
+        
+        if scraper.list_truncated and scraper.stop_when_truncated:
+            middle = start + timedelta(days=days // 2)
+            parts = [(middle, end), (start, middle)]
+            os.remove(part_path)
+            checkpoint.clear()
+            self.manifest.split(window, parts)
+            logger.info(f"窗口 {window_label(window)} 超出 {scraper.max_pages} 页，拆分为 "
+                        f"{window_label(parts[0])} 和 {window_label(parts[1])}")
+            return parts
+        
+        os.replace(part_path, shard_path)
+        self.manifest.done(window, count, truncated=scraper.list_truncated)
+        logger.info(f"窗口 {window_label(window)} 完成: {count} 条")
+        return []
+    
+    def records(self) -> Iterator[Dict]:
+        """
+        逐条读取已完成窗口的记录（较新的窗口在前）
+        
+        Yields:
+            单条公告记录
+        """
+        for window in self.manifest.windows(BackfillManifest.DONE):
+            with open(self._path(window, ".jsonl"), 'r', encoding='utf-8') as f:
+                for line in f:
+                    yield json.loads(line)
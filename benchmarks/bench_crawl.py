@@ -0,0 +1,216 @@
+# -*- coding: utf-8 -*-
+"""
+端到端抓取基准测试
+
+在子进程中启动本地模拟服务器（见 mock_server.py），按不同的并发数和页数
+运行 YfbzbScraper.scrape()，统计记录/秒、请求/秒和峰值内存，
+并与已提交的基线比较，性能回退超过容差时以非零状态退出。
+
+用法:
+  python benchmarks/bench_crawl.py                       # 运行并与基线比较
+  python benchmarks/bench_crawl.py --update-baseline     # 运行并更新基线
+  python benchmarks/bench_crawl.py --workers 1 8 --pages 2 --error-rate 0.05
+"""
+
+import os
+import sys
+import json
+import time
+import argparse
+import subprocess
+import tracemalloc
+import logging
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(BENCH_DIR))
+
+from scraper import YfbzbScraper
+from profiler import StageProfiler
+from ratelimit import RateLimiter
+
+BASELINE_PATH = os.path.join(BENCH_DIR, "baseline_crawl.json")
+
+
+def start_mock_server(args) -> (subprocess.Popen, str):
+    """
+    在子进程中启动模拟服务器，避免服务端的内存分配计入爬虫峰值内存
+    
+    Returns:
+        (子进程, 服务器根URL)
+    """
+    process = subprocess.Popen(
+        [
+            sys.executable, os.path.join(BENCH_DIR, "mock_server.py"),
+            "--port", "0",
+            "--rows", str(args.rows),
+            "--latency", str(args.latency),
+            "--jitter", str(args.jitter),
+            "--error-rate", str(args.error_rate),
+        ],
+        stdout=subprocess.PIPE,
+        text=True,
+        encoding="utf-8",
+    )
+    line = process.stdout.readline()
+    base_url = line.split()[1]
+    return process, base_url
+
+
+def run_scenario(base_url: str, workers: int, pages: int) -> dict:
+    """
+    运行一个抓取场景
+    
+    Args:
+        base_url: 模拟服务器根URL
+        workers: 详情页并发数
+        pages: 列表页数
+    
+    Returns:
+        场景统计
+    """
+    profiler = StageProfiler()
+    scraper = YfbzbScraper(
+        keywords=["无纸化会议"],
+        profiler=profiler,
+        max_workers=workers,
+        rate_limiter=RateLimiter(0),
+    )
+    scraper.base_url = base_url
+    scraper.search_url = f"{base_url}/search/invitedBidSearch"
+    scraper.max_pages = pages
+    scraper.request_delay = 0
+    
+    tracemalloc.start()
+    start = time.perf_counter()
+    records = scraper.scrape(fetch_details=True, show_progress=False)
+    elapsed = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    scraper.transport.close()
+    
+    # 每次请求尝试要么收到响应（按状态码计数），要么连接失败（只计入 http.errors）
+    counters = profiler.summary()["counters"]
+    responses = sum(value for name, value in counters.items() if name.startswith("http.status."))
+    failures = counters.get("http.errors", 0) - sum(
+        value for name, value in counters.items()
+        if name.startswith("http.status.") and not name.endswith(".200")
+    )
+    requests_made = responses + max(failures, 0)
+    
+    return {
+        "workers": workers,
+        "pages": pages,
+        "records": len(records),
+        "requests": requests_made,
+        "seconds": elapsed,
+        "records_per_sec": len(records) / elapsed,
+        "requests_per_sec": requests_made / elapsed,
+        "peak_mem_mb": peak / 1024 / 1024,
+    }
+
+
+def compare(results: dict, baseline: dict, tolerance: float) -> list:
+    """
+    与基线比较
+    
+    Args:
+        results: 本次结果 {场景名: 统计}
+        baseline: 基线 {场景名: 统计}
+        tolerance: 容差比例
+    
+    Returns:
+        回退描述列表，为空表示通过
+    """
+    regressions = []
+    for name, stats in results.items():
+        base = baseline.get(name)
+        if not base:
+            continue
+        if stats["records_per_sec"] < base["records_per_sec"] * (1 - tolerance):
+            regressions.append(
+                f"{name}: 记录/秒 {stats['records_per_sec']:.1f} < 基线 {base['records_per_sec']:.1f}"
+            )
+        if stats["peak_mem_mb"] > base["peak_mem_mb"] * (1 + tolerance):
+            regressions.append(
+                f"{name}: 峰值内存 {stats['peak_mem_mb']:.1f}MB > 基线 {base['peak_mem_mb']:.1f}MB"
+            )
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="端到端抓取基准测试（本地模拟服务器）")
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 4, 8], help="详情页并发数")
+    parser.add_argument("--pages", type=int, nargs="+", default=[1, 5], help="列表页数")
+    parser.add_argument("--rows", type=int, default=300, help="模拟搜索结果总条数")
+    parser.add_argument("--latency", type=float, default=0.02, help="模拟响应延迟（秒）")
+    parser.add_argument("--jitter", type=float, default=0.01, help="模拟延迟抖动（秒）")
+    parser.add_argument("--error-rate", type=float, default=0.02, help="模拟HTTP 500比例")
+    parser.add_argument("--repeat", type=int, default=3, help="每个场景运行次数，取最好成绩")
+    parser.add_argument("--baseline", default=BASELINE_PATH, help="基线文件")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="允许的回退比例，默认25%%")
+    parser.add_argument("--update-baseline", action="store_true", help="用本次结果覆盖基线")
+    parser.add_argument("--json", metavar="PATH", help="把本次结果保存为JSON")
+    args = parser.parse_args()
+    
+    logging.getLogger().setLevel(logging.ERROR)
+    
+    process, base_url = start_mock_server(args)
+    try:
+        results = {}
+        print(f"{'场景':<10}{'记录':>6}{'请求':>6}{'耗时(s)':>9}{'记录/秒':>10}{'请求/秒':>10}{'峰值内存(MB)':>14}")
+        for pages in args.pages:
+            for workers in args.workers:
+                name = f"w{workers}_p{pages}"
+                # 多次运行取最好成绩，降低短场景的抖动
+                runs = [run_scenario(base_url, workers, pages) for _ in range(args.repeat)]
+                stats = max(runs, key=lambda run: run["records_per_sec"])
+                stats["peak_mem_mb"] = min(run["peak_mem_mb"] for run in runs)
+                results[name] = stats
+                print(
+                    f"{name:<12}{stats['records']:>6}{stats['requests']:>6}{stats['seconds']:>9.2f}"
+                    f"{stats['records_per_sec']:>12.1f}{stats['requests_per_sec']:>12.1f}"
+                    f"{stats['peak_mem_mb']:>14.2f}"
+                )
+    finally:
+        process.terminate()
+        process.wait()
+    
+    settings = {
+        "rows": args.rows,
+        "latency": args.latency,
+        "jitter": args.jitter,
+        "error_rate": args.error_rate,
+    }
+    
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump({"settings": settings, "scenarios": results}, f, ensure_ascii=False, indent=2)
+    
+    if args.update_baseline:
+        with open(args.baseline, "w", encoding="utf-8") as f:
+            json.dump({"settings": settings, "scenarios": results}, f, ensure_ascii=False, indent=2)
+        print(f"基线已更新: {args.baseline}")
+        return 0
+    
+    if not os.path.exists(args.baseline):
+        print("未找到基线文件，跳过比较（可使用 --update-baseline 生成）")
+        return 0
+    
+    with open(args.baseline, "r", encoding="utf-8") as f:
+        baseline = json.load(f)
+    if baseline.get("settings") != settings:
+        print("注意: 本次模拟参数与基线不同，比较结果仅供参考")
+    
+    regressions = compare(results, baseline["scenarios"], args.tolerance)
+    if regressions:
+        print("\n性能回退:")
+        for line in regressions:
+            print(f"  {line}")
+        return 1
+    
+    print("\n与基线相比无明显回退")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,324 @@
+# -*- coding: utf-8 -*-
+"""
+导出基准测试
+
+生成 FIELD_MAPPING 结构的合成记录（默认 1k/10k/100k/500k 条），分别统计
+ExcelExporter._transform_data、export_csv 和 export 的耗时、峰值内存和输出文件大小，
+并与已提交的基线比较，性能回退超过容差时以非零状态退出。
+
+Excel 导出另外以不设置样式的方式再运行一次（excel_unstyled），结合 export 内部各阶段
+（写入行、设置样式、保存）的耗时，量化 _style_worksheet 逐单元格设置样式的开销。
+
+用法:
+  python benchmarks/bench_exporter.py                       # 运行并与基线比较
+  python benchmarks/bench_exporter.py --update-baseline     # 运行并更新基线
+  python benchmarks/bench_exporter.py --sizes 1000 10000 --targets excel excel_unstyled
+"""
+
+import os
+import sys
+import json
+import time
+import random
+import argparse
+import tempfile
+import tracemalloc
+import logging
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(BENCH_DIR))
+
+from exporter import ExcelExporter
+from profiler import StageProfiler
+from config import FIELD_MAPPING
+from normalizer import AMOUNT_FIELDS, DATETIME_FIELDS
+
+BASELINE_PATH = os.path.join(BENCH_DIR, "baseline_exporter.json")
+
+TARGETS = ("transform", "csv", "excel", "excel_unstyled")
+
+# 超过该行数的场景只运行一次（耗时长，单次抖动相对较小）
+REPEAT_MAX_ROWS = 10000
+
+REGIONS = ["北京", "上海", "浙江-杭州", "广东-深圳", "河南-郑州", "四川-成都", "湖北-武汉", "江苏-南京"]
+UNITS = ["某市人民医院", "某区机关事务管理局", "某县人民检察院", "某职业技术学院", "某市政务服务中心"]
+SUBJECTS = ["无纸化会议系统", "视频会议系统", "会议平板", "数字会议系统维保服务", "智慧会议室改造"]
+ANNOUNCEMENT_TYPES = ["招标公告", "竞争性磋商", "单一来源", "更正公告", "招标预告"]
+PROJECT_TYPES = ["公开招标", "政府采购", "邀请招标", "竞争性谈判"]
+AMOUNTS = ["{:.0f}万元", "{:.2f}万元", "￥{:,.0f}元", "{:.0f}元", "详见公告", ""]
+
+
+class UnstyledExporter(ExcelExporter):
+    """不设置单元格样式的导出器，用于对照 _style_worksheet 的开销"""
+    
+    def _style_worksheet(self, ws, df):
+        pass
+
+
+def generate_records(count: int, seed: int = 0) -> list:
+    """
+    生成 FIELD_MAPPING 结构的合成记录（不含 normalizer 生成的类型列）
+    
+    Args:
+        count: 记录数
+        seed: 随机种子，相同种子生成相同的数据
+    
+    Returns:
+        记录列表
+    """
+    rng = random.Random(seed)
+    typed_columns = set(AMOUNT_FIELDS.values()) | set(DATETIME_FIELDS.values())
+    fields = [field for field in FIELD_MAPPING if field not in typed_columns]
+    
+    def amount(low: float, high: float) -> str:
+        template = rng.choice(AMOUNTS)
+        value = rng.uniform(low, high)
+        # 万元模板按万计，其余按元计
+        return template.format(value / 10000 if "万" in template else value)
+    
+    records = []
+    for index in range(count):
+        month, day = rng.randint(1, 12), rng.randint(1, 28)
+        subject = rng.choice(SUBJECTS)
+        record = {
+            "title": f"{rng.choice(UNITS)}{subject}采购项目（第{index}号）",
+            "publish_time": f"2025/{month}/{day}",
+            "publish_unit": rng.choice(UNITS),
+            "project_budget": amount(50000, 5000000),
+            "bid_file_time": f"2025-{month:02d}-{day:02d}至2025-{month:02d}-{min(day + 5, 28):02d}",
+            "registration_deadline": f"2025年{month}月{min(day + 10, 28)}日 {rng.randint(8, 17)}:00",
+            "registration_fee": amount(0, 1000),
+            "bid_bond": amount(1000, 100000),
+            "project_type": rng.choice(PROJECT_TYPES),
+            "region": rng.choice(REGIONS),
+            "announcement_type": rng.choice(ANNOUNCEMENT_TYPES),
+            "detail_url": f"https://www.yfbzb.com/detail/{10000000 + index}.html",
+            "duplicate_of": "",
+            "updated_at": "",
+            "updated_fields": "",
+            "matched_keywords": subject,
+            "source": "乙方宝",
+        }
+        # 少量重复和更新标记，使可选列不全为空
+        if index % 20 == 0 and index:
+            record["duplicate_of"] = f"https://www.yfbzb.com/detail/{10000000 + index - 1}.html"
+        if index % 50 == 0:
+            record["updated_at"] = f"2025-{month:02d}-{day:02d} 10:00:00"
+            record["updated_fields"] = "registration_deadline"
+        records.append({field: record.get(field, "") for field in fields})
+    return records
+
+
+def run_target(target: str, records: list, directory: str) -> (float, int, dict):
+    """
+    运行一次导出
+    
+    Args:
+        target: transform / csv / excel / excel_unstyled
+        records: 记录
+        directory: 输出目录
+    
+    Returns:
+        (耗时秒数, 输出文件字节数, 各阶段耗时)
+    """
+    profiler = StageProfiler()
+    exporter_class = UnstyledExporter if target == "excel_unstyled" else ExcelExporter
+    exporter = exporter_class(output_dir=directory, profiler=profiler)
+    
+    start = time.perf_counter()
+    if target == "transform":
+        exporter._transform_data(records)
+        filepath = None
+    elif target == "csv":
+        filepath = exporter.export_csv(records, filename="bench.csv")
+    else:
+        filepath = exporter.export(records, filename=f"bench_{target}.xlsx")
+    elapsed = time.perf_counter() - start
+    
+    size = os.path.getsize(filepath) if filepath else 0
+    if filepath:
+        os.remove(filepath)
+    stages = {stage: stats["total"] for stage, stats in profiler.summary()["stages"].items()}
+    return elapsed, size, stages
+
+
+def measure(target: str, records: list, directory: str, repeat: int, memory: bool = True) -> dict:
+    """
+    统计一个场景
+    
+    计时和内存分开运行：tracemalloc 会使分配密集的导出明显变慢，计时运行不开启。
+    
+    Args:
+        target: 导出目标
+        records: 记录
+        directory: 输出目录
+        repeat: 计时运行次数，取最好成绩
+        memory: 是否另外运行一次统计峰值内存
+    
+    Returns:
+        场景统计
+    """
+    runs = [run_target(target, records, directory) for _ in range(repeat)]
+    elapsed, size, stages = min(runs, key=lambda run: run[0])
+    
+    stats = {
+        "rows": len(records),
+        "seconds": elapsed,
+        "rows_per_sec": len(records) / elapsed if elapsed > 0 else 0.0,
+        "output_mb": size / 1024 / 1024,
+        "stages": stages,
+    }
+    
+    if memory:
+        tracemalloc.start()
+        run_target(target, records, directory)
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        stats["peak_mem_mb"] = peak / 1024 / 1024
+    return stats
+
+
+def compare(results: dict, baseline: dict, tolerance: float) -> list:
+    """
+    与基线比较
+    
+    Args:
+        results: 本次结果 {场景名: 统计}
+        baseline: 基线 {场景名: 统计}
+        tolerance: 容差比例
+    
+    Returns:
+        回退描述列表，为空表示通过
+    """
+    regressions = []
+    for name, stats in results.items():
+        base = baseline.get(name)
+        if not base:
+            continue
+        if stats["seconds"] > base["seconds"] * (1 + tolerance):
+            regressions.append(f"{name}: 耗时 {stats['seconds']:.2f}s > 基线 {base['seconds']:.2f}s")
+        if "peak_mem_mb" in stats and "peak_mem_mb" in base and \
+                stats["peak_mem_mb"] > base["peak_mem_mb"] * (1 + tolerance):
+            regressions.append(
+                f"{name}: 峰值内存 {stats['peak_mem_mb']:.1f}MB > 基线 {base['peak_mem_mb']:.1f}MB"
+            )
+        if stats["output_mb"] > base["output_mb"] * (1 + tolerance):
+            regressions.append(
+                f"{name}: 输出大小 {stats['output_mb']:.1f}MB > 基线 {base['output_mb']:.1f}MB"
+            )
+    return regressions
+
+
+def style_report(results: dict, sizes: list) -> list:
+    """
+    汇总 _style_worksheet 的开销：样式阶段本身的耗时，以及与不设置样式相比
+    整个导出（含保存逐单元格样式带来的额外开销）多出的耗时和文件大小
+    
+    Args:
+        results: 本次结果 {场景名: 统计}
+        sizes: 记录数列表
+    
+    Returns:
+        报告行
+    """
+    lines = []
+    for rows in sizes:
+        styled = results.get(f"excel_{rows}")
+        plain = results.get(f"excel_unstyled_{rows}")
+        if not styled:
+            continue
+        style_seconds = styled["stages"].get("export.excel_style", 0.0)
+        line = (f"  {rows:>7} 行: 样式阶段 {style_seconds:.2f}s，"
+                f"占 export 的 {style_seconds / styled['seconds']:.0%}")
+        if plain:
+            extra = styled["seconds"] - plain["seconds"]
+            save_extra = styled["stages"].get("export.excel_save", 0.0) - plain["stages"].get("export.excel_save", 0.0)
+            size_extra = styled["output_mb"] - plain["output_mb"]
+            line += (f"；与不设置样式相比总耗时 {extra:+.2f}s ({extra / plain['seconds']:+.0%})，"
+                     f"保存 {save_extra:+.2f}s，文件 {size_extra:+.1f}MB")
+        lines.append(line)
+    return lines
+
+
+def main():
+    parser = argparse.ArgumentParser(description="导出基准测试（合成记录）")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 10000, 100000, 500000], help="记录数")
+    parser.add_argument("--targets", nargs="+", choices=TARGETS, default=list(TARGETS), help="导出目标")
+    parser.add_argument("--excel-max-rows", type=int, default=100000,
+                        help="Excel场景的最大记录数（openpyxl 在内存中保存全部单元格，50万行需要数GB内存），默认%(default)s")
+    parser.add_argument("--repeat", type=int, default=3,
+                        help=f"每个场景运行次数，取最好成绩（超过 {REPEAT_MAX_ROWS} 行的场景只运行一次）")
+    parser.add_argument("--seed", type=int, default=0, help="合成数据的随机种子")
+    parser.add_argument("--no-memory", action="store_true", help="不统计峰值内存（省去每个场景的一次额外运行）")
+    parser.add_argument("--baseline", default=BASELINE_PATH, help="基线文件")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="允许的回退比例，默认25%%")
+    parser.add_argument("--update-baseline", action="store_true", help="用本次结果覆盖基线")
+    parser.add_argument("--json", metavar="PATH", help="把本次结果保存为JSON")
+    args = parser.parse_args()
+    
+    logging.getLogger().setLevel(logging.ERROR)
+    
+    results = {}
+    print(f"{'场景':<24}{'行数':>8}{'耗时(s)':>10}{'行/秒':>12}{'峰值内存(MB)':>14}{'输出(MB)':>10}")
+    with tempfile.TemporaryDirectory() as directory:
+        for rows in args.sizes:
+            records = generate_records(rows, seed=args.seed)
+            repeat = args.repeat if rows <= REPEAT_MAX_ROWS else 1
+            for target in args.targets:
+                name = f"{target}_{rows}"
+                if target.startswith("excel") and rows > args.excel_max_rows:
+                    print(f"{name:<26}{'跳过（超过 --excel-max-rows）':>20}")
+                    continue
+                stats = measure(target, records, directory, repeat, memory=not args.no_memory)
+                results[name] = stats
+                peak = f"{stats['peak_mem_mb']:.1f}" if "peak_mem_mb" in stats else "-"
+                print(f"{name:<26}{rows:>8}{stats['seconds']:>10.2f}{stats['rows_per_sec']:>12.0f}"
+                      f"{peak:>14}{stats['output_mb']:>10.2f}")
+            del records
+    
+    lines = style_report(results, args.sizes)
+    if lines:
+        print("\n_style_worksheet 开销:")
+        for line in lines:
+            print(line)
+    
+    settings = {"seed": args.seed}
+    
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump({"settings": settings, "scenarios": results}, f, ensure_ascii=False, indent=2)
+    
+    if args.update_baseline:
+        # 只更新本次运行的场景，保留其余场景的基线
+        scenarios = {}
+        if os.path.exists(args.baseline):
+            with open(args.baseline, "r", encoding="utf-8") as f:
+                scenarios = json.load(f)["scenarios"]
+        scenarios.update(results)
+        with open(args.baseline, "w", encoding="utf-8") as f:
+            json.dump({"settings": settings, "scenarios": scenarios}, f, ensure_ascii=False, indent=2)
+        print(f"基线已更新: {args.baseline}")
+        return 0
+    
+    if not os.path.exists(args.baseline):
+        print("未找到基线文件，跳过比较（可使用 --update-baseline 生成）")
+        return 0
+    
+    with open(args.baseline, "r", encoding="utf-8") as f:
+        baseline = json.load(f)
+    if baseline.get("settings") != settings:
+        print("注意: 本次数据参数与基线不同，比较结果仅供参考")
+    
+    regressions = compare(results, baseline["scenarios"], args.tolerance)
+    if regressions:
+        print("\n性能回退:")
+        for line in regressions:
+            print(f"  {line}")
+        return 1
+    
+    print("\n与基线相比无明显回退")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,235 @@
+# -*- coding: utf-8 -*-
+"""
+解析器微基准测试
+
+对 corpus 目录下脱敏的列表页、详情页和日期字符串运行
+YfbzbScraper.parse_list / parse_detail / _parse_date：
+先与 corpus/golden 下的标准输出逐项比对，再统计每个页面的解析耗时和内存分配。
+更换解析器或正则实现前，用它确认结果不变且速度不退化。
+
+用法:
+  python benchmarks/bench_parsers.py                  # 校验并计时
+  python benchmarks/bench_parsers.py --check          # 只校验正确性
+  python benchmarks/bench_parsers.py --update-golden  # 有意改变解析结果后更新标准输出
+"""
+
+import os
+import sys
+import json
+import time
+import argparse
+import statistics
+import tracemalloc
+import logging
+from datetime import datetime
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(BENCH_DIR))
+
+from scraper import YfbzbScraper
+
+CORPUS_DIR = os.path.join(BENCH_DIR, "corpus")
+GOLDEN_DIR = os.path.join(CORPUS_DIR, "golden")
+
+# 列表页的时间过滤依赖截止时间，固定下来保证标准输出可复现
+CORPUS_CUTOFF = datetime(2025, 6, 1)
+
+
+def load_corpus() -> dict:
+    """
+    读取语料
+    
+    Returns:
+        {"list": {文件名: HTML}, "detail": {文件名: HTML}, "dates": [日期字符串]}
+    """
+    corpus = {}
+    for kind in ("list", "detail"):
+        directory = os.path.join(CORPUS_DIR, kind)
+        corpus[kind] = {}
+        for name in sorted(os.listdir(directory)):
+            if name.endswith(".html"):
+                with open(os.path.join(directory, name), 'r', encoding='utf-8') as f:
+                    corpus[kind][name] = f.read()
+    with open(os.path.join(CORPUS_DIR, "dates.txt"), 'r', encoding='utf-8') as f:
+        corpus["dates"] = [line.rstrip("\n") for line in f]
+    return corpus
+
+
+def make_scraper() -> YfbzbScraper:
+    """创建用于解析的爬虫实例（不发出任何请求）"""
+    scraper = YfbzbScraper()
+    scraper.cutoff_time = CORPUS_CUTOFF
+    return scraper
+
+
+def cases(scraper: YfbzbScraper, corpus: dict) -> list:
+    """
+    展开为 (类别, 名称, 调用) 列表，每个调用返回可JSON序列化的结果
+    """
+    def parse_list(html):
+        rows, has_more = scraper.parse_list(html)
+        return {"rows": rows, "has_more": has_more}
+    
+    def parse_date(value):
+        date = scraper._parse_date(value)
+        return date.isoformat() if date else None
+    
+    result = []
+    for name, html in corpus["list"].items():
+        result.append(("list", name, lambda html=html: parse_list(html)))
+    for name, html in corpus["detail"].items():
+        result.append(("detail", name, lambda html=html: scraper.parse_detail(html)))
+    for value in corpus["dates"]:
+        result.append(("dates", value, lambda value=value: parse_date(value)))
+    return result
+
+
+def golden_path(kind: str) -> str:
+    return os.path.join(GOLDEN_DIR, f"{kind}.json")
+
+
+def load_golden() -> dict:
+    golden = {}
+    for kind in ("list", "detail", "dates"):
+        path = golden_path(kind)
+        if os.path.exists(path):
+            with open(path, 'r', encoding='utf-8') as f:
+                golden[kind] = json.load(f)
+    return golden
+
+
+def check(outputs: dict, golden: dict) -> list:
+    """
+    与标准输出比对
+    
+    Args:
+        outputs: {类别: {名称: 结果}}
+        golden: 标准输出，结构同上
+    
+    Returns:
+        差异描述列表，为空表示一致
+    """
+    problems = []
+    for kind, results in outputs.items():
+        expected = golden.get(kind)
+        if expected is None:
+            problems.append(f"{kind}: 缺少标准输出，请先运行 --update-golden")
+            continue
+        for name in sorted(set(results) | set(expected)):
+            if name not in expected:
+                problems.append(f"{kind}/{name}: 新增语料，标准输出中没有")
+            elif name not in results:
+                problems.append(f"{kind}/{name}: 标准输出中的语料已不存在")
+            elif results[name] != expected[name]:
+                problems.append(f"{kind}/{name}: 结果不一致")
+                problems.append(f"    期望: {json.dumps(expected[name], ensure_ascii=False)[:300]}")
+                problems.append(f"    实际: {json.dumps(results[name], ensure_ascii=False)[:300]}")
+    return problems
+
+
+def measure(call, repeat: int) -> dict:
+    """
+    统计一个调用的耗时和内存分配
+    
+    Args:
+        call: 无参调用
+        repeat: 计时次数
+    
+    Returns:
+        {"median_ms", "min_ms", "alloc_kb", "peak_kb"}
+    """
+    call()  # 预热
+    
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        call()
+        timings.append(time.perf_counter() - start)
+    
+    # 单独运行统计内存，避免 tracemalloc 的开销计入耗时
+    # 峰值：重新开始跟踪后只运行这一次调用
+    tracemalloc.start()
+    call()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    
+    # 分配量：调用前后快照的净增长
+    tracemalloc.start()
+    before = tracemalloc.take_snapshot()
+    call()
+    after = tracemalloc.take_snapshot()
+    tracemalloc.stop()
+    allocated = sum(stat.size_diff for stat in after.compare_to(before, "filename") if stat.size_diff > 0)
+    
+    return {
+        "median_ms": statistics.median(timings) * 1000,
+        "min_ms": min(timings) * 1000,
+        "alloc_kb": allocated / 1024,
+        "peak_kb": peak / 1024,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="解析器微基准测试（离线语料）")
+    parser.add_argument("--check", action="store_true", help="只校验正确性，不计时")
+    parser.add_argument("--update-golden", action="store_true", help="用当前解析结果覆盖标准输出")
+    parser.add_argument("--repeat", type=int, default=20, help="每个页面的计时次数")
+    parser.add_argument("--kind", choices=["list", "detail", "dates"], nargs="+",
+                        default=["list", "detail", "dates"], help="只运行指定类别")
+    parser.add_argument("--json", metavar="PATH", help="把计时结果保存为JSON")
+    args = parser.parse_args()
+    
+    logging.getLogger().setLevel(logging.ERROR)
+    
+    scraper = make_scraper()
+    all_cases = [case for case in cases(scraper, load_corpus()) if case[0] in args.kind]
+    
+    outputs = {kind: {} for kind in args.kind}
+    for kind, name, call in all_cases:
+        outputs[kind][name] = call()
+    
+    if args.update_golden:
+        os.makedirs(GOLDEN_DIR, exist_ok=True)
+        for kind, results in outputs.items():
+            with open(golden_path(kind), 'w', encoding='utf-8') as f:
+                json.dump(results, f, ensure_ascii=False, indent=2)
+                f.write("\n")
+        print(f"标准输出已更新: {GOLDEN_DIR}")
+        return 0
+    
+    problems = check(outputs, load_golden())
+    if problems:
+        print("解析结果与标准输出不一致:")
+        for line in problems:
+            print(f"  {line}")
+        return 1
+    print(f"解析结果与标准输出一致 ({len(all_cases)} 项)")
+    
+    if args.check:
+        return 0
+    
+    print(f"\n{'语料':<34}{'中位(ms)':>10}{'最快(ms)':>10}{'分配(KB)':>10}{'峰值(KB)':>10}")
+    results = {}
+    for kind in args.kind:
+        kind_cases = [(name, call) for case_kind, name, call in all_cases if case_kind == kind]
+        if kind == "dates":
+            # 日期解析单次耗时很短，整组作为一项统计
+            calls = [call for _, call in kind_cases]
+            kind_cases = [(f"全部 {len(calls)} 个日期", lambda: [call() for call in calls])]
+        for name, call in kind_cases:
+            stats = measure(call, args.repeat)
+            label = f"{kind}/{name}"
+            results[label] = stats
+            print(
+                f"{label:<36}{stats['median_ms']:>10.2f}{stats['min_ms']:>10.2f}"
+                f"{stats['alloc_kb']:>10.1f}{stats['peak_kb']:>10.1f}"
+            )
+    
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump(results, f, ensure_ascii=False, indent=2)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
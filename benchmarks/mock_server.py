@@ -0,0 +1,219 @@
+# -*- coding: utf-8 -*-
+"""
+本地模拟乙方宝服务器 - 供基准测试使用
+
+用 fixtures 目录下录制并脱敏的列表页/详情页模板生成响应：
+- /search/invitedBidSearch?keyword=...&pageNo=N  列表页
+- /detail/<id>.html                             详情页
+
+可配置响应延迟、抖动和错误率，用于在不访问真实网站的情况下衡量爬虫性能。
+"""
+
+import os
+import sys
+import time
+import random
+import threading
+from datetime import datetime
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from urllib.parse import urlparse, parse_qs
+from typing import Dict
+
+FIXTURES_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures")
+
+REGIONS = ["北京", "上海", "广东", "浙江", "江苏", "四川", "湖北", "山东"]
+TYPES = ["招标公告", "询价公告", "竞争性磋商", "竞争性谈判"]
+
+
+def _load_fixture(name: str) -> str:
+    with open(os.path.join(FIXTURES_DIR, name), 'r', encoding='utf-8') as f:
+        return f.read()
+
+
+def _render(template: str, values: Dict) -> str:
+    for key, value in values.items():
+        template = template.replace("{{" + key + "}}", str(value))
+    return template
+
+
+class _QuietHTTPServer(ThreadingHTTPServer):
+    """客户端断开连接属于正常情况，不打印异常堆栈"""
+    
+    daemon_threads = True
+    
+    def handle_error(self, request, client_address):
+        if not isinstance(sys.exc_info()[1], ConnectionError):
+            super().handle_error(request, client_address)
+
+
+class MockYfbzbServer:
+    """模拟乙方宝服务器（后台线程运行）"""
+    
+    def __init__(self, total_rows: int = 300, page_size: int = 30, latency: float = 0.02,
+                 jitter: float = 0.01, error_rate: float = 0.0, seed: int = 42):
+        """
+        初始化模拟服务器
+        
+        Args:
+            total_rows: 搜索结果总条数
+            page_size: 每页条数（与 YFBZB_CONFIG["page_size"] 一致）
+            latency: 每个响应的基础延迟（秒）
+            jitter: 延迟抖动幅度（秒），实际延迟在 latency ± jitter 之间均匀分布
+            error_rate: 返回 HTTP 500 的概率
+            seed: 随机种子，保证多次运行的延迟和错误序列可复现
+        """
+        self.total_rows = total_rows
+        self.page_size = page_size
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        
+        self._random = random.Random(seed)
+        self._random_lock = threading.Lock()
+        self._stats_lock = threading.Lock()
+        self.requests = 0
+        self.errors = 0
+        
+        self._list_page = _load_fixture("list_page.html")
+        self._list_row = _load_fixture("list_row.html")
+        self._detail_page = _load_fixture("detail_page.html")
+        
+        self._server = None
+        self._thread = None
+    
+    @property
+    def base_url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+    
+    def _row_values(self, row_id: int, keyword: str) -> Dict:
+        return {
+            "id": f"{row_id:08d}",
+            "href": f"/detail/{row_id:08d}.html",
+            "title": f"某市第{row_id}号{keyword}系统采购项目招标公告",
+            "type": TYPES[row_id % len(TYPES)],
+            "region": REGIONS[row_id % len(REGIONS)],
+            # 发布时间始终为今天，保证落在爬虫的时间范围内
+            "date": datetime.now().strftime("%Y/%m/%d"),
+            "budget": 10 + row_id % 90,
+            "fee": 300 + (row_id % 5) * 100,
+            "bond": 5000 + (row_id % 10) * 1000,
+        }
+    
+    def render_list(self, keyword: str, page: int) -> str:
+        start = (page - 1) * self.page_size
+        end = min(start + self.page_size, self.total_rows)
+        rows = "".join(
+            _render(self._list_row, self._row_values(row_id, keyword))
+            for row_id in range(start, end)
+        )
+        return _render(self._list_page, {
+            "keyword": keyword,
+            "total": self.total_rows,
+            "rows": rows,
+            "next_page": page + 1,
+        })
+    
+    def render_detail(self, row_id: int) -> str:
+        return _render(self._detail_page, self._row_values(row_id, "无纸化会议"))
+    
+    def _delay_and_fail(self) -> bool:
+        """按配置等待，返回本次是否模拟错误"""
+        with self._random_lock:
+            delay = self.latency + self._random.uniform(-self.jitter, self.jitter)
+            fail = self._random.random() < self.error_rate
+        if delay > 0:
+            time.sleep(delay)
+        return fail
+    
+    def _make_handler(self):
+        server = self
+        
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+            # 响应头和响应体分两次写出，关闭Nagle算法避免延迟确认造成的额外40ms
+            disable_nagle_algorithm = True
+            
+            def do_GET(self):
+                url = urlparse(self.path)
+                query = parse_qs(url.query)
+                with server._stats_lock:
+                    server.requests += 1
+                
+                if server._delay_and_fail():
+                    with server._stats_lock:
+                        server.errors += 1
+                    self._send(500, "Internal Server Error")
+                    return
+                
+                if url.path == "/search/invitedBidSearch":
+                    page = int(query.get("pageNo", ["1"])[0])
+                    keyword = query.get("keyword", [""])[0]
+                    self._send(200, server.render_list(keyword, page))
+                elif url.path.startswith("/detail/") and url.path.endswith(".html"):
+                    row_id = int(url.path[len("/detail/"):-len(".html")])
+                    self._send(200, server.render_detail(row_id))
+                else:
+                    self._send(404, "Not Found")
+            
+            def _send(self, status: int, body: str):
+                data = body.encode("utf-8")
+                self.send_response(status)
+                self.send_header("Content-Type", "text/html; charset=utf-8")
+                self.send_header("Content-Length", str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+            
+            def log_message(self, format, *args):
+                pass
+        
+        return Handler
+    
+    def start(self, port: int = 0) -> "MockYfbzbServer":
+        """
+        启动服务器
+        
+        Args:
+            port: 监听端口，0表示随机空闲端口
+        
+        Returns:
+            自身，便于链式调用
+        """
+        self._server = _QuietHTTPServer(("127.0.0.1", port), self._make_handler())
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+    
+    def stop(self):
+        """停止服务器"""
+        if self._server:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
+    
+    def reset_stats(self):
+        """清零请求统计"""
+        with self._stats_lock:
+            self.requests = 0
+            self.errors = 0
+
+
+if __name__ == "__main__":
+    import argparse
+    
+    parser = argparse.ArgumentParser(description="本地模拟乙方宝服务器")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--rows", type=int, default=300, help="搜索结果总条数")
+    parser.add_argument("--latency", type=float, default=0.02, help="基础延迟（秒）")
+    parser.add_argument("--jitter", type=float, default=0.01, help="延迟抖动（秒）")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="HTTP 500 比例")
+    args = parser.parse_args()
+    
+    mock = MockYfbzbServer(total_rows=args.rows, latency=args.latency,
+                           jitter=args.jitter, error_rate=args.error_rate).start(args.port)
+    print(f"模拟服务器已启动: {mock.base_url}  (Ctrl+C 退出)", flush=True)
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        mock.stop()
@@ -0,0 +1,233 @@
+# -*- coding: utf-8 -*-
+"""
+断点模块 - 抓取进度的保存与恢复
+
+断点由两个文件组成：
+- 状态文件 (JSON)：抓取参数、时间范围、关键词游标、已完成页数、当前关键词的列表行
+- 记录日志 (JSON Lines)：每条已完成的记录（含详情字段）追加写入，避免反复重写大文件
+"""
+
+import os
+import json
+from datetime import datetime
+from typing import List, Dict
+import logging
+
+from config import CHECKPOINT_CONFIG
+
+logger = logging.getLogger(__name__)
+
+
+class CrawlCheckpoint:
+    """抓取断点"""
+    
+    VERSION = 1
+    
+    def __init__(self, path: str, fsync_every: int = None):
+        """
+        初始化断点
+        
+        Args:
+            path: 状态文件路径，记录日志保存在同目录的 <path>.records.jsonl
+            fsync_every: 每追加多少条记录强制落盘一次
+        """
+        self.path = path
+        self.records_path = f"{path}.records.jsonl"
+        self.fsync_every = fsync_every or CHECKPOINT_CONFIG["fsync_every"]
+        
+        self.state: Dict = {}
+        self._records: Dict[int, List[Dict]] = {}
+        self._records_file = None
+        self._pending_sync = 0
+    
+    @property
+    def cutoff_time(self) -> datetime:
+        """断点记录的时间范围起点"""
+        return datetime.fromisoformat(self.state["cutoff_time"])
+    
+    @property
+    def keyword_index(self) -> int:
+        """当前关键词游标"""
+        return self.state["keyword_index"]
+    
+    @property
+    def pages_done(self) -> int:
+        """当前关键词已完成的列表页数"""
+        return self.state["pages_done"]
+    
+    @property
+    def list_done(self) -> bool:
+        """当前关键词列表阶段是否已完成"""
+        return self.state["list_done"]
+    
+    @property
+    def rows(self) -> List[Dict]:
+        """当前关键词已抓取的列表行"""
+        return self.state["rows"]
+    
+    def exists(self) -> bool:
+        """断点文件是否存在"""
+        return os.path.exists(self.path)
+    
+    def start(self, params: Dict, cutoff_time: datetime):
+        """
+        开始新的抓取，丢弃旧断点
+        
+        Args:
+            params: 抓取参数（用于恢复时校验）
+            cutoff_time: 时间范围起点
+        """
+        self.clear()
+        self.state = {
+            "version": self.VERSION,
+            "params": params,
+            "cutoff_time": cutoff_time.isoformat(),
+            "keyword_index": 0,
+            "pages_done": 0,
+            "list_done": False,
+            "rows": [],
+        }
+        self._records = {}
+        self.save()
+    
+    def resume(self, params: Dict) -> bool:
+        """
+        加载断点
+        
+        Args:
+            params: 本次抓取参数，与断点参数不一致时不恢复
+        
+        Returns:
+            是否成功加载
+        """
+        if not self.exists():
+            logger.info("未找到断点文件，将从头开始抓取")
+            return False
+        
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                state = json.load(f)
+        except (OSError, ValueError) as e:
+            logger.warning(f"断点文件损坏，将从头开始抓取: {e}")
+            return False
+        
+        if state.get("version") != self.VERSION or state.get("params") != params:
+            logger.warning("断点参数与本次抓取不一致，将从头开始抓取")
+            return False
+        
+        self.state = state
+        self._records = {}
+        if os.path.exists(self.records_path):
+            with open(self.records_path, 'r', encoding='utf-8') as f:
+                for line in f:
+                    try:
+                        entry = json.loads(line)
+                    except ValueError:
+                        # 进程被杀时最后一行可能不完整
+                        continue
+                    self._records.setdefault(entry["keyword_index"], []).append(entry["record"])
+        
+        total = sum(len(records) for records in self._records.values())
+        logger.info(
+            f"已加载断点: 关键词 {self.keyword_index + 1}/{len(params['keywords'])}, "
+            f"已完成 {self.pages_done} 页, 已完成记录 {total} 条"
+        )
+        return True
+    
+    def records_for(self, keyword_index: int) -> List[Dict]:
+        """
+        获取某个关键词已完成的记录
+        
+        Args:
+            keyword_index: 关键词序号
+        
+        Returns:
+            记录列表
+        """
+        return self._records.get(keyword_index, [])
+    
+    def page_done(self, page: int, rows: List[Dict]):
+        """
+        记录列表页完成
+        
+        Args:
+            page: 已完成的页码
+            rows: 当前关键词累计的列表行
+        """
+        self.state["pages_done"] = page
+        self.state["rows"] = rows
+        self.save()
+    
+    def list_finished(self):
+        """记录当前关键词列表阶段完成"""
+        self.state["list_done"] = True
+        self.save()
+    
+    def record_done(self, keyword_index: int, record: Dict):
+        """
+        追加一条已完成的记录
+        
+        Args:
+            keyword_index: 关键词序号
+            record: 完整记录
+        """
+        if self._records_file is None:
+            self._records_file = open(self.records_path, 'a', encoding='utf-8')
+        
+        self._records_file.write(json.dumps(
+            {"keyword_index": keyword_index, "record": record},
+            ensure_ascii=False, default=str
+        ))
+        self._records_file.write("\n")
+        self._records_file.flush()
+        self._records.setdefault(keyword_index, []).append(record)
+        
+        self._pending_sync += 1
+        if self._pending_sync >= self.fsync_every:
+            os.fsync(self._records_file.fileno())
+            self._pending_sync = 0
+    
+    def keyword_done(self, keyword_index: int):
+        """
+        记录关键词完成，游标移到下一个关键词
+        
+        Args:
+            keyword_index: 已完成的关键词序号
+        """
+        self.state["keyword_index"] = keyword_index + 1
+        self.state["pages_done"] = 0
+        self.state["list_done"] = False
+        self.state["rows"] = []
+        self.save()
+    
+    def save(self):
+        """保存状态文件（先写临时文件再替换，避免写一半被中断）"""
+        directory = os.path.dirname(self.path)
+        if directory and not os.path.exists(directory):
+            os.makedirs(directory)
+        
+        if self._records_file is not None:
+            self._records_file.flush()
+            os.fsync(self._records_file.fileno())
+            self._pending_sync = 0
+        
+        self.state["updated_at"] = datetime.now().isoformat()
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(self.state, f, ensure_ascii=False, default=str)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, self.path)
+    
+    def close(self):
+        """关闭记录日志"""
+        if self._records_file is not None:
+            self._records_file.close()
+            self._records_file = None
+    
+    def clear(self):
+        """删除断点文件（抓取正常完成后调用）"""
+        self.close()
+        for path in (self.path, self.records_path, f"{self.path}.tmp"):
+            if os.path.exists(path):
+                os.remove(path)
@@ -0,0 +1,258 @@
+# -*- coding: utf-8 -*-
+"""
+协同抓取模块 - 基于工作队列的协调者/工作者模式
+
+- 协调者：清空队列，写入本次抓取参数（关键词、时间范围起点等），
+  为每个关键词投放第1页列表任务；自身也参与处理，队列处理完后合并结果交给导出模块
+- 工作者：领取任务并抓取解析，结果写回队列。列表任务完成时投放该页的详情任务和下一页列表任务
+
+每台机器/每个进程使用各自的IP配额和CPU，请求节奏仍由各自的限速器控制。
+"""
+
+import os
+import socket
+import threading
+from datetime import datetime
+from typing import List, Dict, Optional
+import logging
+
+from config import QUEUE_CONFIG
+from work_queue import WorkQueue, Task
+
+logger = logging.getLogger(__name__)
+
+LIST_TASK = "list"
+DETAIL_TASK = "detail"
+
+
+def default_worker_id() -> str:
+    """工作者标识：主机名-进程号"""
+    return f"{socket.gethostname()}-{os.getpid()}"
+
+
+class QueueWorker:
+    """队列工作者"""
+    
+    def __init__(self, scraper, queue: WorkQueue, worker_id: str = None, poll_interval: float = None):
+        """
+        初始化工作者
+        
+        Args:
+            scraper: YfbzbScraper 实例，并发数取其 max_workers
+            queue: 工作队列
+            worker_id: 工作者标识，默认为 主机名-进程号
+            poll_interval: 队列暂时为空时的轮询间隔（秒）
+        """
+        self.scraper = scraper
+        self.queue = queue
+        self.worker_id = worker_id or default_worker_id()
+        self.poll_interval = poll_interval or QUEUE_CONFIG["poll_interval"]
+        self.fetch_details = True
+        self.processed = 0
+        self._lock = threading.Lock()
+    
+    def configure(self) -> bool:
+        """
+        等待协调者写入抓取参数，并应用到爬虫上
+        
+        Returns:
+            是否取得参数（收到停止请求时为False）
+        """
+        params = self.queue.get_meta("params")
+        while params is None:
+            if self.scraper.stopped:
+                return False
+            logger.info("等待协调者初始化队列...")
+            self.scraper._sleep(self.poll_interval)
+            params = self.queue.get_meta("params")
+        
+        # 所有工作者使用协调者确定的时间范围起点，过滤口径一致
+        self.scraper.keywords = params["keywords"]
+        self.scraper.keyword_batch_size = params.get("keyword_batch_size", 1)
+        self.scraper.time_range_hours = params["time_range_hours"]
+        self.scraper.cutoff_time = datetime.fromisoformat(params["cutoff_time"])
+        self.scraper.max_pages = params["max_pages"]
+        self.fetch_details = params["fetch_details"]
+        return True
+    
+    def run(self) -> int:
+        """
+        处理任务直到队列清空或收到停止请求
+        
+        Returns:
+            本进程处理成功的任务数
+        """
+        if not self.configure():
+            return 0
+        
+        threads = [
+            threading.Thread(target=self._loop, name=f"queue-worker-{i}", daemon=True)
+            for i in range(max(1, self.scraper.max_workers))
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        return self.processed
+    
+    def _loop(self):
+        while not self.scraper.stopped:
+            task = self.queue.lease(self.worker_id)
+            if task is None:
+                if self.queue.is_drained():
+                    return
+                # 其他工作者手中的任务可能还会产生新任务
+                self.scraper._sleep(self.poll_interval)
+                continue
+            
+            try:
+                ok = self._handle(task)
+            except Exception as e:
+                logger.warning(f"处理任务出错 {task}: {e}")
+                self.queue.fail(task, str(e))
+                continue
+            
+            if ok:
+                with self._lock:
+                    self.processed += 1
+    
+    def _handle(self, task: Task) -> bool:
+        """处理一个任务，返回是否成功"""
+        scraper = self.scraper
+        
+        if task.kind == LIST_TASK:
+            keyword = task.payload["keyword"]
+            page = task.payload["page"]
+            html = scraper._make_request(scraper.search_url, scraper._search_params(keyword, page))
+            if not html:
+                if not scraper.stopped:
+                    self.queue.fail(task, "request failed")
+                return False
+            
+            rows, has_more = scraper.parse_list(html)
+            scraper.attribute_keywords(rows, task.payload.get("keywords") or [keyword])
+            logger.info(f"关键词 '{keyword}' 第 {page} 页: {len(rows)} 条公告")
+            
+            # 先投放后续任务再提交结果，队列不会在中途被判定为已清空
+            if self.fetch_details:
+                for item in rows:
+                    if item["detail_url"]:
+                        self.queue.enqueue(DETAIL_TASK, {"url": item["detail_url"]},
+                                           key=f"{DETAIL_TASK}:{item['detail_url']}")
+            if rows and has_more and page < scraper.max_pages:
+                payload = dict(task.payload, page=page + 1)
+                self.queue.enqueue(LIST_TASK, payload,
+                                   key=f"{LIST_TASK}:{payload['keyword_index']}:{page + 1}", priority=1)
+            
+            return self.queue.complete(task, {"rows": rows, "has_more": has_more})
+        
+        if task.kind == DETAIL_TASK:
+            html = scraper._make_request(task.payload["url"])
+            if not html:
+                if not scraper.stopped:
+                    self.queue.fail(task, "request failed")
+                return False
+            return self.queue.complete(task, scraper.parse_detail(html, task.payload["url"]))
+        
+        self.queue.fail(task, f"unknown task kind: {task.kind}")
+        return False
+
+
+class QueueCoordinator:
+    """队列协调者"""
+    
+    def __init__(self, scraper, queue: WorkQueue, worker_id: str = None):
+        """
+        初始化协调者
+        
+        Args:
+            scraper: YfbzbScraper 实例
+            queue: 工作队列
+            worker_id: 协调者参与处理任务时使用的工作者标识
+        """
+        self.scraper = scraper
+        self.queue = queue
+        self.worker = QueueWorker(scraper, queue, worker_id=worker_id)
+    
+    def start(self, fetch_details: bool):
+        """
+        清空队列并投放初始任务
+        
+        Args:
+            fetch_details: 是否抓取详情页
+        """
+        scraper = self.scraper
+        self.queue.reset()
+        batches = scraper.keyword_batches()
+        for index, batch in enumerate(batches):
+            self.queue.enqueue(LIST_TASK, {"keyword_index": index, "keyword": scraper.batch_query(batch),
+                                           "keywords": batch, "page": 1},
+                               key=f"{LIST_TASK}:{index}:1", priority=1)
+        # 参数最后写入：工作者看到参数时初始任务已全部入队
+        self.queue.set_meta("params", {
+            "keywords": list(scraper.keywords),
+            "keyword_batch_size": scraper.keyword_batch_size,
+            "time_range_hours": scraper.time_range_hours,
+            "cutoff_time": scraper.cutoff_time.isoformat(),
+            "max_pages": scraper.max_pages,
+            "fetch_details": fetch_details,
+        })
+        logger.info(f"已投放 {len(scraper.keywords)} 个关键词（{len(batches)} 次搜索）的列表任务")
+    
+    def run(self, fetch_details: bool = True) -> List[Dict]:
+        """
+        投放任务、参与处理，并在队列清空后合并结果
+        
+        Args:
+            fetch_details: 是否抓取详情页
+        
+        Returns:
+            合并后的抓取结果（与 scrape() 的结果格式一致）
+        """
+        self.start(fetch_details)
+        processed = self.worker.run()
+        logger.info(f"本进程处理了 {processed} 个任务")
+        
+        if self.scraper.stopped:
+            logger.info("协调者已停止，队列中的任务保留给其他工作者")
+            return []
+        
+        counts = self.queue.counts()
+        logger.info("队列处理完成: " + ", ".join(f"{status}={n}" for status, n in sorted(counts.items())))
+        return self.merge(fetch_details)
+    
+    def merge(self, fetch_details: bool = True) -> List[Dict]:
+        """
+        合并队列中的结果
+        
+        Args:
+            fetch_details: 是否合并详情字段
+        
+        Returns:
+            按关键词、页码排列的公告记录；详情任务失败的记录详情字段留空
+        """
+        details: Dict[str, Optional[Dict]] = {}
+        if fetch_details:
+            for entry in self.queue.results(DETAIL_TASK):
+                if entry["status"] == "done":
+                    details[entry["payload"]["url"]] = entry["result"]
+                else:
+                    logger.warning(f"详情抓取失败: {entry['payload']['url']} ({entry['error']})")
+        
+        pages = self.queue.results(LIST_TASK)
+        pages.sort(key=lambda entry: (entry["payload"]["keyword_index"], entry["payload"]["page"]))
+        
+        results = []
+        for entry in pages:
+            payload = entry["payload"]
+            if entry["status"] != "done":
+                logger.warning(f"列表页抓取失败: '{payload['keyword']}' 第 {payload['page']} 页 ({entry['error']})")
+                continue
+            for item in entry["result"]["rows"]:
+                if fetch_details:
+                    item.update(details.get(item["detail_url"]) or self.scraper._empty_details())
+                self.scraper.metrics.record_scraped()
+                results.append(item)
+        
+        logger.info(f"合并完成，共 {len(results)} 条公告")
+        return results
@@ -0,0 +1,145 @@
+# -*- coding: utf-8 -*-
+"""
+并发控制模块 - AIMD 自适应并发上限
+
+固定的详情并发数在网站空闲时浪费吞吐，在高峰期又容易触发限流。
+AIMDConcurrency 按请求结果动态调整同时进行的请求数：
+- 请求成功且耗时正常：加性增加（每完成“上限”个请求，上限加1）
+- 429/5xx、超时等请求错误或耗时突增：乘性减少（上限乘以 decrease_factor）
+
+同一时刻发出的一批请求往往同时变慢，因此降低上限后，在降低之前发出的请求
+再报告拥塞时不再重复降低（每个往返最多降低一次）。
+"""
+
+import time
+import threading
+from typing import Dict, Optional
+import logging
+
+from config import CONCURRENCY_CONFIG
+
+logger = logging.getLogger(__name__)
+
+# 等待并发名额时检查停止信号的间隔（秒）
+WAIT_POLL_INTERVAL = 0.2
+
+
+class AIMDConcurrency:
+    """自适应并发上限（线程安全）"""
+    
+    def __init__(self, initial: int, config: Dict = None, metrics=None):
+        """
+        初始化并发控制
+        
+        Args:
+            initial: 初始上限（通常为 max_workers），限制在 [min, max] 之间
+            config: 并发控制配置，默认取 CONCURRENCY_CONFIG
+            metrics: 运行指标（可选），见 metrics.CrawlMetrics；上限变化时更新
+        """
+        config = config or CONCURRENCY_CONFIG
+        self.min_limit = config["min"]
+        self.max_limit = config["max"]
+        self.decrease_factor = config["decrease_factor"]
+        self.latency_spike = config["latency_spike"]
+        self.baseline_alpha = config["baseline_alpha"]
+        self.min_samples = config["min_samples"]
+        self.metrics = metrics
+        
+        self.limit = float(min(self.max_limit, max(self.min_limit, initial)))
+        self.in_flight = 0
+        self.baseline: Optional[float] = None
+        self.samples = 0
+        self.decreases = 0
+        
+        self._last_decrease = 0.0
+        self._cond = threading.Condition()
+        self._publish()
+    
+    @property
+    def current(self) -> int:
+        """当前允许的同时请求数"""
+        return int(self.limit)
+    
+    def _publish(self):
+        if self.metrics:
+            self.metrics.set_concurrency_limit(self.current)
+    
+    def acquire(self, stop_event: threading.Event = None) -> Optional[float]:
+        """
+        等待一个并发名额
+        
+        Args:
+            stop_event: 停止信号，置位时立即返回
+        
+        Returns:
+            名额的获得时间（传给 release）；收到停止信号时为None
+        """
+        with self._cond:
+            while self.in_flight >= self.current:
+                if stop_event is not None and stop_event.is_set():
+                    return None
+                self._cond.wait(WAIT_POLL_INTERVAL)
+            if stop_event is not None and stop_event.is_set():
+                return None
+            self.in_flight += 1
+            return time.monotonic()
+    
+    def try_acquire(self) -> Optional[float]:
+        """
+        不等待地获取一个并发名额（如对冲请求：并发已满时不再额外发出请求）
+        
+        Returns:
+            名额的获得时间（传给 release）；没有空闲名额时为None
+        """
+        with self._cond:
+            if self.in_flight >= self.current:
+                return None
+            self.in_flight += 1
+            return time.monotonic()
+    
+    def release(self, started: float, latency: float = None, congested: bool = False, reason: str = ""):
+        """
+        归还名额并按请求结果调整上限
+        
+        Args:
+            started: acquire 返回的时间
+            latency: 请求耗时（秒），请求失败时为None
+            congested: 是否为拥塞信号（429/5xx、超时等请求错误）
+            reason: 拥塞原因，用于日志
+        """
+        with self._cond:
+            # 只有上限确实被用满时才增加，否则（如串行翻页）上限会无限制地增长
+            saturated = self.in_flight >= self.current
+            self.in_flight -= 1
+            
+            if latency is not None:
+                if not congested and self.baseline is not None and self.samples >= self.min_samples \
+                        and latency > self.baseline * self.latency_spike:
+                    congested = True
+                    reason = f"耗时 {latency:.2f}s 超过基线 {self.baseline:.2f}s 的 {self.latency_spike:g} 倍"
+                # 突增的耗时同样平滑进基线：网站整体变慢后基线随之上移，不会一直判为拥塞
+                self.samples += 1
+                self.baseline = latency if self.baseline is None else \
+                    self.baseline + self.baseline_alpha * (latency - self.baseline)
+            
+            old = self.current
+            if congested:
+                # 降低之前发出的请求报告的拥塞已经反映在这次降低中
+                if started >= self._last_decrease:
+                    self.limit = max(self.min_limit, self.limit * self.decrease_factor)
+                    self._last_decrease = time.monotonic()
+                    self.decreases += 1
+                    logger.info(f"并发上限 {old} -> {self.current}（{reason}）")
+            elif latency is not None and saturated:
+                self.limit = min(self.max_limit, self.limit + 1 / self.limit)
+                if self.current != old:
+                    logger.info(f"并发上限 {old} -> {self.current}")
+            
+            if self.current != old:
+                self._publish()
+            self._cond.notify_all()
+    
+    def describe(self) -> str:
+        """并发控制统计，用于日志"""
+        return (f"自适应并发: 当前上限 {self.current}（范围 {self.min_limit}-{self.max_limit}），"
+                f"降低 {self.decreases} 次")
@@ -25,6 +25,16 @@ SEARCH_CONFIG = {
     
     # 时间范围 (小时)
     "time_range_hours": 48,
+    
+    # 每次搜索合并的关键词数 (1 表示每个关键词单独搜索)
+    # 合并后列表页请求约减少为 1/N，返回的公告按标题归属到各关键词 (matched_keywords)
+    "keyword_batch_size": 1,
+    
+    # 合并关键词时的分隔符
+    "keyword_batch_separator": " ",
+    
+    # 合并搜索时覆盖的搜索参数 (如 {"searchMode": 2})，网站多词检索的参数以实际效果为准
+    "keyword_batch_params": {},
 }
 
 # 请求配置
@@ -38,6 +48,19 @@ REQUEST_CONFIG = {
     # 重试次数
     "max_retries": 3,
     
+    # 详情页并发抓取数 (请求节奏仍受 request_delay 限制)
+    "max_workers": 1,
+    
+    # HTTP传输: "requests" (HTTP/1.1) 或 "http2" (需安装 httpx[http2]，并发请求共用一个连接)
+    "transport": "requests",
+    
+    # 连接池: 缓存连接的主机数 / 每个主机保持的最大连接数 (不小于详情并发数)
+    "pool_connections": 10,
+    "pool_maxsize": 10,
+    
+    # 抓取开始前预先建立连接 (含DNS解析和TLS握手)
+    "prewarm": True,
+    
     # 请求头 - 不设置Accept-Encoding让requests自动处理
     "headers": {
         "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36",
@@ -66,6 +89,155 @@ OUTPUT_CONFIG = {
     }
 }
 
+# 断点配置
+CHECKPOINT_CONFIG = {
+    # 断点文件名 (保存在输出目录下)
+    "filename": ".crawl_checkpoint.json",
+    
+    # 每追加多少条已完成记录强制落盘一次
+    "fsync_every": 10,
+}
+
+# 指标配置
+METRICS_CONFIG = {
+    # HTTP指标端点监听地址 (默认只允许本机访问)
+    "listen_host": "127.0.0.1",
+    
+    # 请求/解析耗时直方图分桶 (秒)
+    "latency_buckets": [0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30],
+}
+
+# 分布式工作队列配置 (协调者/工作者模式)
+QUEUE_CONFIG = {
+    # 任务被领取后多久未完成即视为超时，重新可被领取 (秒)
+    "visibility_timeout": 120,
+    
+    # 每个任务最多尝试次数
+    "max_attempts": 3,
+    
+    # 失败任务重新可被领取前的等待时间 (秒)
+    "retry_delay": 5,
+    
+    # 队列暂时为空时的轮询间隔 (秒)
+    "poll_interval": 1.0,
+}
+
+# 详情抓取优先级配置 (设置了时间/请求预算时，按得分从高到低抓取详情)
+PRIORITY_CONFIG = {
+    # 各项得分的权重
+    "weights": {
+        "title": 0.4,    # 标题与关键词的相关度
+        "recency": 0.3,  # 发布时间越新得分越高
+        "region": 0.15,  # 地区是否在关注列表中
+        "type": 0.15,    # 公告类型
+    },
+    
+    # 关注的地区 (包含匹配，如 "浙江" 可匹配 "浙江-杭州")，为空表示不按地区区分
+    "region_allowlist": [],
+    
+    # 公告类型得分 (0-1)，未列出的类型按 default 计
+    "type_scores": {
+        "招标公告": 1.0,
+        "竞争性磋商": 0.9,
+        "竞争性谈判": 0.9,
+        "询价公告": 0.8,
+        "单一来源": 0.5,
+        "变更公告": 0.3,
+        "采购意向": 0.2,
+        "default": 0.5,
+    },
+}
+
+# 近似重复公告检测配置
+DEDUP_CONFIG = {
+    # 标题索引文件名 (保存在输出目录下，跨次运行累积)
+    "filename": ".title_index.jsonl",
+    
+    # 标题 SimHash 的汉明距离不超过该值视为近似重复
+    "max_distance": 4,
+    
+    # 去掉公告类型等套话后，标题少于该长度时不参与去重（太短容易误判）
+    "min_title_length": 6,
+}
+
+# 请求对冲配置 (--hedge)
+HEDGE_CONFIG = {
+    # 请求耗时超过近期请求耗时的该分位数时，再发出一个相同的请求，取先完成的一个
+    "percentile": 0.95,
+    
+    # 统计分位数所用的近期请求数
+    "window": 200,
+    
+    # 样本少于该数量时不对冲
+    "min_samples": 20,
+    
+    # 对冲等待时间的下限 (秒)，很快的请求不值得对冲
+    "min_delay": 0.1,
+}
+
+# 自适应并发配置 (--adaptive)
+CONCURRENCY_CONFIG = {
+    # 并发上限的范围
+    "min": 1,
+    "max": 16,
+    
+    # 拥塞时上限乘以该系数
+    "decrease_factor": 0.5,
+    
+    # 请求耗时超过基线的该倍数视为拥塞
+    "latency_spike": 3.0,
+    
+    # 耗时基线的指数平滑系数
+    "baseline_alpha": 0.1,
+    
+    # 基线样本少于该数量时不判断耗时突增
+    "min_samples": 10,
+}
+
+# 历史回溯配置 (--from / --to)
+BACKFILL_CONFIG = {
+    # 初始时间窗口 (天)；窗口内公告超过 max_pages 页时自动对半拆分
+    "window_days": 7,
+    
+    # 同时抓取的时间窗口数 (所有请求仍共用一个限速器)
+    "workers": 2,
+    
+    # 按日期检索的搜索参数，{start} / {end} 替换为窗口的首末日期 (含)
+    # 网站日期检索的参数名以实际效果为准
+    "date_params": {"timeType": 6, "startTime": "{start}", "endTime": "{end}"},
+    "date_format": "%Y-%m-%d",
+    
+    # 回溯目录名前缀 (保存在输出目录下，内含窗口清单、各窗口的断点和结果分片)
+    "dirname": "backfill",
+}
+
+# 本地查询服务配置 (query_api.py)
+QUERY_API_CONFIG = {
+    # 监听地址和端口 (局域网内共享时改为 "0.0.0.0")
+    "listen_host": "127.0.0.1",
+    "port": 8780,
+    
+    # 每页默认 / 最大记录数
+    "page_size": 50,
+    "max_page_size": 500,
+    
+    # CSV/XLSX 下载的最大记录数
+    "max_export_rows": 100000,
+    
+    # 后台抓取间隔 (秒)
+    "crawl_interval": 3600,
+}
+
+# 数据源配置 (见 sources.py)
+SOURCES_CONFIG = {
+    # 默认抓取的数据源；多个数据源时各自一个抓取任务，同时进行
+    "default": ["yfbzb"],
+    
+    # 按域名单独设置的请求间隔 (秒)，未列出的域名使用 REQUEST_CONFIG["request_delay"]
+    # 同一域名的请求共用一个限速器，不同域名互不等待
+    "host_delays": {},
+}
+
 # 字段映射配置 - 从网页提取的字段
 FIELD_MAPPING = {
     "title": "公告标题",
@@ -80,6 +252,16 @@ FIELD_MAPPING = {
     "region": "项目地区",
     "announcement_type": "公告类型",
     "detail_url": "详情链接",
+    "duplicate_of": "疑似重复于",
+    "updated_at": "内容更新时间",
+    "updated_fields": "更新字段",
+    "matched_keywords": "匹配关键词",
+    "source": "数据来源",
+    # normalizer 生成的类型列
+    "budget_yuan": "预算(元)",
+    "registration_fee_yuan": "报名费(元)",
+    "bid_bond_yuan": "保证金(元)",
+    "registration_deadline_at": "截止时间(标准化)",
 }
 
 # 输出列顺序
@@ -96,5 +278,14 @@ OUTPUT_COLUMNS = [
     "项目地区",
     "公告类型",
     "详情链接",
+    "疑似重复于",
+    "内容更新时间",
+    "更新字段",
+    "匹配关键词",
+    "数据来源",
+    "预算(元)",
+    "报名费(元)",
+    "保证金(元)",
+    "截止时间(标准化)",
 ]
 
@@ -0,0 +1,227 @@
+# -*- coding: utf-8 -*-
+"""
+去重模块 - 基于标题 SimHash 的近似重复公告检测
+
+同一项目常以略有不同的标题重复发布（更正、二次招标、跨地区转载）。
+标题先去掉公告类型等套话和标点，再按字符二元组计算64位 SimHash；
+汉明距离不超过 max_distance、且其中的数字（年份、包号、项目编号）完全相同的标题视为同一项目。
+
+索引把64位指纹切成 max_distance+1 段分桶：两个指纹的差异位不超过 max_distance 时，
+至少有一段完全相同（抽屉原理），查找时只需比较同桶的候选，几十万条标题下仍是亚毫秒级。
+索引以 JSON Lines 追加保存，跨次运行累积。
+"""
+
+import os
+import re
+import json
+import hashlib
+from datetime import datetime
+from typing import List, Dict, Optional, Tuple
+import logging
+
+from config import DEDUP_CONFIG
+
+logger = logging.getLogger(__name__)
+
+FINGERPRINT_BITS = 64
+
+# 标题中的数字（年份、包号、编号）不同的视为不同项目
+NUMBERS = re.compile(r'\d+')
+
+# 不区分项目的套话：公告类型、招标轮次、“项目”等
+BOILERPLATE = re.compile(
+    r'[\s\W_]+'
+    r'|(?:招标|采购|中标|成交|结果|更正|变更|澄清|终止|废标|流标|询价|竞争性磋商|竞争性谈判|单一来源)?公告'
+    r'|第[一二三四五六七八九十\d]+次|二次|重新招标|项目'
+)
+
+
+def normalize_title(title: str) -> str:
+    """
+    标题归一化：去掉标点、空白和套话
+    
+    Args:
+        title: 原始标题
+    
+    Returns:
+        归一化后的标题
+    """
+    return BOILERPLATE.sub('', title or '')
+
+
+def simhash(text: str) -> int:
+    """
+    计算文本的64位 SimHash（字符二元组，等权）
+    
+    Args:
+        text: 已归一化的文本
+    
+    Returns:
+        64位指纹
+    """
+    grams = [text[i:i + 2] for i in range(len(text) - 1)] or [text]
+    weights = [0] * FINGERPRINT_BITS
+    for gram in grams:
+        value = int.from_bytes(hashlib.blake2b(gram.encode('utf-8'), digest_size=8).digest(), 'big')
+        for bit in range(FINGERPRINT_BITS):
+            weights[bit] += 1 if value >> bit & 1 else -1
+    fingerprint = 0
+    for bit, weight in enumerate(weights):
+        if weight > 0:
+            fingerprint |= 1 << bit
+    return fingerprint
+
+
+class NearDuplicateIndex:
+    """近似重复标题索引"""
+    
+    def __init__(self, path: str = None, max_distance: int = None, min_title_length: int = None):
+        """
+        初始化索引
+        
+        Args:
+            path: 索引文件路径，None表示只在内存中使用
+            max_distance: 视为重复的最大汉明距离
+            min_title_length: 参与去重的最短归一化标题长度
+        """
+        self.path = path
+        self.max_distance = DEDUP_CONFIG["max_distance"] if max_distance is None else max_distance
+        self.min_title_length = min_title_length or DEDUP_CONFIG["min_title_length"]
+        
+        # 把指纹切成 max_distance+1 段，每段 (起始位, 掩码)
+        segments = self.max_distance + 1
+        self._bands: List[Tuple[int, int]] = []
+        start = 0
+        for i in range(segments):
+            width = FINGERPRINT_BITS // segments + (1 if i < FINGERPRINT_BITS % segments else 0)
+            self._bands.append((start, (1 << width) - 1))
+            start += width
+        
+        self._entries: List[Dict] = []
+        self._fingerprints: List[int] = []
+        self._buckets: Dict[Tuple[int, int], List[int]] = {}
+        self._keys: Dict[str, int] = {}
+        self._file = None
+        
+        if path and os.path.exists(path):
+            self._load()
+    
+    def __len__(self):
+        return len(self._entries)
+    
+    def _load(self):
+        with open(self.path, 'r', encoding='utf-8') as f:
+            for line in f:
+                try:
+                    entry = json.loads(line)
+                except ValueError:
+                    continue
+                self._insert(int(entry["fp"], 16), entry)
+        logger.info(f"已加载标题索引 {len(self._entries)} 条: {self.path}")
+    
+    def _insert(self, fingerprint: int, entry: Dict):
+        if entry["key"] in self._keys:
+            return
+        position = len(self._entries)
+        self._entries.append(entry)
+        self._fingerprints.append(fingerprint)
+        self._keys[entry["key"]] = position
+        for band, (shift, mask) in enumerate(self._bands):
+            self._buckets.setdefault((band, fingerprint >> shift & mask), []).append(position)
+    
+    def fingerprint(self, title: str) -> Optional[int]:
+        """
+        计算标题指纹
+        
+        Returns:
+            指纹；归一化后太短、不适合去重时为None
+        """
+        text = normalize_title(title)
+        if len(text) < self.min_title_length:
+            return None
+        return simhash(text)
+    
+    def find(self, fingerprint: int, numbers: str = "", exclude_key: str = None) -> Optional[Dict]:
+        """
+        查找近似重复的已有标题
+        
+        Args:
+            fingerprint: 标题指纹
+            numbers: 标题中的数字序列，必须与候选完全相同
+            exclude_key: 不与该键的条目匹配（同一公告再次出现不算重复）
+        
+        Returns:
+            距离最近的索引条目 {"key", "title", "fp", "nums", "seen"}，没有时为None
+        """
+        best, best_distance = None, self.max_distance + 1
+        checked = set()
+        for band, (shift, mask) in enumerate(self._bands):
+            for position in self._buckets.get((band, fingerprint >> shift & mask), ()):
+                if position in checked:
+                    continue
+                checked.add(position)
+                distance = bin(fingerprint ^ self._fingerprints[position]).count('1')
+                if distance >= best_distance:
+                    continue
+                entry = self._entries[position]
+                if entry["key"] != exclude_key and entry.get("nums", "") == numbers:
+                    best, best_distance = position, distance
+        return self._entries[best] if best is not None else None
+    
+    def add(self, key: str, title: str, fingerprint: int, numbers: str = ""):
+        """
+        加入索引（已存在的键忽略）
+        
+        Args:
+            key: 公告键（详情链接）
+            title: 原始标题
+            fingerprint: 标题指纹
+            numbers: 标题中的数字序列
+        """
+        if key in self._keys:
+            return
+        entry = {
+            "key": key,
+            "title": title,
+            "fp": f"{fingerprint:016x}",
+            "nums": numbers,
+            "seen": datetime.now().isoformat(timespec='seconds'),
+        }
+        self._insert(fingerprint, entry)
+        if self.path:
+            if self._file is None:
+                directory = os.path.dirname(self.path)
+                if directory and not os.path.exists(directory):
+                    os.makedirs(directory)
+                self._file = open(self.path, 'a', encoding='utf-8')
+            self._file.write(json.dumps(entry, ensure_ascii=False) + "\n")
+            self._file.flush()
+    
+    def check(self, key: str, title: str) -> Optional[Dict]:
+        """
+        检查一条公告是否与已有公告近似重复；不重复时把它登记为代表
+        
+        Args:
+            key: 公告键（详情链接）
+            title: 标题
+        
+        Returns:
+            代表公告的索引条目；不重复时为None
+        """
+        fingerprint = self.fingerprint(title)
+        if fingerprint is None:
+            return None
+        if key in self._keys:
+            # 已登记的代表再次出现
+            return None
+        numbers = "-".join(NUMBERS.findall(normalize_title(title)))
+        match = self.find(fingerprint, numbers, exclude_key=key)
+        if match is None:
+            self.add(key, title, fingerprint, numbers)
+        return match
+    
+    def close(self):
+        """关闭索引文件"""
+        if self._file:
+            self._file.close()
+            self._file = None
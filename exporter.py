@@ -4,8 +4,9 @@
 """
 
 import os
+import json
 from datetime import datetime
-from typing import List, Dict
+from typing import List, Dict, Iterable, TextIO
 import pandas as pd
 from openpyxl import Workbook
 from openpyxl.styles import Font, Alignment, Border, Side, PatternFill
@@ -14,24 +15,50 @@ from openpyxl.utils import get_column_letter
 import logging
 
 from config import OUTPUT_CONFIG, FIELD_MAPPING, OUTPUT_COLUMNS
+from profiler import NullProfiler
+from normalizer import normalize_records, AMOUNT_FIELDS, DATETIME_FIELDS
 
 logger = logging.getLogger(__name__)
 
 
+def write_jsonl(records: Iterable[Dict], stream: TextIO) -> int:
+    """
+    以JSON Lines格式逐条写出记录
+    
+    每写一行立即flush，下游可以在抓取过程中实时消费。
+    
+    Args:
+        records: 记录迭代器（可以是爬虫的记录流）
+        stream: 输出流
+    
+    Returns:
+        写出的记录数
+    """
+    count = 0
+    for record in records:
+        stream.write(json.dumps(record, ensure_ascii=False, default=str))
+        stream.write("\n")
+        stream.flush()
+        count += 1
+    return count
+
+
 class ExcelExporter:
     """Excel导出器"""
     
-    def __init__(self, output_dir: str = None):
+    def __init__(self, output_dir: str = None, profiler=None):
         """
         初始化导出器
         
         Args:
             output_dir: 输出目录
+            profiler: 性能统计器（可选），见 profiler.StageProfiler
         """
         self.output_dir = output_dir or OUTPUT_CONFIG["output_dir"]
         self.file_prefix = OUTPUT_CONFIG["file_prefix"]
         self.datetime_format = OUTPUT_CONFIG["datetime_format"]
         self.excel_config = OUTPUT_CONFIG["excel"]
+        self.profiler = profiler or NullProfiler()
         
         # 确保输出目录存在
         if not os.path.exists(self.output_dir):
@@ -41,36 +68,33 @@ class ExcelExporter:
         """
         转换数据为DataFrame
         
+        金额、截止时间在整批数据上一次性换算为数值/时间列（见 normalizer），原文列保持不变。
+        
         Args:
             data: 原始数据列表
-            
+        
         Returns:
             pandas DataFrame
         """
+        frame = normalize_records(data)
+        typed_columns = set(AMOUNT_FIELDS.values()) | set(DATETIME_FIELDS.values())
+        
         # 字段映射（英文 -> 中文）
         reverse_mapping = {v: k for k, v in FIELD_MAPPING.items()}
         
-        # 构建转换后的数据
-        transformed = []
-        for item in data:
-            row = {}
-            for col_name in OUTPUT_COLUMNS:
-                # 查找对应的英文字段名
-                eng_name = reverse_mapping.get(col_name)
-                if eng_name and eng_name in item:
-                    row[col_name] = item[eng_name]
-                else:
-                    # 尝试直接匹配
-                    for key, value in item.items():
-                        if FIELD_MAPPING.get(key) == col_name:
-                            row[col_name] = value
-                            break
-                    else:
-                        row[col_name] = ""
-            transformed.append(row)
-        
-        df = pd.DataFrame(transformed, columns=OUTPUT_COLUMNS)
-        return df
+        columns = {}
+        for col_name in OUTPUT_COLUMNS:
+            eng_name = reverse_mapping.get(col_name)
+            if eng_name in typed_columns and eng_name in frame:
+                # 空值写成空单元格，数值和时间保留类型便于在表格中排序筛选
+                column = frame[eng_name].astype(object)
+                columns[col_name] = column.where(frame[eng_name].notna(), None)
+            elif eng_name in frame:
+                columns[col_name] = frame[eng_name].fillna("")
+            else:
+                columns[col_name] = pd.Series("", index=frame.index)
+        
+        return pd.DataFrame(columns, columns=OUTPUT_COLUMNS)
     
     def _style_worksheet(self, ws, df: pd.DataFrame):
         """
@@ -109,6 +133,12 @@ class ExcelExporter:
             '项目地区': 15,
             '公告类型': 12,
             '详情链接': 40,
+            '疑似重复于': 40,
+            '内容更新时间': 20,
+            '更新字段': 25,
+            '匹配关键词': 25,
+            '数据来源': 12,
+            '截止时间(标准化)': 20,
         }
         
         for col_idx, col_name in enumerate(OUTPUT_COLUMNS, 1):
@@ -151,7 +181,7 @@ class ExcelExporter:
         Args:
             data: 要导出的数据列表
             filename: 自定义文件名（可选）
-            
+        
         Returns:
             导出的文件路径
         """
@@ -167,7 +197,8 @@ class ExcelExporter:
         filepath = os.path.join(self.output_dir, filename)
         
         # 转换数据
-        df = self._transform_data(data)
+        with self.profiler.timer("export.transform"):
+            df = self._transform_data(data)
         
         # 创建Excel文件
         wb = Workbook()
@@ -175,20 +206,23 @@ class ExcelExporter:
         ws.title = self.excel_config.get("sheet_name", "招标公告列表")
         
         # 写入数据
-        for row in dataframe_to_rows(df, index=False, header=True):
-            ws.append(row)
+        with self.profiler.timer("export.excel_rows"):
+            for row in dataframe_to_rows(df, index=False, header=True):
+                ws.append(row)
         
         # 应用样式
-        self._style_worksheet(ws, df)
+        with self.profiler.timer("export.excel_style"):
+            self._style_worksheet(ws, df)
         
         # 添加汇总信息工作表
+        sources = sorted({item.get("source") for item in data if item.get("source")})
         ws_summary = wb.create_sheet(title="汇总信息")
         summary_data = [
             ["抓取时间", datetime.now().strftime("%Y-%m-%d %H:%M:%S")],
             ["公告总数", len(data)],
             ["时间范围", "最近48小时"],
             ["搜索关键词", "无纸化会议"],
-            ["数据来源", "乙方宝 (www.yfbzb.com)"],
+            ["数据来源", "、".join(sources) if sources else "乙方宝 (www.yfbzb.com)"],
         ]
         
         for row_data in summary_data:
@@ -204,7 +238,8 @@ class ExcelExporter:
         ws_summary.column_dimensions['B'].width = 40
         
         # 保存文件
-        wb.save(filepath)
+        with self.profiler.timer("export.excel_save"):
+            wb.save(filepath)
         logger.info(f"Excel文件已保存: {filepath}")
         
         return filepath
@@ -216,7 +251,7 @@ class ExcelExporter:
         Args:
             data: 要导出的数据列表
             filename: 自定义文件名（可选）
-            
+        
         Returns:
             导出的文件路径
         """
@@ -232,11 +267,88 @@ class ExcelExporter:
         filepath = os.path.join(self.output_dir, filename)
         
         # 转换并导出
-        df = self._transform_data(data)
-        df.to_csv(filepath, index=False, encoding='utf-8-sig')
+        with self.profiler.timer("export.transform"):
+            df = self._transform_data(data)
+        with self.profiler.timer("export.csv_write"):
+            df.to_csv(filepath, index=False, encoding='utf-8-sig')
         
         logger.info(f"CSV文件已保存: {filepath}")
         return filepath
+    
+    def export_csv_stream(self, data: Iterable[Dict], filename: str = None, chunk_size: int = 5000) -> str:
+        """
+        分块导出记录流到CSV（内存占用与 chunk_size 成正比，用于回溯抓取等大批量数据）
+        
+        Args:
+            data: 要导出的数据（列表或迭代器）
+            filename: 自定义文件名（可选）
+            chunk_size: 每次转换并写入的记录数
+        
+        Returns:
+            导出的文件路径；没有数据时为None
+        """
+        if not filename:
+            timestamp = datetime.now().strftime(self.datetime_format)
+            filename = f"{self.file_prefix}_{timestamp}.csv"
+        
+        filepath = os.path.join(self.output_dir, filename)
+        
+        count = 0
+        chunk = []
+        
+        def flush():
+            with self.profiler.timer("export.transform"):
+                df = self._transform_data(chunk)
+            with self.profiler.timer("export.csv_write"):
+                # 只有第一块写表头和BOM
+                if count == len(chunk):
+                    df.to_csv(filepath, index=False, encoding='utf-8-sig')
+                else:
+                    df.to_csv(filepath, mode='a', header=False, index=False, encoding='utf-8')
+            chunk.clear()
+        
+        for record in data:
+            chunk.append(record)
+            count += 1
+            if len(chunk) >= chunk_size:
+                flush()
+        if chunk:
+            flush()
+        
+        if not count:
+            logger.warning("没有数据可导出")
+            return None
+        
+        logger.info(f"CSV文件已保存: {filepath} ({count} 条)")
+        return filepath
+    
+    def export_jsonl(self, data: Iterable[Dict], filename: str = None) -> str:
+        """
+        导出数据到JSON Lines文件
+        
+        data可以是记录流，记录边产生边写入文件。
+        
+        Args:
+            data: 要导出的数据（列表或迭代器）
+            filename: 自定义文件名（可选）
+        
+        Returns:
+            导出的文件路径
+        """
+        # 生成文件名
+        if not filename:
+            timestamp = datetime.now().strftime(self.datetime_format)
+            filename = f"{self.file_prefix}_{timestamp}.jsonl"
+        
+        filepath = os.path.join(self.output_dir, filename)
+        
+        # 记录流边产生边写入，耗时包含上游抓取，只统计条数
+        with open(filepath, 'w', encoding='utf-8') as f:
+            count = write_jsonl(data, f)
+        self.profiler.count("export.jsonl_records", count)
+        
+        logger.info(f"JSON Lines文件已保存: {filepath} ({count} 条)")
+        return filepath
 
 
 def main():
@@ -6,18 +6,327 @@
 
 import sys
 import os
-import threading
+import re
 import webbrowser
+import logging
+from collections import deque
 from datetime import datetime
 from tkinter import *
 from tkinter import ttk, messagebox, filedialog
 import queue
 
+import pandas as pd
+
 # 添加当前目录到路径
 sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
 
 from scraper import YfbzbScraper
 from exporter import ExcelExporter
+from checkpoint import CrawlCheckpoint
+from profiler import StageProfiler
+from job import CrawlJob, JobGroup
+from ratelimit import RateLimiter
+from normalizer import normalize_records
+from config import CHECKPOINT_CONFIG, REQUEST_CONFIG
+
+# 图形界面默认的详情页并发数（请求节奏仍受 request_delay 限制）
+DEFAULT_GUI_WORKERS = 4
+
+# 日志窗口最多保留的行数（更早的行被丢弃）
+LOG_MAX_LINES = 2000
+
+# 每次轮询最多处理的消息数，避免消息洪峰时长时间占用界面线程
+QUEUE_BATCH_LIMIT = 5000
+
+# 消息队列轮询间隔（毫秒）：有消息时缩短，空闲时逐步放宽
+POLL_INTERVAL_MIN = 50
+POLL_INTERVAL_DEFAULT = 100
+POLL_INTERVAL_MAX = 500
+
+# 关键词分隔符：逗号、分号、顿号（空格属于关键词本身，如“无纸化 会议”是一次多词搜索）
+KEYWORD_SEPARATORS = re.compile(r'[,，;；、]')
+
+# 文件名中不能使用的字符
+UNSAFE_FILENAME_CHARS = re.compile(r'[\\/:*?"<>|]')
+
+
+def parse_keywords(text: str) -> list:
+    """
+    解析关键词输入（去掉空项和重复项，保持输入顺序）
+    
+    Args:
+        text: 输入框内容，如 "无纸化会议, 智慧会议"
+    
+    Returns:
+        关键词列表
+    """
+    keywords = []
+    for keyword in KEYWORD_SEPARATORS.split(text):
+        keyword = keyword.strip()
+        if keyword and keyword not in keywords:
+            keywords.append(keyword)
+    return keywords
+
+
+def checkpoint_path(output_dir: str, keyword: str) -> str:
+    """每个关键词的断点文件路径（并行任务各用一个断点）"""
+    root, ext = os.path.splitext(CHECKPOINT_CONFIG["filename"])
+    return os.path.join(output_dir, f"{root}_{UNSAFE_FILENAME_CHARS.sub('_', keyword)}{ext}")
+
+
+class QueueLogHandler(logging.Handler):
+    """把日志转发到界面消息队列"""
+    
+    def __init__(self, message_queue):
+        super().__init__(level=logging.INFO)
+        self.message_queue = message_queue
+    
+    def emit(self, record):
+        self.message_queue.put(('log', record.getMessage()))
+
+
+class ResultsTable:
+    """
+    抓取结果表格（虚拟化渲染）
+    
+    全部记录保存在内存中，Treeview 只包含可见的若干行，滚动时改写这些行的内容，
+    数千条记录也不会拖慢界面。排序和筛选只作用于内存中的记录，不需要重新抓取。
+    """
+    
+    # (字段, 列标题, 列宽)
+    COLUMNS = [
+        ("title", "公告标题", 280),
+        ("publish_time", "发布时间", 90),
+        ("region", "地区", 60),
+        ("announcement_type", "公告类型", 80),
+        ("project_budget", "项目预算", 90),
+        ("registration_deadline", "报名截止", 140),
+        ("publish_unit", "发布单位", 180),
+    ]
+    
+    # 按数值/时间排序的列 -> normalizer 生成的类型列
+    TYPED_SORT_KEYS = {
+        "project_budget": "budget_yuan",
+        "registration_deadline": "registration_deadline_at",
+    }
+    
+    # 参与文本筛选的字段
+    FILTER_FIELDS = ("title", "publish_unit", "region", "announcement_type", "publish_time")
+    
+    def __init__(self, parent, visible_rows: int = 12):
+        """
+        创建表格
+        
+        Args:
+            parent: 父容器
+            visible_rows: 初始可见行数（随窗口高度调整）
+        """
+        self.records = []
+        self.keys = set()
+        self.typed = {column: [] for column in self.TYPED_SORT_KEYS.values()}
+        self.search_text = []
+        # 当前显示顺序：records 的下标
+        self.view = []
+        self.offset = 0
+        self.visible_rows = visible_rows
+        self.sort_column = None
+        self.sort_descending = False
+        self.filter_text = ""
+        
+        self.frame = ttk.Frame(parent)
+        
+        # 筛选栏
+        toolbar = ttk.Frame(self.frame)
+        toolbar.pack(fill=X, pady=(0, 5))
+        ttk.Label(toolbar, text="筛选:").pack(side=LEFT)
+        self.filter_var = StringVar()
+        self.filter_var.trace_add("write", lambda *args: self.set_filter(self.filter_var.get()))
+        ttk.Entry(toolbar, textvariable=self.filter_var, width=30).pack(side=LEFT, padx=(5, 0))
+        self.count_var = StringVar(value="共 0 条")
+        ttk.Label(toolbar, textvariable=self.count_var, foreground="gray").pack(side=RIGHT)
+        
+        table_frame = ttk.Frame(self.frame)
+        table_frame.pack(fill=BOTH, expand=True)
+        
+        self.tree = ttk.Treeview(
+            table_frame,
+            columns=[key for key, _, _ in self.COLUMNS],
+            show='headings',
+            height=visible_rows,
+            selectmode='browse'
+        )
+        for key, title, width in self.COLUMNS:
+            self.tree.heading(key, text=title, command=lambda key=key: self.sort_by(key))
+            self.tree.column(key, width=width, anchor=W, stretch=(key == "title"))
+        self.tree.pack(side=LEFT, fill=BOTH, expand=True)
+        
+        # 滚动条按记录下标滚动，而不是按 Treeview 中实际存在的行
+        self.scrollbar = ttk.Scrollbar(table_frame, orient=VERTICAL, command=self.on_scroll)
+        self.scrollbar.pack(side=RIGHT, fill=Y)
+        
+        self.tree.bind('<MouseWheel>', lambda event: self.scroll_by(-1 if event.delta > 0 else 1, 'units'))
+        self.tree.bind('<Button-4>', lambda event: self.scroll_by(-1, 'units'))
+        self.tree.bind('<Button-5>', lambda event: self.scroll_by(1, 'units'))
+        self.tree.bind('<Configure>', self.on_resize)
+        self.tree.bind('<Double-1>', self.open_selected)
+    
+    def clear(self):
+        """清空表格"""
+        self.records = []
+        self.keys = set()
+        self.typed = {column: [] for column in self.TYPED_SORT_KEYS.values()}
+        self.search_text = []
+        self.view = []
+        self.offset = 0
+        self.render()
+    
+    def add_records(self, batch):
+        """
+        追加一批记录（每次轮询调用一次），多个关键词抓到的同一公告只显示一次
+        
+        Args:
+            batch: 新记录列表
+        """
+        batch = [record for record in batch if self._add_key(record)]
+        if not batch:
+            return
+        # 整批做一次向量化换算，排序时直接使用数值/时间
+        frame = normalize_records(batch)
+        for column in self.typed:
+            values = frame[column].tolist() if column in frame else [None] * len(batch)
+            self.typed[column].extend(None if pd.isna(value) else value for value in values)
+        self.search_text.extend(
+            " ".join(str(record.get(field, "")) for field in self.FILTER_FIELDS).lower()
+            for record in batch
+        )
+        
+        # 停留在末尾时跟随新记录滚动
+        follow = self.offset + self.visible_rows >= len(self.view)
+        start = len(self.records)
+        self.records.extend(batch)
+        if self.sort_column or self.filter_text:
+            self._rebuild_view()
+        else:
+            self.view.extend(range(start, len(self.records)))
+        if follow and not self.sort_column:
+            self.offset = max(0, len(self.view) - self.visible_rows)
+        self.render()
+    
+    def _add_key(self, record) -> bool:
+        key = YfbzbScraper._record_key(record)
+        if key in self.keys:
+            return False
+        self.keys.add(key)
+        return True
+    
+    def sort_by(self, column: str):
+        """
+        按列排序（再次点击切换升序/降序），空值始终排在最后
+        
+        Args:
+            column: 字段名
+        """
+        if self.sort_column == column:
+            self.sort_descending = not self.sort_descending
+        else:
+            self.sort_column = column
+            self.sort_descending = False
+        
+        for key, title, _ in self.COLUMNS:
+            arrow = (" ▼" if self.sort_descending else " ▲") if key == column else ""
+            self.tree.heading(key, text=title + arrow)
+        
+        self._rebuild_view()
+        self.offset = 0
+        self.render()
+    
+    def set_filter(self, text: str):
+        """
+        按关键字筛选（标题、单位、地区、类型、发布时间，不区分大小写）
+        
+        Args:
+            text: 筛选文本，空字符串表示显示全部
+        """
+        self.filter_text = text.strip().lower()
+        self._rebuild_view()
+        self.offset = 0
+        self.render()
+    
+    def _rebuild_view(self):
+        indices = range(len(self.records))
+        if self.filter_text:
+            indices = [i for i in indices if self.filter_text in self.search_text[i]]
+        
+        if self.sort_column:
+            typed_column = self.TYPED_SORT_KEYS.get(self.sort_column)
+            if typed_column:
+                keys = self.typed[typed_column]
+            else:
+                keys = [self.records[i].get(self.sort_column) or None for i in range(len(self.records))]
+            present = [i for i in indices if keys[i] is not None]
+            missing = [i for i in indices if keys[i] is None]
+            present.sort(key=keys.__getitem__, reverse=self.sort_descending)
+            indices = present + missing
+        
+        self.view = list(indices)
+    
+    def scroll_by(self, amount: int, unit: str):
+        """按行或按页滚动"""
+        step = self.visible_rows if unit == 'pages' else 1
+        self.offset += amount * step
+        self.render()
+    
+    def on_scroll(self, *args):
+        """滚动条回调：('moveto', 比例) 或 ('scroll', 数量, 'units'/'pages')"""
+        if args[0] == 'moveto':
+            self.offset = int(float(args[1]) * len(self.view))
+            self.render()
+        elif args[0] == 'scroll':
+            self.scroll_by(int(args[1]), args[2])
+    
+    def on_resize(self, event):
+        """窗口高度变化时调整可见行数"""
+        row_height = int(ttk.Style().lookup('Treeview', 'rowheight') or 20)
+        rows = max(1, (event.height - row_height) // row_height)
+        if rows != self.visible_rows:
+            self.visible_rows = rows
+            self.render()
+    
+    def render(self):
+        """把当前窗口内的记录写入 Treeview（只改写可见行）"""
+        total = len(self.view)
+        self.offset = max(0, min(self.offset, total - self.visible_rows))
+        rows = self.view[self.offset:self.offset + self.visible_rows]
+        
+        items = self.tree.get_children()
+        if len(items) > len(rows):
+            self.tree.delete(*items[len(rows):])
+        for position in range(len(items), len(rows)):
+            self.tree.insert('', END, iid=f"row{position}")
+        for position, index in enumerate(rows):
+            record = self.records[index]
+            self.tree.item(f"row{position}", values=[record.get(key, "") for key, _, _ in self.COLUMNS])
+        
+        if total:
+            self.scrollbar.set(self.offset / total, (self.offset + len(rows)) / total)
+        else:
+            self.scrollbar.set(0, 1)
+        
+        if len(self.view) == len(self.records):
+            self.count_var.set(f"共 {len(self.records)} 条")
+        else:
+            self.count_var.set(f"显示 {len(self.view)} / 共 {len(self.records)} 条")
+    
+    def open_selected(self, event=None):
+        """双击行时在浏览器中打开公告详情"""
+        selection = self.tree.selection()
+        if not selection:
+            return
+        position = int(selection[0][len("row"):])
+        if self.offset + position < len(self.view):
+            url = self.records[self.view[self.offset + position]].get("detail_url")
+            if url:
+                webbrowser.open(url)
 
 
 class Application:
@@ -26,18 +335,24 @@ class Application:
     def __init__(self, root):
         self.root = root
         self.root.title("乙方宝招标公告抓取工具")
-        self.root.geometry("700x550")
-        self.root.minsize(600, 450)
+        self.root.geometry("900x700")
+        self.root.minsize(700, 550)
         
         # 设置样式
         self.setup_styles()
         
         # 消息队列用于线程通信
         self.message_queue = queue.Queue()
+        self.poll_interval = POLL_INTERVAL_DEFAULT
         
         # 是否正在运行
         self.is_running = False
         
+        # 当前运行的抓取任务（用于停止）
+        self.job = None
+        self.job_output_dir = None
+        self.log_handler = None
+        
         # 创建界面
         self.create_widgets()
         
@@ -83,6 +398,7 @@ class Application:
         self.keyword_var = StringVar(value="无纸化会议")
         keyword_entry = ttk.Entry(keyword_frame, textvariable=self.keyword_var, width=40)
         keyword_entry.pack(side=LEFT, padx=(10, 0))
+        ttk.Label(keyword_frame, text="多个关键词用逗号分隔，同时抓取", foreground="gray").pack(side=LEFT, padx=(10, 0))
         
         # 时间范围设置
         time_frame = ttk.Frame(config_frame)
@@ -100,6 +416,19 @@ class Application:
         time_combo.pack(side=LEFT, padx=(10, 5))
         ttk.Label(time_frame, text="小时").pack(side=LEFT)
         
+        # 详情页并发数
+        ttk.Label(time_frame, text="详情并发:").pack(side=LEFT, padx=(20, 0))
+        self.workers_var = StringVar(value=str(DEFAULT_GUI_WORKERS))
+        workers_spin = ttk.Spinbox(
+            time_frame,
+            textvariable=self.workers_var,
+            from_=1,
+            to=16,
+            width=5,
+            state="readonly"
+        )
+        workers_spin.pack(side=LEFT, padx=(10, 0))
+        
         # 是否抓取详情
         self.fetch_details_var = BooleanVar(value=True)
         details_check = ttk.Checkbutton(
@@ -109,6 +438,24 @@ class Application:
         )
         details_check.pack(anchor=W, pady=5)
         
+        # 是否从断点继续
+        self.resume_var = BooleanVar(value=False)
+        resume_check = ttk.Checkbutton(
+            config_frame, 
+            text="从上次中断处继续（断点续抓）",
+            variable=self.resume_var
+        )
+        resume_check.pack(anchor=W, pady=5)
+        
+        # 是否统计性能
+        self.profile_var = BooleanVar(value=False)
+        profile_check = ttk.Checkbutton(
+            config_frame, 
+            text="统计各阶段耗时（完成后在日志中输出性能报告）",
+            variable=self.profile_var
+        )
+        profile_check.pack(anchor=W, pady=5)
+        
         # 输出目录设置
         output_frame = ttk.Frame(config_frame)
         output_frame.pack(fill=X, pady=5)
@@ -166,9 +513,21 @@ class Application:
         status_label = ttk.Label(progress_frame, textvariable=self.status_var)
         status_label.pack(anchor=W)
         
+        # 各关键词任务的进度（开始抓取时按关键词创建）
+        self.jobs_frame = ttk.Frame(progress_frame)
+        self.jobs_frame.pack(fill=X, pady=(5, 0))
+        self.job_rows = {}
+        
+        # 结果表格和日志分页显示
+        notebook = ttk.Notebook(progress_frame)
+        notebook.pack(fill=BOTH, expand=True, pady=(10, 0))
+        
+        self.results_table = ResultsTable(notebook)
+        notebook.add(self.results_table.frame, text="抓取结果")
+        
         # 日志区域
-        log_frame = ttk.Frame(progress_frame)
-        log_frame.pack(fill=BOTH, expand=True, pady=(10, 0))
+        log_frame = ttk.Frame(notebook)
+        notebook.add(log_frame, text="运行日志")
         
         self.log_text = Text(
             log_frame, 
@@ -211,8 +570,24 @@ class Application:
     
     def log(self, message):
         """添加日志消息"""
+        self.log_lines([message])
+    
+    def log_lines(self, messages):
+        """
+        批量添加日志消息：一次插入，只保留最新的 LOG_MAX_LINES 行
+        
+        Args:
+            messages: 日志消息列表
+        """
+        if not messages:
+            return
         timestamp = datetime.now().strftime("%H:%M:%S")
-        self.log_text.insert(END, f"[{timestamp}] {message}\n")
+        self.log_text.insert(END, "".join(f"[{timestamp}] {message}\n" for message in messages))
+        
+        # 文本末尾总有一个空行，行数为 end 的行号减1
+        excess = int(self.log_text.index('end-1c').split('.')[0]) - 1 - LOG_MAX_LINES
+        if excess > 0:
+            self.log_text.delete('1.0', f'{excess + 1}.0')
         self.log_text.see(END)
     
     def update_status(self, status):
@@ -224,35 +599,75 @@ class Application:
         self.progress_var.set(value)
     
     def check_queue(self):
-        """检查消息队列"""
+        """
+        检查消息队列
+        
+        每次轮询合并处理：日志一次插入（只保留最新的 LOG_MAX_LINES 行），
+        新记录一次追加到结果表格，状态和进度只显示最新值；轮询间隔随消息量自适应。
+        """
+        pending_logs = deque(maxlen=LOG_MAX_LINES)
+        pending_records = []
+        latest = {}
+        job_updates = {}
+        processed = 0
+        
+        def flush():
+            self.log_lines(pending_logs)
+            pending_logs.clear()
+            self.results_table.add_records(pending_records)
+            pending_records.clear()
+            if 'status' in latest:
+                self.update_status(latest.pop('status'))
+            if 'progress' in latest:
+                self.update_progress(latest.pop('progress'))
+            for name, (value, text) in job_updates.items():
+                self.update_job_row(name, value, text)
+            job_updates.clear()
+        
         try:
-            while True:
+            while processed < QUEUE_BATCH_LIMIT:
                 msg_type, msg_data = self.message_queue.get_nowait()
+                processed += 1
                 
                 if msg_type == 'log':
-                    self.log(msg_data)
-                elif msg_type == 'status':
-                    self.update_status(msg_data)
-                elif msg_type == 'progress':
-                    self.update_progress(msg_data)
-                elif msg_type == 'done':
-                    self.on_scraping_done(msg_data)
-                elif msg_type == 'error':
-                    self.on_scraping_error(msg_data)
+                    pending_logs.append(msg_data)
+                elif msg_type == 'record':
+                    pending_records.append(msg_data)
+                elif msg_type in ('status', 'progress'):
+                    latest[msg_type] = msg_data
+                elif msg_type == 'job':
+                    name, value, text = msg_data
+                    job_updates[name] = (value, text)
+                else:
+                    # 结束消息可能弹出对话框，先显示之前的日志和状态
+                    flush()
+                    if msg_type == 'done':
+                        self.on_scraping_done(msg_data)
+                    elif msg_type == 'error':
+                        self.on_scraping_error(msg_data)
         except queue.Empty:
             pass
+        flush()
+        
+        # 消息多时加快轮询，空闲时逐步放宽
+        if processed >= QUEUE_BATCH_LIMIT:
+            self.poll_interval = POLL_INTERVAL_MIN
+        elif processed:
+            self.poll_interval = POLL_INTERVAL_DEFAULT
+        else:
+            self.poll_interval = min(self.poll_interval * 2, POLL_INTERVAL_MAX)
         
         # 继续检查
-        self.root.after(100, self.check_queue)
+        self.root.after(self.poll_interval, self.check_queue)
     
     def start_scraping(self):
-        """开始抓取"""
+        """开始抓取：每个关键词一个任务，同时运行"""
         if self.is_running:
             return
         
         # 验证输入
-        keyword = self.keyword_var.get().strip()
-        if not keyword:
+        keywords = parse_keywords(self.keyword_var.get())
+        if not keywords:
             messagebox.showerror("错误", "请输入搜索关键词")
             return
         
@@ -261,103 +676,189 @@ class Application:
         self.start_btn.config(state=DISABLED)
         self.stop_btn.config(state=NORMAL)
         self.log_text.delete(1.0, END)
+        self.results_table.clear()
         self.progress_var.set(0)
+        self.create_job_rows(keywords)
+        
+        try:
+            self.job = self.create_jobs(keywords)
+        except Exception as e:
+            self.on_scraping_error(str(e))
+            return
         
-        # 在后台线程运行抓取
-        thread = threading.Thread(target=self.run_scraping, daemon=True)
-        thread.start()
+        # 爬虫日志转发到界面
+        self.log_handler = QueueLogHandler(self.message_queue)
+        logging.getLogger().addHandler(self.log_handler)
+        
+        self.message_queue.put(('status', f'正在抓取 {len(keywords)} 个关键词...'))
+        self.job.start()
     
     def stop_scraping(self):
-        """停止抓取"""
-        self.is_running = False
+        """停止抓取：进行中的请求不再等待，全部任务在约1秒内结束"""
+        if self.job:
+            self.job.cancel()
+        self.stop_btn.config(state=DISABLED)
+        self.update_status("正在停止...")
         self.message_queue.put(('log', '用户请求停止...'))
     
-    def run_scraping(self):
-        """运行抓取任务（在后台线程）"""
-        try:
-            keyword = self.keyword_var.get().strip()
-            time_range = int(self.time_var.get())
-            fetch_details = self.fetch_details_var.get()
-            output_dir = self.output_var.get()
-            
-            self.message_queue.put(('log', f'开始抓取关键词: {keyword}'))
-            self.message_queue.put(('log', f'时间范围: 最近 {time_range} 小时'))
-            self.message_queue.put(('status', '正在搜索招标公告...'))
-            
-            # 初始化爬虫
+    def create_job_rows(self, keywords: list):
+        """
+        为每个关键词创建一行进度显示
+        
+        Args:
+            keywords: 关键词列表
+        """
+        for child in self.jobs_frame.winfo_children():
+            child.destroy()
+        self.job_rows = {}
+        for row, keyword in enumerate(keywords):
+            progress_var = DoubleVar(value=0)
+            text_var = StringVar(value="等待中")
+            ttk.Label(self.jobs_frame, text=keyword, width=16).grid(row=row, column=0, sticky=W)
+            ttk.Progressbar(
+                self.jobs_frame,
+                variable=progress_var,
+                maximum=100,
+                mode='determinate',
+                length=200
+            ).grid(row=row, column=1, padx=(5, 10), pady=1)
+            ttk.Label(self.jobs_frame, textvariable=text_var).grid(row=row, column=2, sticky=W)
+            self.job_rows[keyword] = (progress_var, text_var)
+    
+    def update_job_row(self, name: str, value: float, text: str):
+        """更新一个任务的进度（value 为None时保持原进度），总进度为各任务的平均值（导出占最后10%）"""
+        if name not in self.job_rows:
+            return
+        progress_var, text_var = self.job_rows[name]
+        if value is not None:
+            progress_var.set(value)
+        text_var.set(text)
+        values = [var.get() for var, _ in self.job_rows.values()]
+        self.update_progress(sum(values) / len(values) * 0.9)
+    
+    def create_jobs(self, keywords: list) -> JobGroup:
+        """
+        创建抓取任务组（在界面线程调用，抓取在各任务的后台线程中进行）
+        
+        各任务共用HTTP传输、限速器（请求节奏合计受 request_delay 限制）和详情结果，
+        多个关键词搜到的同一公告只抓取一次详情。
+        
+        Args:
+            keywords: 关键词列表，每个关键词一个任务
+        
+        Returns:
+            尚未启动的任务组
+        """
+        fetch_details = self.fetch_details_var.get()
+        profiler = StageProfiler() if self.profile_var.get() else None
+        max_workers = int(self.workers_var.get())
+        time_range_hours = int(self.time_var.get())
+        resume = self.resume_var.get()
+        # 任务线程中不能读取Tk变量，输出目录在此取定
+        self.job_output_dir = self.output_var.get()
+        
+        group = JobGroup(
+            RateLimiter(REQUEST_CONFIG["request_delay"]),
+            pool_size=max_workers * len(keywords),
+            on_finished=self.on_jobs_finished
+        )
+        
+        for keyword in keywords:
             scraper = YfbzbScraper(
                 keywords=[keyword],
-                time_range_hours=time_range
+                time_range_hours=time_range_hours,
+                profiler=profiler,
+                max_workers=max_workers,
+                rate_limiter=group.rate_limiter,
+                transport=group.transport,
+                shared_details=group.details
             )
             
-            # 搜索公告列表
-            self.message_queue.put(('progress', 10))
-            all_results = []
-            page = 1
+            # 每个关键词各用一个断点，停止或中断后可继续
+            checkpoint = CrawlCheckpoint(checkpoint_path(self.job_output_dir, keyword))
+            if scraper.use_checkpoint(checkpoint, fetch_details, resume=resume):
+                self.log(f'[{keyword}] 已从断点恢复，继续抓取')
             
-            while self.is_running and page <= scraper.max_pages:
-                self.message_queue.put(('log', f'正在抓取第 {page} 页...'))
-                results, has_more = scraper.search_list(keyword, page)
-                
-                if not results:
-                    break
-                
-                all_results.extend(results)
-                self.message_queue.put(('log', f'本页获取 {len(results)} 条公告'))
-                
-                if not has_more:
-                    break
-                
-                page += 1
+            group.add(CrawlJob(
+                scraper,
+                fetch_details=fetch_details,
+                name=keyword,
+                on_record=self.on_job_record,
+                on_progress=self.on_job_progress,
+                on_finished=self.on_job_finished
+            ))
+        return group
+    
+    def on_job_record(self, job: CrawlJob, record: dict):
+        """任务产出一条记录（在任务线程中调用）"""
+        self.message_queue.put(('record', record))
+    
+    def on_job_progress(self, job: CrawlJob, stage: str, done: int, total: int):
+        """任务进度（在任务线程中调用）：列表占30%，详情占70%"""
+        if stage == 'list':
+            value = 30 if not job.fetch_details and done >= total else done / total * 30
+            self.message_queue.put(('job', (job.name, value, f'列表第 {done} 页')))
+        else:
+            self.message_queue.put(('job', (job.name, 30 + done / total * 70, f'详情 {done}/{total}')))
+    
+    def on_job_finished(self, job: CrawlJob):
+        """单个任务结束（在任务线程中调用）"""
+        if job.state == CrawlJob.FAILED:
+            self.message_queue.put(('log', f'[{job.name}] 抓取出错: {job.error}'))
+            self.message_queue.put(('job', (job.name, None, '出错')))
+        elif job.state == CrawlJob.CANCELLED:
+            self.message_queue.put(('job', (job.name, None, f'已停止 ({len(job.results)} 条)')))
+        else:
+            self.message_queue.put(('job', (job.name, 100, f'完成 ({len(job.results)} 条)')))
+    
+    def on_jobs_finished(self, group: JobGroup):
+        """全部任务结束（在最后结束的任务线程中调用）：合并导出后通知界面"""
+        logging.getLogger().removeHandler(self.log_handler)
+        try:
+            failed = [job for job in group.jobs if job.state == CrawlJob.FAILED]
+            if len(failed) == len(group.jobs):
+                self.message_queue.put(('error', str(failed[0].error)))
+                return
             
-            if not self.is_running:
-                self.message_queue.put(('log', '抓取已停止'))
+            if group.state == CrawlJob.CANCELLED:
+                self.message_queue.put(('log', '抓取已停止，进度已保存，勾选“从上次中断处继续”可继续抓取'))
                 self.message_queue.put(('done', None))
                 return
             
-            if not all_results:
+            results = group.results
+            if not results:
                 self.message_queue.put(('log', '未找到符合条件的公告'))
                 self.message_queue.put(('done', None))
                 return
             
-            self.message_queue.put(('log', f'共获取 {len(all_results)} 条公告'))
-            self.message_queue.put(('progress', 30))
-            
-            # 抓取详情
-            if fetch_details:
-                self.message_queue.put(('status', '正在抓取公告详情...'))
-                total = len(all_results)
-                
-                for i, item in enumerate(all_results):
-                    if not self.is_running:
-                        break
-                    
-                    if item.get("detail_url"):
-                        details = scraper.get_detail(item["detail_url"])
-                        item.update(details)
-                    
-                    progress = 30 + (i + 1) / total * 50
-                    self.message_queue.put(('progress', progress))
-                    self.message_queue.put(('status', f'正在抓取详情 ({i+1}/{total})...'))
-            
-            if not self.is_running:
-                self.message_queue.put(('log', '抓取已停止'))
-                self.message_queue.put(('done', None))
-                return
+            total = sum(len(job.results) for job in group.jobs)
+            self.message_queue.put(('log', f'共获取 {len(results)} 条公告（{len(group.jobs)} 个关键词合计 {total} 条）'))
+            if group.details.reused:
+                self.message_queue.put(('log', f'{group.details.reused} 条详情由其他关键词的任务抓取，未重复请求'))
+            if failed:
+                self.message_queue.put(('log', f'{len(failed)} 个关键词抓取出错，结果中不含这些关键词'))
             
             # 导出Excel
             self.message_queue.put(('status', '正在生成Excel报表...'))
             self.message_queue.put(('progress', 90))
             
-            exporter = ExcelExporter(output_dir=output_dir)
-            filepath = exporter.export(all_results)
+            # 各任务共用同一个性能统计器
+            profiler = group.jobs[0].scraper.profiler
+            exporter = ExcelExporter(output_dir=self.job_output_dir, profiler=profiler)
+            filepath = exporter.export(results)
+            
+            if isinstance(profiler, StageProfiler):
+                for line in profiler.format_report().splitlines():
+                    self.message_queue.put(('log', line))
             
             self.message_queue.put(('progress', 100))
             self.message_queue.put(('log', f'Excel文件已保存: {filepath}'))
             self.message_queue.put(('done', filepath))
-            
+        
         except Exception as e:
             self.message_queue.put(('error', str(e)))
+        finally:
+            group.close()
     
     def on_scraping_done(self, filepath):
         """抓取完成"""
@@ -0,0 +1,298 @@
+# -*- coding: utf-8 -*-
+"""
+抓取任务模块 - 在后台线程中运行爬虫，可随时取消
+
+图形界面等调用方通过 CrawlJob 驱动爬虫的记录流（iter_records），
+以回调接收记录和进度；cancel() 后进行中的请求不再等待，约1秒内结束。
+回调在任务线程中调用，界面程序应把数据转交给界面线程处理。
+
+多个关键词并行抓取时用 JobGroup 组织：各任务共用HTTP传输、限速器和详情结果
+（同一详情链接只请求一次），全部结束后合并为一份结果。
+"""
+
+import threading
+from typing import List, Dict, Optional, Callable
+import logging
+
+from transport import create_transport
+from config import REQUEST_CONFIG
+
+logger = logging.getLogger(__name__)
+
+# 等待其他任务的详情请求时检查停止信号的间隔（秒）
+WAIT_POLL_INTERVAL = 0.2
+
+
+def merge_results(jobs: List['CrawlJob']) -> List[Dict]:
+    """
+    合并多个任务的结果：同一公告只保留一条，matched_keywords 列出命中的全部关键词
+    
+    Args:
+        jobs: 抓取任务（按关键词顺序）
+    
+    Returns:
+        合并后的记录，按首次出现的顺序排列
+    """
+    merged: Dict[str, Dict] = {}
+    for job in jobs:
+        for record in job.results:
+            key = job.scraper._record_key(record)
+            if key not in merged:
+                merged[key] = dict(record)
+                merged[key]["matched_keywords"] = []
+            # 记录自带按标题归属的关键词（合并搜索时只是批次中的一部分）
+            keywords = record.get("matched_keywords")
+            for keyword in keywords.split("、") if keywords else job.scraper.keywords:
+                if keyword not in merged[key]["matched_keywords"]:
+                    merged[key]["matched_keywords"].append(keyword)
+    
+    for record in merged.values():
+        record["matched_keywords"] = "、".join(record["matched_keywords"])
+    return list(merged.values())
+
+
+class SharedDetails:
+    """
+    多个爬虫共用的详情结果（线程安全）
+    
+    同一详情链接只请求一次：其他任务正在请求时等待其结果，已有结果时直接复用。
+    请求失败（字段全空）的结果不保存，等待方随后自行请求。
+    """
+    
+    def __init__(self):
+        self._results: Dict[str, Dict] = {}
+        self._pending: Dict[str, threading.Event] = {}
+        self._lock = threading.Lock()
+        self.reused = 0
+    
+    def fetch(self, url: str, fetch: Callable[[str], Optional[Dict]],
+              stop_event: threading.Event = None) -> Optional[Dict]:
+        """
+        获取详情字段
+        
+        Args:
+            url: 详情链接
+            fetch: 实际发出请求的函数（通常为爬虫的详情抓取方法）
+            stop_event: 调用方的停止信号，等待其他任务时置位则立即返回
+        
+        Returns:
+            详情字段；fetch 返回None或等待时收到停止信号时为None
+        """
+        while True:
+            with self._lock:
+                if url in self._results:
+                    self.reused += 1
+                    return dict(self._results[url])
+                pending = self._pending.get(url)
+                owner = pending is None
+                if owner:
+                    pending = self._pending[url] = threading.Event()
+            
+            if owner:
+                try:
+                    details = fetch(url)
+                    if details is not None and any(details.values()):
+                        with self._lock:
+                            self._results[url] = dict(details)
+                    return details
+                finally:
+                    with self._lock:
+                        del self._pending[url]
+                    pending.set()
+            
+            # 其他任务正在请求：等待其结束后重新查看结果
+            while not pending.wait(WAIT_POLL_INTERVAL):
+                if stop_event is not None and stop_event.is_set():
+                    return None
+
+
+class CrawlJob:
+    """一次抓取任务"""
+    
+    PENDING = "pending"
+    RUNNING = "running"
+    DONE = "done"
+    CANCELLED = "cancelled"
+    FAILED = "failed"
+    
+    def __init__(self, scraper, fetch_details: bool = True, name: str = None,
+                 on_record: Callable[['CrawlJob', Dict], None] = None,
+                 on_progress: Callable[['CrawlJob', str, int, int], None] = None,
+                 on_finished: Callable[['CrawlJob'], None] = None):
+        """
+        初始化任务
+        
+        Args:
+            scraper: YfbzbScraper 实例（并发数、断点等在传入前配置好）
+            fetch_details: 是否抓取详情页
+            name: 任务名称，默认为关键词
+            on_record: 每产出一条记录时调用 (任务, 记录)
+            on_progress: 进度回调 (任务, 阶段 'list'/'detail', 已完成数, 总数)
+            on_finished: 任务结束（完成、取消或出错）时调用 (任务)
+        """
+        self.scraper = scraper
+        self.fetch_details = fetch_details
+        self.name = name or ", ".join(scraper.keywords)
+        self.on_record = on_record
+        self.on_progress = on_progress
+        self.on_finished = on_finished
+        
+        self.state = self.PENDING
+        self.results: List[Dict] = []
+        self.error: Optional[BaseException] = None
+        self._thread = None
+        self._finished = threading.Event()
+    
+    @property
+    def running(self) -> bool:
+        """任务是否尚未结束"""
+        return self._thread is not None and not self._finished.is_set()
+    
+    def start(self):
+        """在后台线程中开始抓取"""
+        if self._thread is not None:
+            raise RuntimeError("任务已启动")
+        self.state = self.RUNNING
+        self._thread = threading.Thread(target=self._run, name=f"crawl-job-{self.name}", daemon=True)
+        self._thread.start()
+    
+    def cancel(self):
+        """取消任务：停止翻页和详情抓取，进行中的请求不再等待"""
+        self.scraper.stop()
+    
+    def wait(self, timeout: float = None) -> bool:
+        """
+        等待任务结束
+        
+        Args:
+            timeout: 最长等待秒数，None表示一直等待
+        
+        Returns:
+            任务是否已结束
+        """
+        return self._finished.wait(timeout)
+    
+    def _progress(self, stage: str, done: int, total: int):
+        if self.on_progress:
+            self.on_progress(self, stage, done, total)
+    
+    def _run(self):
+        try:
+            for record in self.scraper.iter_records(
+                fetch_details=self.fetch_details,
+                show_progress=False,
+                progress_callback=self._progress
+            ):
+                self.results.append(record)
+                if self.on_record:
+                    self.on_record(self, record)
+            self.state = self.CANCELLED if self.scraper.stopped else self.DONE
+        except Exception as e:
+            logger.error(f"抓取任务出错 [{self.name}]: {e}")
+            self.error = e
+            self.state = self.FAILED
+        finally:
+            self._finished.set()
+            if self.on_finished:
+                self.on_finished(self)
+
+
+class JobGroup:
+    """
+    多个关键词并行抓取
+    
+    每个关键词一个 CrawlJob，共用一个HTTP传输（连接池按总并发数设置）、一个限速器
+    和一份 SharedDetails；所有任务结束后调用 on_finished，merge_results 给出合并结果。
+    """
+    
+    def __init__(self, rate_limiter, pool_size: int = 10,
+                 on_finished: Callable[['JobGroup'], None] = None):
+        """
+        初始化任务组
+        
+        Args:
+            rate_limiter: 各任务共用的限速器（所有请求合计受 request_delay 限制）
+            pool_size: HTTP连接池大小，通常为各任务详情并发数之和
+            on_finished: 全部任务结束时调用 (任务组)，在最后结束的任务线程中调用
+        """
+        self.rate_limiter = rate_limiter
+        self.on_finished = on_finished
+        self.details = SharedDetails()
+        
+        self.transport = create_transport(headers=REQUEST_CONFIG["headers"], pool_maxsize=max(1, pool_size))
+        
+        self.jobs: List[CrawlJob] = []
+        self._remaining = 0
+        self._lock = threading.Lock()
+        self._finished = threading.Event()
+    
+    def add(self, job: CrawlJob):
+        """
+        加入任务（在 start 之前调用）
+        
+        Args:
+            job: 使用本组 transport / rate_limiter / details 创建爬虫的任务
+        """
+        callback = job.on_finished
+        
+        def finished(job):
+            if callback:
+                callback(job)
+            with self._lock:
+                self._remaining -= 1
+                last = self._remaining == 0
+            if last:
+                self._finished.set()
+                if self.on_finished:
+                    self.on_finished(self)
+        
+        job.on_finished = finished
+        self.jobs.append(job)
+    
+    @property
+    def running(self) -> bool:
+        """是否还有任务未结束"""
+        return any(job.running for job in self.jobs)
+    
+    @property
+    def state(self) -> str:
+        """整体状态：有任务被取消为 CANCELLED（停止后不导出部分结果），其次有任务出错为 FAILED，全部完成为 DONE"""
+        states = {job.state for job in self.jobs}
+        for state in (CrawlJob.RUNNING, CrawlJob.PENDING, CrawlJob.CANCELLED, CrawlJob.FAILED):
+            if state in states:
+                return state
+        return CrawlJob.DONE
+    
+    @property
+    def results(self) -> List[Dict]:
+        """合并后的结果"""
+        return merge_results(self.jobs)
+    
+    def start(self):
+        """同时启动全部任务"""
+        self._remaining = len(self.jobs)
+        if not self.jobs:
+            self._finished.set()
+        for job in self.jobs:
+            job.start()
+    
+    def cancel(self):
+        """取消全部任务"""
+        for job in self.jobs:
+            job.cancel()
+    
+    def wait(self, timeout: float = None) -> bool:
+        """
+        等待全部任务结束
+        
+        Args:
+            timeout: 最长等待秒数，None表示一直等待
+        
+        Returns:
+            是否已全部结束
+        """
+        return self._finished.wait(timeout)
+    
+    def close(self):
+        """关闭共用的HTTP传输"""
+        self.transport.close()
@@ -8,8 +8,12 @@
 
 import sys
 import os
+import re
+import time
+import signal
 import argparse
-from datetime import datetime
+import threading
+from datetime import datetime, date
 import logging
 
 # 添加当前目录到路径
@@ -17,24 +21,52 @@ sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
 
 from colorama import init, Fore, Style
 from scraper import YfbzbScraper
-from exporter import ExcelExporter
-from config import SEARCH_CONFIG, OUTPUT_CONFIG
+from exporter import ExcelExporter, write_jsonl
+from checkpoint import CrawlCheckpoint
+from archive import ResponseArchive
+from work_queue import SQLiteWorkQueue
+from cluster import QueueCoordinator, QueueWorker
+from profiler import StageProfiler
+from metrics import CrawlMetrics
+from priority import CrawlBudget
+from dedup import NearDuplicateIndex
+from store import AnnouncementStore
+from backfill import Backfill
+from ratelimit import HostRateLimiters
+from sources import SOURCES, create_source
+from job import CrawlJob, merge_results
+from transport import TRANSPORTS, create_transport
+from normalizer import parse_amount, filter_by_budget, iter_within_budget
+from config import SEARCH_CONFIG, OUTPUT_CONFIG, REQUEST_CONFIG, CHECKPOINT_CONFIG, DEDUP_CONFIG, HEDGE_CONFIG, \
+    CONCURRENCY_CONFIG, BACKFILL_CONFIG, SOURCES_CONFIG
 
 # 初始化colorama（Windows兼容）
 init()
 
-# 配置日志
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(levelname)s - %(message)s',
-    handlers=[
-        logging.StreamHandler(sys.stdout),
-    ]
-)
+# 标准输出占位符：--output - 表示数据写到标准输出
+STDOUT_OUTPUT = '-'
+
 logger = logging.getLogger(__name__)
 
 
-def print_banner():
+def setup_logging(stream=sys.stdout):
+    """
+    配置日志输出
+    
+    Args:
+        stream: 日志输出流；流式输出数据到stdout时应传入stderr
+    """
+    logging.basicConfig(
+        level=logging.INFO,
+        format='%(asctime)s - %(levelname)s - %(message)s',
+        handlers=[
+            logging.StreamHandler(stream),
+        ],
+        force=True,
+    )
+
+
+def print_banner(file=sys.stdout):
     """打印程序横幅"""
     banner = f"""
 {Fore.CYAN}================================================================
@@ -50,21 +82,442 @@ def print_banner():
 ================================================================{Style.RESET_ALL}
 """
     try:
-        print(banner)
+        print(banner, file=file)
     except UnicodeEncodeError:
         # Windows终端编码问题时使用简单输出
-        print("\n乙方宝招标公告抓取工具 / Yfbzb Bid Announcement Scraper\n")
+        print("\n乙方宝招标公告抓取工具 / Yfbzb Bid Announcement Scraper\n", file=file)
 
 
-def print_summary(results: list, filepath: str, elapsed_time: float):
+def print_summary(results: list, filepath: str, elapsed_time: float, file=sys.stdout):
     """打印抓取结果摘要"""
-    print(f"\n{Fore.GREEN}{'='*60}{Style.RESET_ALL}")
-    print(f"{Fore.YELLOW}抓取完成!{Style.RESET_ALL}")
-    print(f"{Fore.GREEN}{'='*60}{Style.RESET_ALL}")
-    print(f"  {Fore.CYAN}公告总数:{Style.RESET_ALL} {len(results)} 条")
-    print(f"  {Fore.CYAN}耗时:{Style.RESET_ALL} {elapsed_time:.2f} 秒")
-    print(f"  {Fore.CYAN}输出文件:{Style.RESET_ALL} {filepath}")
-    print(f"{Fore.GREEN}{'='*60}{Style.RESET_ALL}\n")
+    print(f"\n{Fore.GREEN}{'='*60}{Style.RESET_ALL}", file=file)
+    print(f"{Fore.YELLOW}抓取完成!{Style.RESET_ALL}", file=file)
+    print(f"{Fore.GREEN}{'='*60}{Style.RESET_ALL}", file=file)
+    print(f"  {Fore.CYAN}公告总数:{Style.RESET_ALL} {len(results)} 条", file=file)
+    print(f"  {Fore.CYAN}耗时:{Style.RESET_ALL} {elapsed_time:.2f} 秒", file=file)
+    print(f"  {Fore.CYAN}输出文件:{Style.RESET_ALL} {filepath}", file=file)
+    print(f"{Fore.GREEN}{'='*60}{Style.RESET_ALL}\n", file=file)
+
+
+def parse_interval(value: str) -> float:
+    """
+    解析时间间隔参数
+    
+    支持 s/m/h/d 后缀（如 90s、30m、1h），不带后缀时按秒计算。
+    
+    Args:
+        value: 间隔字符串
+    
+    Returns:
+        间隔秒数
+    """
+    match = re.fullmatch(r'\s*(\d+(?:\.\d+)?)\s*([smhd]?)\s*', value.lower())
+    if not match:
+        raise argparse.ArgumentTypeError(f'无效的时间间隔: {value}（示例: 90s、30m、1h）')
+    units = {'': 1, 's': 1, 'm': 60, 'h': 3600, 'd': 86400}
+    seconds = float(match.group(1)) * units[match.group(2)]
+    if seconds <= 0:
+        raise argparse.ArgumentTypeError('时间间隔必须大于0')
+    return seconds
+
+
+def parse_budget(value: str) -> float:
+    """
+    解析预算金额参数
+    
+    支持“万”“亿”单位（如 50万、1.2亿），不带单位时按元计算。
+    
+    Args:
+        value: 金额字符串
+    
+    Returns:
+        金额（元）
+    """
+    amount = parse_amount(value)
+    if amount is None:
+        raise argparse.ArgumentTypeError(f'无效的金额: {value}（示例: 500000、50万）')
+    return amount
+
+
+def filter_results(results: list, args) -> list:
+    """按 --min-budget / --max-budget 筛选一批结果（向量化）"""
+    return filter_by_budget(results, args.min_budget, args.max_budget)
+
+
+def filter_stream(records, args):
+    """按 --min-budget / --max-budget 筛选记录流"""
+    if args.min_budget is None and args.max_budget is None:
+        return records
+    return iter_within_budget(records, args.min_budget, args.max_budget)
+
+
+def export_results(results: list, args, echo, profiler=None) -> str:
+    """
+    按命令行参数导出一批结果到文件
+    
+    Args:
+        results: 抓取结果列表
+        args: 命令行参数
+        echo: 控制台输出函数
+        profiler: 性能统计器（可选）
+    
+    Returns:
+        主输出文件路径
+    """
+    exporter = ExcelExporter(output_dir=args.output, profiler=profiler)
+    
+    if args.format == 'jsonl':
+        filepath = exporter.export_jsonl(results)
+    else:
+        echo(f"\n{Fore.YELLOW}正在生成Excel报表...{Style.RESET_ALL}")
+        filepath = exporter.export(results)
+    
+    # 导出CSV（如果需要）
+    if args.csv:
+        echo(f"{Fore.YELLOW}正在生成CSV文件...{Style.RESET_ALL}")
+        csv_path = exporter.export_csv(results)
+        echo(f"  CSV文件: {csv_path}")
+    
+    return filepath
+
+
+def report_profile(profiler: StageProfiler, args, echo):
+    """
+    输出性能报告
+    
+    Args:
+        profiler: 性能统计器
+        args: 命令行参数
+        echo: 控制台输出函数
+    """
+    echo(f"\n{Fore.CYAN}{profiler.format_report()}{Style.RESET_ALL}\n")
+    if args.profile_json:
+        profiler.write_json(args.profile_json)
+        echo(f"  性能报告已保存: {args.profile_json}")
+
+
+def parse_date(value: str) -> date:
+    """
+    解析日期参数
+    
+    Args:
+        value: 日期字符串，如 2025-01-01
+    
+    Returns:
+        日期
+    """
+    try:
+        return datetime.strptime(value.strip(), '%Y-%m-%d').date()
+    except ValueError:
+        raise argparse.ArgumentTypeError(f'无效的日期: {value}（示例: 2025-01-01）')
+
+
+def write_metrics_textfile(metrics: CrawlMetrics, args):
+    """
+    按需把指标写入文本文件（供 node_exporter textfile collector 读取）
+    
+    Args:
+        metrics: 运行指标
+        args: 命令行参数
+    """
+    if args.metrics_textfile:
+        try:
+            metrics.registry.write_textfile(args.metrics_textfile)
+        except OSError as e:
+            logger.warning(f"写入指标文件失败: {e}")
+
+
+def run_daemon(scraper: YfbzbScraper, args, echo) -> int:
+    """
+    常驻模式：按固定间隔循环抓取
+    
+    整个进程复用同一个爬虫实例（HTTP会话连接池、详情缓存、已抓取记录），
+    每轮只抓取上一轮之后新出现的公告并导出。收到SIGTERM/SIGINT后
+    中断当前请求，导出本轮已完成的记录后退出。
+    
+    Args:
+        scraper: 爬虫实例
+        args: 命令行参数
+        echo: 控制台输出函数
+    
+    Returns:
+        退出码
+    """
+    shutdown = threading.Event()
+    
+    def handle_signal(signum, frame):
+        logger.info(f"收到信号 {signum}，完成当前导出后退出...")
+        shutdown.set()
+        scraper.stop()
+    
+    signal.signal(signal.SIGTERM, handle_signal)
+    signal.signal(signal.SIGINT, handle_signal)
+    
+    stream_stdout = args.output == STDOUT_OUTPUT
+    cycle = 0
+    
+    while not shutdown.is_set():
+        cycle += 1
+        cycle_start = time.monotonic()
+        logger.info(f"第 {cycle} 轮抓取开始")
+        
+        scraper.refresh_cutoff()
+        results = []
+        try:
+            records = filter_stream(scraper.iter_records(
+                fetch_details=not args.no_details,
+                show_progress=False,
+                skip_seen=True
+            ), args)
+            if stream_stdout:
+                for record in records:
+                    results.append(record)
+                    write_jsonl([record], sys.stdout)
+            else:
+                results.extend(records)
+                if results:
+                    export_results(results, args, echo, scraper.profiler)
+        except BrokenPipeError:
+            sys.stdout = open(os.devnull, 'w')
+            logger.info("下游已关闭输出管道，退出常驻模式")
+            break
+        except Exception as e:
+            # 单轮失败不影响后续轮次
+            logger.error(f"第 {cycle} 轮抓取出错: {e}")
+        
+        elapsed = time.monotonic() - cycle_start
+        logger.info(f"第 {cycle} 轮完成，新增 {len(results)} 条公告，耗时 {elapsed:.2f} 秒")
+        write_metrics_textfile(scraper.metrics, args)
+        
+        shutdown.wait(max(0.0, args.interval - elapsed))
+    
+    logger.info("常驻模式已退出")
+    return 0
+
+
+def run_replay(scraper: YfbzbScraper, archive: ResponseArchive, args, echo, start_time: datetime) -> int:
+    """
+    回放模式：从响应存档重新解析并导出，不访问网络
+    
+    Args:
+        scraper: 爬虫实例（只用于解析）
+        archive: 响应存档
+        args: 命令行参数
+        echo: 控制台输出函数
+        start_time: 开始时间
+    
+    Returns:
+        退出码
+    """
+    records = filter_stream(scraper.iter_archived_records(archive, fetch_details=not args.no_details), args)
+    
+    if args.output == STDOUT_OUTPUT:
+        try:
+            count = write_jsonl(records, sys.stdout)
+        except BrokenPipeError:
+            sys.stdout = open(os.devnull, 'w')
+            return 0
+        echo(f"{Fore.GREEN}回放完成，共输出 {count} 条公告{Style.RESET_ALL}")
+        return 0
+    
+    results = list(records)
+    if not results:
+        echo(f"\n{Fore.YELLOW}存档中没有符合条件的招标公告{Style.RESET_ALL}")
+        return 0
+    
+    filepath = export_results(results, args, echo, scraper.profiler)
+    elapsed_time = (datetime.now() - start_time).total_seconds()
+    print_summary(results, filepath, elapsed_time)
+    return 0
+
+
+def run_queue(scraper: YfbzbScraper, args, echo, start_time: datetime) -> int:
+    """
+    协同抓取模式：通过共享工作队列与其他进程/机器分担抓取
+    
+    Args:
+        scraper: 爬虫实例
+        args: 命令行参数
+        echo: 控制台输出函数
+        start_time: 开始时间
+    
+    Returns:
+        退出码
+    """
+    queue = SQLiteWorkQueue(args.queue)
+    
+    def handle_signal(signum, frame):
+        logger.info(f"收到信号 {signum}，处理完当前任务后退出...")
+        scraper.stop()
+    
+    signal.signal(signal.SIGTERM, handle_signal)
+    signal.signal(signal.SIGINT, handle_signal)
+    
+    if args.role == 'worker':
+        echo(f"{Fore.YELLOW}以工作者身份加入队列: {args.queue}{Style.RESET_ALL}\n")
+        processed = QueueWorker(scraper, queue, worker_id=args.worker_id).run()
+        echo(f"{Fore.GREEN}工作者退出，共处理 {processed} 个任务{Style.RESET_ALL}")
+        return 0
+    
+    echo(f"{Fore.YELLOW}以协调者身份初始化队列: {args.queue}{Style.RESET_ALL}\n")
+    results = QueueCoordinator(scraper, queue, worker_id=args.worker_id).run(fetch_details=not args.no_details)
+    if scraper.stopped:
+        return 1
+    results = filter_results(results, args)
+    
+    if args.output == STDOUT_OUTPUT:
+        try:
+            write_jsonl(results, sys.stdout)
+        except BrokenPipeError:
+            sys.stdout = open(os.devnull, 'w')
+        return 0
+    
+    if not results:
+        echo(f"\n{Fore.YELLOW}未找到符合条件的招标公告{Style.RESET_ALL}")
+        return 0
+    
+    filepath = export_results(results, args, echo, scraper.profiler)
+    elapsed_time = (datetime.now() - start_time).total_seconds()
+    print_summary(results, filepath, elapsed_time)
+    return 0
+
+
+def run_backfill(scraper_factory, args, echo, start_time: datetime, store=None) -> int:
+    """
+    历史回溯模式：按日期窗口并行抓取 --from ~ --to 的公告，结果逐窗口落盘后流式合并导出
+    
+    Args:
+        scraper_factory: 创建爬虫的函数（各窗口共用限速器和HTTP传输）
+        args: 命令行参数
+        echo: 控制台输出函数
+        start_time: 开始时间
+        store: 公告库（可选），设置后记录同时写入公告库
+    
+    Returns:
+        退出码
+    """
+    output_dir = OUTPUT_CONFIG["output_dir"] if args.output == STDOUT_OUTPUT else args.output
+    directory = os.path.join(
+        output_dir, f"{BACKFILL_CONFIG['dirname']}_{args.date_from:%Y%m%d}_{args.date_to:%Y%m%d}")
+    backfill = Backfill(
+        scraper_factory,
+        directory,
+        args.date_from,
+        args.date_to,
+        fetch_details=not args.no_details,
+        window_days=args.window_days,
+        workers=args.backfill_workers,
+        store=store
+    )
+    
+    def handle_signal(signum, frame):
+        logger.info(f"收到信号 {signum}，保存各窗口断点后退出...")
+        backfill.stop()
+    
+    signal.signal(signal.SIGTERM, handle_signal)
+    signal.signal(signal.SIGINT, handle_signal)
+    
+    params = {"keywords": list(args.keywords), "keyword_batch_size": args.batch_keywords}
+    if backfill.prepare(params, resume=args.resume):
+        echo(f"{Fore.YELLOW}已从回溯清单恢复，继续抓取...{Style.RESET_ALL}")
+    echo(f"{Fore.YELLOW}开始回溯抓取: {args.date_from} ~ {args.date_to}（目录 {directory}）{Style.RESET_ALL}\n")
+    
+    if not backfill.run():
+        if backfill.stopped:
+            echo(f"\n{Fore.YELLOW}回溯已停止，使用 --resume 继续{Style.RESET_ALL}")
+        else:
+            echo(f"\n{Fore.RED}{backfill.failed} 个窗口抓取出错，使用 --resume 重新抓取这些窗口{Style.RESET_ALL}")
+        return 1
+    
+    # 各窗口的分片已按时间排列，逐条读出合并，不在内存中保留全部结果
+    records = filter_stream(backfill.records(), args)
+    if args.output == STDOUT_OUTPUT:
+        try:
+            write_jsonl(records, sys.stdout)
+        except BrokenPipeError:
+            sys.stdout = open(os.devnull, 'w')
+        return 0
+    
+    exporter = ExcelExporter(output_dir=args.output)
+    filename = f"{exporter.file_prefix}_回溯_{args.date_from:%Y%m%d}_{args.date_to:%Y%m%d}"
+    if args.format == 'jsonl':
+        filepath = exporter.export_jsonl(records, filename=f"{filename}.jsonl")
+    else:
+        # 一整年的结果不适合生成带样式的Excel，回溯模式导出CSV
+        filepath = exporter.export_csv_stream(records, filename=f"{filename}.csv")
+    
+    summary = backfill.manifest.summary()
+    elapsed_time = (datetime.now() - start_time).total_seconds()
+    echo(f"\n{Fore.GREEN}回溯完成: {summary['windows']} 个窗口，共 {summary['records']} 条公告，"
+         f"耗时 {elapsed_time:.1f} 秒{Style.RESET_ALL}")
+    echo(f"  输出文件: {filepath or '无'}")
+    return 0
+
+
+def run_sources(scraper_factory, args, echo, start_time: datetime) -> int:
+    """
+    多数据源模式：每个数据源一个抓取任务同时进行，结束后合并导出
+    
+    各任务共用HTTP传输；限速按域名分开，一个网站的请求间隔不会拖慢其他网站。
+    
+    Args:
+        scraper_factory: 按数据源创建爬虫的函数 (source) -> YfbzbScraper
+        args: 命令行参数
+        echo: 控制台输出函数
+        start_time: 开始时间
+    
+    Returns:
+        退出码
+    """
+    jobs = []
+    for name in args.sources:
+        source = create_source(name)
+        jobs.append(CrawlJob(scraper_factory(source), fetch_details=not args.no_details, name=source.label))
+    
+    def handle_signal(signum, frame):
+        logger.info(f"收到信号 {signum}，停止各数据源的抓取...")
+        for job in jobs:
+            job.cancel()
+    
+    signal.signal(signal.SIGTERM, handle_signal)
+    signal.signal(signal.SIGINT, handle_signal)
+    
+    echo(f"{Fore.YELLOW}开始抓取 {len(jobs)} 个数据源: {'、'.join(job.name for job in jobs)}{Style.RESET_ALL}\n")
+    for job in jobs:
+        job.start()
+    for job in jobs:
+        # 带超时等待，主线程仍能及时处理信号
+        while not job.wait(1.0):
+            pass
+    
+    # 单个数据源出错不影响其他数据源的结果导出，但退出码为1
+    failed = False
+    for job in jobs:
+        if job.state == CrawlJob.FAILED:
+            failed = True
+            echo(f"{Fore.RED}[{job.name}] 抓取出错: {job.error}{Style.RESET_ALL}")
+        else:
+            echo(f"  [{job.name}] {len(job.results)} 条公告")
+    if any(job.state == CrawlJob.CANCELLED for job in jobs):
+        echo(f"\n{Fore.YELLOW}用户取消操作{Style.RESET_ALL}")
+        return 1
+    
+    results = filter_results(merge_results(jobs), args)
+    if args.output == STDOUT_OUTPUT:
+        try:
+            write_jsonl(results, sys.stdout)
+        except BrokenPipeError:
+            sys.stdout = open(os.devnull, 'w')
+        return 1 if failed else 0
+    
+    if not results:
+        echo(f"\n{Fore.YELLOW}未找到符合条件的招标公告{Style.RESET_ALL}")
+        return 1 if failed else 0
+    
+    filepath = export_results(results, args, echo, jobs[0].scraper.profiler)
+    elapsed_time = (datetime.now() - start_time).total_seconds()
+    print_summary(results, filepath, elapsed_time)
+    return 1 if failed else 0
 
 
 def main():
@@ -81,6 +534,22 @@ def main():
   python main.py -o ./results             # 指定输出目录
   python main.py --no-details             # 只抓取列表，不抓取详情
   python main.py --csv                    # 同时导出CSV格式
+  python main.py -w 4                     # 并发抓取详情页
+  python main.py --budget-seconds 240     # 限时4分钟，优先抓取最相关公告的详情
+  python main.py --dedup                  # 近似重复的公告只抓取一份详情
+  python main.py --store data/yfbzb.db    # 记录详情页内容变化，标出有更新的公告
+  python main.py --min-budget 50万        # 只输出预算不低于50万元的公告
+  python main.py --format jsonl -o -      # 以JSON Lines流式输出到标准输出
+  python main.py --daemon --interval 30m  # 常驻运行，每30分钟抓取一次增量
+  python main.py --resume                 # 从上次中断处继续抓取
+  python main.py --profile                # 输出各阶段耗时报告
+  python main.py --record-archive archive/responses.gz   # 抓取时录制原始响应
+  python main.py --replay archive/responses.gz           # 从存档离线重新解析
+  python main.py --queue /mnt/shared/queue.db            # 协调者：投放任务并合并结果
+  python main.py --queue /mnt/shared/queue.db --role worker   # 其他机器上的工作者
+  python main.py --daemon --metrics-port 9109   # 常驻运行并暴露Prometheus指标
+  python main.py --from 2025-01-01 --to 2025-12-31   # 按日期窗口回溯一年的公告
+  python main.py --sources yfbzb ...      # 指定数据源，多个数据源同时抓取并合并导出
         """
     )
     
@@ -98,11 +567,35 @@ def main():
         help='时间范围（小时），默认48小时'
     )
     
+    parser.add_argument(
+        '--batch-keywords',
+        type=int,
+        default=SEARCH_CONFIG["keyword_batch_size"],
+        metavar='N',
+        help='每次搜索合并N个关键词，列表页请求约减少为1/N；公告按标题归属到关键词（“匹配关键词”列）'
+    )
+    
+    parser.add_argument(
+        '--sources',
+        nargs='+',
+        choices=list(SOURCES),
+        default=SOURCES_CONFIG["default"],
+        metavar='NAME',
+        help=f'数据源（可多个，同时抓取后合并导出）：{", ".join(SOURCES)}；默认 %(default)s'
+    )
+    
     parser.add_argument(
         '-o', '--output',
         type=str,
         default=OUTPUT_CONFIG["output_dir"],
-        help='输出目录'
+        help='输出目录；配合 --format jsonl 时可用 - 表示标准输出'
+    )
+    
+    parser.add_argument(
+        '--format',
+        choices=['excel', 'jsonl'],
+        default='excel',
+        help='输出格式：excel（默认）或 jsonl（逐条流式写出）'
     )
     
     parser.add_argument(
@@ -123,85 +616,441 @@ def main():
         help='静默模式，减少输出'
     )
     
+    parser.add_argument(
+        '-w', '--workers',
+        type=int,
+        default=REQUEST_CONFIG["max_workers"],
+        help='详情页并发抓取数（请求间隔仍受 request_delay 限制），默认1'
+    )
+    
+    parser.add_argument(
+        '--transport',
+        choices=list(TRANSPORTS),
+        default=REQUEST_CONFIG["transport"],
+        help='HTTP传输：requests（HTTP/1.1，默认）或 http2（需安装 httpx[http2]，并发请求共用一个连接）'
+    )
+    
+    parser.add_argument(
+        '--hedge',
+        action='store_true',
+        help='请求对冲：请求耗时超过近期p95时再发出一个相同请求，取先完成的一个（计入限速和预算）'
+    )
+    
+    parser.add_argument(
+        '--adaptive',
+        action='store_true',
+        help='自适应并发：以 -w 为初始值，请求顺畅时逐步增加并发，遇到429/5xx、超时或耗时突增时减半'
+    )
+    
+    parser.add_argument(
+        '--budget-seconds',
+        type=float,
+        metavar='SECONDS',
+        help='抓取阶段的时间预算；按相关度优先抓取详情，超时后剩余公告只保留列表信息'
+    )
+    
+    parser.add_argument(
+        '--budget-requests',
+        type=int,
+        metavar='N',
+        help='抓取阶段的请求次数预算（含重试），用尽后剩余公告只保留列表信息'
+    )
+    
+    parser.add_argument(
+        '--min-budget',
+        type=parse_budget,
+        metavar='AMOUNT',
+        help='只输出预算不低于该金额的公告，如 500000、50万（预算未知的公告保留）'
+    )
+    
+    parser.add_argument(
+        '--max-budget',
+        type=parse_budget,
+        metavar='AMOUNT',
+        help='只输出预算不高于该金额的公告（预算未知的公告保留）'
+    )
+    
+    parser.add_argument(
+        '--dedup',
+        action='store_true',
+        help='按标题识别近似重复的公告（跨次运行累积），只抓取代表公告的详情，其余标记为重复'
+    )
+    
+    parser.add_argument(
+        '--store',
+        type=str,
+        metavar='PATH',
+        help='公告库（SQLite文件）：详情页内容未变化时跳过提取，变化时记录字段变更并在导出中标出'
+    )
+    
+    parser.add_argument(
+        '--daemon',
+        action='store_true',
+        help='常驻模式：按 --interval 循环抓取增量，收到SIGTERM后退出'
+    )
+    
+    parser.add_argument(
+        '--interval',
+        type=parse_interval,
+        default=parse_interval('1h'),
+        help='常驻模式的抓取间隔，如 90s、30m、1h（默认1h，不带单位按秒）'
+    )
+    
+    parser.add_argument(
+        '--resume',
+        action='store_true',
+        help='从上次中断的断点继续抓取（断点保存在输出目录下）'
+    )
+    
+    parser.add_argument(
+        '--profile',
+        action='store_true',
+        help='统计各阶段耗时，结束时输出性能报告'
+    )
+    
+    parser.add_argument(
+        '--profile-json',
+        type=str,
+        metavar='PATH',
+        help='同时把性能报告保存为JSON文件（隐含 --profile）'
+    )
+    
+    parser.add_argument(
+        '--record-archive',
+        type=str,
+        metavar='PATH',
+        help='把原始响应录制到压缩存档（只追加），供 --replay 离线重新解析'
+    )
+    
+    parser.add_argument(
+        '--replay',
+        type=str,
+        metavar='PATH',
+        help='不访问网络，从响应存档重新解析全部公告并导出'
+    )
+    
+    parser.add_argument(
+        '--queue',
+        type=str,
+        metavar='PATH',
+        help='协同抓取：使用该SQLite文件作为共享工作队列（可放在共享卷上）'
+    )
+    
+    parser.add_argument(
+        '--role',
+        choices=['coordinator', 'worker'],
+        default='coordinator',
+        help='协同抓取中的角色：coordinator 投放任务并合并导出（默认），worker 只处理任务'
+    )
+    
+    parser.add_argument(
+        '--worker-id',
+        type=str,
+        help='协同抓取中的工作者标识，默认为 主机名-进程号'
+    )
+    
+    parser.add_argument(
+        '--from',
+        dest='date_from',
+        type=parse_date,
+        metavar='DATE',
+        help='历史回溯：抓取从该日期（如 2025-01-01）起的公告，按日期窗口并行抓取，结果导出为CSV'
+    )
+    
+    parser.add_argument(
+        '--to',
+        dest='date_to',
+        type=parse_date,
+        metavar='DATE',
+        help='历史回溯的末日（含），默认为今天'
+    )
+    
+    parser.add_argument(
+        '--window-days',
+        type=int,
+        default=BACKFILL_CONFIG["window_days"],
+        metavar='N',
+        help='历史回溯的初始窗口天数，窗口内公告超过最大页数时自动拆分（默认%(default)s）'
+    )
+    
+    parser.add_argument(
+        '--backfill-workers',
+        type=int,
+        default=BACKFILL_CONFIG["workers"],
+        metavar='N',
+        help='历史回溯同时抓取的窗口数，所有请求仍受 request_delay 限制（默认%(default)s）'
+    )
+    
+    parser.add_argument(
+        '--metrics-port',
+        type=int,
+        metavar='PORT',
+        help='在本机该端口的 /metrics 暴露Prometheus格式指标'
+    )
+    
+    parser.add_argument(
+        '--metrics-textfile',
+        type=str,
+        metavar='PATH',
+        help='把指标写入文本文件（.prom），供node_exporter读取'
+    )
+    
     args = parser.parse_args()
     
+    # 流式输出到stdout时，数据独占stdout，其余输出全部转到stderr
+    stream_stdout = args.output == STDOUT_OUTPUT
+    if stream_stdout and args.format != 'jsonl':
+        parser.error('输出到标准输出 (-o -) 仅支持 --format jsonl')
+    if stream_stdout and args.csv:
+        parser.error('输出到标准输出 (-o -) 时不支持 --csv')
+    if args.workers < 1:
+        parser.error('--workers 必须大于等于1')
+    if args.batch_keywords < 1:
+        parser.error('--batch-keywords 必须大于等于1')
+    if (args.budget_seconds is not None and args.budget_seconds <= 0) or \
+            (args.budget_requests is not None and args.budget_requests <= 0):
+        parser.error('预算必须大于0')
+    if args.min_budget is not None and args.max_budget is not None and args.min_budget > args.max_budget:
+        parser.error('--min-budget 不能大于 --max-budget')
+    if args.daemon and args.resume:
+        parser.error('常驻模式不支持 --resume')
+    if args.replay and (args.daemon or args.resume or args.record_archive):
+        parser.error('--replay 不能与 --daemon、--resume、--record-archive 同时使用')
+    if args.queue and (args.daemon or args.resume or args.replay):
+        parser.error('--queue 不能与 --daemon、--resume、--replay 同时使用')
+    args.sources = list(dict.fromkeys(args.sources))
+    if len(args.sources) > 1 and (args.resume or args.daemon or args.replay or args.queue or args.date_from):
+        parser.error('多个数据源不能与 --resume、--daemon、--replay、--queue、--from 同时使用')
+    if args.date_to is not None and args.date_from is None:
+        parser.error('--to 需要与 --from 一起使用')
+    if args.date_from is not None:
+        args.date_to = args.date_to or date.today()
+        if args.date_from > args.date_to:
+            parser.error('--from 不能晚于 --to')
+        if args.daemon or args.replay or args.queue:
+            parser.error('--from 不能与 --daemon、--replay、--queue 同时使用')
+        if args.budget_seconds is not None or args.budget_requests is not None:
+            parser.error('--from 不支持抓取预算')
+        if args.window_days < 1 or args.backfill_workers < 1:
+            parser.error('--window-days 和 --backfill-workers 必须大于等于1')
+    if args.replay and not ResponseArchive(args.replay).exists():
+        parser.error(f'存档不存在: {args.replay}')
+    
+    console = sys.stderr if stream_stdout else sys.stdout
+    setup_logging(console)
+    
+    def echo(*values):
+        print(*values, file=console)
+    
     # 打印横幅
     if not args.quiet:
-        print_banner()
+        print_banner(file=console)
     
     # 显示配置信息
-    print(f"{Fore.CYAN}当前配置:{Style.RESET_ALL}")
-    print(f"  搜索关键词: {', '.join(args.keywords)}")
-    print(f"  时间范围: 最近 {args.time_range} 小时")
-    print(f"  输出目录: {args.output}")
-    print(f"  抓取详情: {'否' if args.no_details else '是'}")
-    print()
+    echo(f"{Fore.CYAN}当前配置:{Style.RESET_ALL}")
+    echo(f"  数据来源: {'、'.join(create_source(name).label for name in args.sources)}")
+    echo(f"  搜索关键词: {', '.join(args.keywords)}")
+    if args.batch_keywords > 1 and len(args.keywords) > 1:
+        echo(f"  合并搜索: 每次 {args.batch_keywords} 个关键词")
+    if args.date_from is not None:
+        echo(f"  回溯范围: {args.date_from} ~ {args.date_to}"
+             f"（窗口 {args.window_days} 天，同时抓取 {args.backfill_workers} 个窗口）")
+    else:
+        echo(f"  时间范围: 最近 {args.time_range} 小时")
+    echo(f"  输出目录: {'标准输出' if stream_stdout else args.output}")
+    echo(f"  输出格式: {args.format}")
+    echo(f"  抓取详情: {'否' if args.no_details else '是'}")
+    if args.budget_seconds is not None or args.budget_requests is not None:
+        per_source = "（每个数据源分别计算）" if len(args.sources) > 1 else ""
+        echo(f"  抓取预算: {CrawlBudget(args.budget_seconds, args.budget_requests).describe()}{per_source}")
+    if not args.no_details:
+        if args.adaptive:
+            echo(f"  详情并发: 自适应 {CONCURRENCY_CONFIG['min']}-{CONCURRENCY_CONFIG['max']}（初始 {args.workers}）")
+        else:
+            echo(f"  详情并发: {args.workers}")
+    if args.transport != 'requests':
+        echo(f"  HTTP传输: {args.transport}")
+    if args.hedge:
+        echo(f"  请求对冲: 超过近期 p{HEDGE_CONFIG['percentile'] * 100:.0f} 耗时时启用")
+    if args.min_budget is not None or args.max_budget is not None:
+        low = f"{args.min_budget:,.0f}" if args.min_budget is not None else "不限"
+        high = f"{args.max_budget:,.0f}" if args.max_budget is not None else "不限"
+        echo(f"  预算范围: {low} ~ {high} 元")
+    echo()
     
     # 记录开始时间
     start_time = datetime.now()
     
-    try:
-        # 初始化爬虫
-        print(f"{Fore.YELLOW}正在初始化爬虫...{Style.RESET_ALL}")
-        scraper = YfbzbScraper(
+    profiler = StageProfiler() if (args.profile or args.profile_json) else None
+    metrics = CrawlMetrics() if (args.metrics_port is not None or args.metrics_textfile) else None
+    archive = ResponseArchive(args.record_archive or args.replay) if (args.record_archive or args.replay) else None
+    budgeted = args.budget_seconds is not None or args.budget_requests is not None
+    dedup = None
+    if args.dedup:
+        # 标题索引与断点一样保存在输出目录下
+        index_dir = OUTPUT_CONFIG["output_dir"] if stream_stdout else args.output
+        dedup = NearDuplicateIndex(os.path.join(index_dir, DEDUP_CONFIG["filename"]))
+    store = AnnouncementStore(args.store) if args.store else None
+    # 历史回溯时多个窗口、多数据源时各数据源同时抓取，连接池按总并发数设置
+    windows = args.backfill_workers if args.date_from is not None else len(args.sources)
+    transport = create_transport(
+        args.transport,
+        headers=REQUEST_CONFIG["headers"],
+        pool_maxsize=max(REQUEST_CONFIG["pool_maxsize"],
+                         windows * max(args.workers, CONCURRENCY_CONFIG["max"] if args.adaptive else 0))
+    )
+    # 同一网站的请求共用一个限速器（回溯的各窗口也是如此），不同网站互不等待
+    host_limiters = HostRateLimiters(REQUEST_CONFIG["request_delay"], SOURCES_CONFIG["host_delays"])
+    
+    def make_scraper(source=None) -> YfbzbScraper:
+        source = source or create_source(args.sources[0])
+        # 每个爬虫一份预算：iter_records 开始时会重置预算，多个数据源共用一份时会互相清零已用量
+        budget = CrawlBudget(seconds=args.budget_seconds, requests=args.budget_requests) if budgeted else None
+        return YfbzbScraper(
             keywords=args.keywords,
-            time_range_hours=args.time_range
+            time_range_hours=args.time_range,
+            profiler=profiler,
+            metrics=metrics,
+            max_workers=args.workers,
+            archive=archive if args.record_archive else None,
+            budget=budget,
+            dedup=dedup,
+            store=store,
+            transport=transport,
+            hedge=args.hedge,
+            adaptive=args.adaptive,
+            keyword_batch_size=args.batch_keywords,
+            rate_limiter=host_limiters.for_url(source.base_url),
+            source=source
         )
+    
+    try:
+        # 初始化爬虫
+        echo(f"{Fore.YELLOW}正在初始化爬虫...{Style.RESET_ALL}")
+        scraper = make_scraper()
+        
+        if args.metrics_port is not None:
+            metrics.registry.start_http_server(args.metrics_port)
+        
+        if args.replay:
+            echo(f"{Fore.YELLOW}从存档回放: {args.replay}{Style.RESET_ALL}\n")
+            return run_replay(scraper, archive, args, echo, start_time)
+        
+        if args.queue:
+            return run_queue(scraper, args, echo, start_time)
+        
+        if len(args.sources) > 1:
+            return run_sources(make_scraper, args, echo, start_time)
+        
+        if args.date_from is not None:
+            return run_backfill(make_scraper, args, echo, start_time, store=store)
+        
+        if args.daemon:
+            echo(f"{Fore.YELLOW}进入常驻模式，抓取间隔 {args.interval:.0f} 秒{Style.RESET_ALL}\n")
+            return run_daemon(scraper, args, echo)
+        
+        # 单次运行启用断点，被中断后可用 --resume 继续
+        checkpoint_dir = OUTPUT_CONFIG["output_dir"] if stream_stdout else args.output
+        checkpoint = CrawlCheckpoint(os.path.join(checkpoint_dir, CHECKPOINT_CONFIG["filename"]))
+        if scraper.use_checkpoint(checkpoint, fetch_details=not args.no_details, resume=args.resume):
+            echo(f"{Fore.YELLOW}已从断点恢复，继续抓取...{Style.RESET_ALL}")
+        
+        echo(f"{Fore.YELLOW}开始抓取招标公告...{Style.RESET_ALL}\n")
+        
+        if args.format == 'jsonl':
+            # 基于记录流逐条写出，同时保留一份用于CSV和摘要
+            results = []
+            
+            def collect():
+                for record in filter_stream(scraper.iter_records(
+                    fetch_details=not args.no_details,
+                    show_progress=not args.quiet
+                ), args):
+                    results.append(record)
+                    yield record
+            
+            if stream_stdout:
+                try:
+                    write_jsonl(collect(), sys.stdout)
+                except BrokenPipeError:
+                    # 下游消费者提前关闭管道（如 head），正常结束
+                    sys.stdout = open(os.devnull, 'w')
+                    return 0
+                filepath = '<stdout>'
+            else:
+                exporter = ExcelExporter(output_dir=args.output, profiler=profiler)
+                filepath = exporter.export_jsonl(collect())
+            
+            if not results:
+                echo(f"\n{Fore.YELLOW}未找到符合条件的招标公告{Style.RESET_ALL}")
+                return 0
+            
+            if args.csv:
+                echo(f"{Fore.YELLOW}正在生成CSV文件...{Style.RESET_ALL}")
+                csv_path = exporter.export_csv(results)
+                echo(f"  CSV文件: {csv_path}")
+            
+            elapsed_time = (datetime.now() - start_time).total_seconds()
+            print_summary(results, filepath, elapsed_time, file=console)
+            return 0
         
         # 执行抓取
-        print(f"{Fore.YELLOW}开始抓取招标公告...{Style.RESET_ALL}\n")
-        results = scraper.scrape(
+        results = filter_results(scraper.scrape(
             fetch_details=not args.no_details,
             show_progress=not args.quiet
-        )
+        ), args)
         
         if not results:
-            print(f"\n{Fore.YELLOW}未找到符合条件的招标公告{Style.RESET_ALL}")
+            echo(f"\n{Fore.YELLOW}未找到符合条件的招标公告{Style.RESET_ALL}")
             return 0
         
         # 导出结果
-        print(f"\n{Fore.YELLOW}正在生成Excel报表...{Style.RESET_ALL}")
-        exporter = ExcelExporter(output_dir=args.output)
-        filepath = exporter.export(results)
-        
-        # 导出CSV（如果需要）
-        if args.csv:
-            print(f"{Fore.YELLOW}正在生成CSV文件...{Style.RESET_ALL}")
-            csv_path = exporter.export_csv(results)
-            print(f"  CSV文件: {csv_path}")
+        filepath = export_results(results, args, echo, profiler)
         
         # 计算耗时
         elapsed_time = (datetime.now() - start_time).total_seconds()
         
         # 打印摘要
-        print_summary(results, filepath, elapsed_time)
+        print_summary(results, filepath, elapsed_time, file=console)
         
         # 显示部分结果预览
         if not args.quiet and results:
-            print(f"{Fore.CYAN}结果预览 (前5条):{Style.RESET_ALL}")
-            print("-" * 60)
+            echo(f"{Fore.CYAN}结果预览 (前5条):{Style.RESET_ALL}")
+            echo("-" * 60)
             for i, item in enumerate(results[:5], 1):
                 title = item.get('title', '')[:40]
                 if len(item.get('title', '')) > 40:
                     title += '...'
                 publish_time = item.get('publish_time', 'N/A')
                 region = item.get('region', 'N/A')
-                print(f"  {i}. [{publish_time}] {title}")
-                print(f"     地区: {region}")
+                echo(f"  {i}. [{publish_time}] {title}")
+                echo(f"     地区: {region}")
             if len(results) > 5:
-                print(f"  ... 还有 {len(results) - 5} 条")
-            print("-" * 60)
+                echo(f"  ... 还有 {len(results) - 5} 条")
+            echo("-" * 60)
         
         return 0
-        
+    
     except KeyboardInterrupt:
-        print(f"\n{Fore.YELLOW}用户取消操作{Style.RESET_ALL}")
+        echo(f"\n{Fore.YELLOW}用户取消操作{Style.RESET_ALL}")
         return 1
     except Exception as e:
         logger.error(f"程序执行出错: {e}")
         import traceback
         traceback.print_exc()
         return 1
+    finally:
+        if archive:
+            archive.close()
+        if dedup is not None:
+            dedup.close()
+        if store:
+            store.close()
+        transport.close()
+        if profiler:
+            report_profile(profiler, args, echo)
+        if metrics and not args.daemon:
+            write_metrics_textfile(metrics, args)
 
 
 if __name__ == "__main__":
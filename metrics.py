@@ -0,0 +1,345 @@
+# -*- coding: utf-8 -*-
+"""
+指标模块 - Prometheus 文本格式的运行指标
+
+提供两种暴露方式：
+- 本地HTTP端点 (/metrics)，供 Prometheus 直接抓取
+- 文本文件，供 node_exporter 的 textfile collector 读取
+"""
+
+import os
+import time
+import bisect
+import threading
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from typing import List, Dict, Tuple, Sequence
+import logging
+
+from config import METRICS_CONFIG
+
+logger = logging.getLogger(__name__)
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+def _format_value(value: float) -> str:
+    """格式化指标值"""
+    if value == float("inf"):
+        return "+Inf"
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+def _format_labels(names: Sequence[str], values: Sequence[str]) -> str:
+    """格式化标签，按规范转义反斜杠、引号和换行"""
+    if not names:
+        return ""
+    pairs = []
+    for name, value in zip(names, values):
+        value = str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+        pairs.append(f'{name}="{value}"')
+    return "{" + ",".join(pairs) + "}"
+
+
+class _Metric:
+    """指标基类"""
+    
+    TYPE = ""
+    
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+    
+    def _key(self, labels: Dict[str, str]) -> Tuple[str, ...]:
+        return tuple(str(labels.get(name, "")) for name in self.labelnames)
+    
+    def _header(self) -> List[str]:
+        return [
+            f"# HELP {self.name} {self.documentation}",
+            f"# TYPE {self.name} {self.TYPE}",
+        ]
+    
+    def render(self) -> List[str]:
+        raise NotImplementedError
+
+
+class Counter(_Metric):
+    """单调递增计数器"""
+    
+    TYPE = "counter"
+    
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        super().__init__(name, documentation, labelnames)
+        self._values: Dict[Tuple[str, ...], float] = {}
+    
+    def inc(self, amount: float = 1, **labels):
+        """
+        计数器累加
+        
+        Args:
+            amount: 增量
+            labels: 标签值
+        """
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+    
+    def render(self) -> List[str]:
+        lines = self._header()
+        with self._lock:
+            values = dict(self._values)
+        if not values and not self.labelnames:
+            values[()] = 0
+        for key, value in sorted(values.items()):
+            lines.append(f"{self.name}{_format_labels(self.labelnames, key)} {_format_value(value)}")
+        return lines
+
+
+class Gauge(_Metric):
+    """可增可减的瞬时值"""
+    
+    TYPE = "gauge"
+    
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        super().__init__(name, documentation, labelnames)
+        self._values: Dict[Tuple[str, ...], float] = {}
+    
+    def set(self, value: float, **labels):
+        """
+        设置当前值
+        
+        Args:
+            value: 指标值
+            labels: 标签值
+        """
+        with self._lock:
+            self._values[self._key(labels)] = value
+    
+    def render(self) -> List[str]:
+        lines = self._header()
+        with self._lock:
+            values = dict(self._values)
+        for key, value in sorted(values.items()):
+            lines.append(f"{self.name}{_format_labels(self.labelnames, key)} {_format_value(value)}")
+        return lines
+
+
+class Histogram(_Metric):
+    """分桶直方图"""
+    
+    TYPE = "histogram"
+    
+    def __init__(self, name: str, documentation: str, buckets: Sequence[float],
+                 labelnames: Sequence[str] = ()):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = sorted(buckets)
+        # 标签 -> (各桶计数, 总和, 总数)
+        self._values: Dict[Tuple[str, ...], list] = {}
+    
+    def observe(self, value: float, **labels):
+        """
+        记录一个观测值
+        
+        Args:
+            value: 观测值（秒）
+            labels: 标签值
+        """
+        key = self._key(labels)
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            entry = self._values.get(key)
+            if entry is None:
+                entry = self._values[key] = [[0] * len(self.buckets), 0.0, 0]
+            if index < len(self.buckets):
+                entry[0][index] += 1
+            entry[1] += value
+            entry[2] += 1
+    
+    def render(self) -> List[str]:
+        lines = self._header()
+        with self._lock:
+            values = {key: (list(counts), total, count) for key, (counts, total, count) in self._values.items()}
+        bucket_labels = self.labelnames + ("le",)
+        for key, (counts, total, count) in sorted(values.items()):
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets, counts):
+                cumulative += bucket_count
+                labels = _format_labels(bucket_labels, key + (_format_value(bound),))
+                lines.append(f"{self.name}_bucket{labels} {cumulative}")
+            labels = _format_labels(bucket_labels, key + ("+Inf",))
+            lines.append(f"{self.name}_bucket{labels} {count}")
+            lines.append(f"{self.name}_sum{_format_labels(self.labelnames, key)} {_format_value(total)}")
+            lines.append(f"{self.name}_count{_format_labels(self.labelnames, key)} {count}")
+        return lines
+
+
+class MetricsRegistry:
+    """指标注册表"""
+    
+    def __init__(self):
+        self._metrics: List[_Metric] = []
+    
+    def register(self, metric: _Metric) -> _Metric:
+        """注册指标"""
+        self._metrics.append(metric)
+        return metric
+    
+    def render(self) -> str:
+        """
+        渲染为 Prometheus 文本格式
+        
+        Returns:
+            指标文本
+        """
+        lines = []
+        for metric in self._metrics:
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+    
+    def write_textfile(self, path: str):
+        """
+        写入文本文件（先写临时文件再替换，避免被读到半个文件）
+        
+        Args:
+            path: 输出路径，node_exporter 要求以 .prom 结尾
+        """
+        directory = os.path.dirname(path)
+        if directory and not os.path.exists(directory):
+            os.makedirs(directory)
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            f.write(self.render())
+        os.replace(tmp_path, path)
+    
+    def start_http_server(self, port: int, host: str = None) -> ThreadingHTTPServer:
+        """
+        在后台线程启动 /metrics HTTP端点
+        
+        Args:
+            port: 监听端口
+            host: 监听地址，默认只监听本机
+        
+        Returns:
+            HTTP服务器实例（调用 shutdown() 停止）
+        """
+        registry = self
+        
+        class MetricsHandler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path.split("?")[0] not in ("/", "/metrics"):
+                    self.send_error(404)
+                    return
+                body = registry.render().encode("utf-8")
+                self.send_response(200)
+                self.send_header("Content-Type", CONTENT_TYPE)
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+            
+            def log_message(self, format, *args):
+                logger.debug(f"metrics: {format % args}")
+        
+        host = host or METRICS_CONFIG["listen_host"]
+        server = ThreadingHTTPServer((host, port), MetricsHandler)
+        thread = threading.Thread(target=server.serve_forever, name="metrics-http", daemon=True)
+        thread.start()
+        logger.info(f"指标端点已启动: http://{host}:{server.server_port}/metrics")
+        return server
+
+
+class CrawlMetrics:
+    """爬虫运行指标"""
+    
+    def __init__(self, registry: MetricsRegistry = None):
+        """
+        初始化并注册爬虫指标
+        
+        Args:
+            registry: 指标注册表，默认新建
+        """
+        self.registry = registry or MetricsRegistry()
+        buckets = METRICS_CONFIG["latency_buckets"]
+        
+        self.requests = self.registry.register(Counter(
+            "yfbzb_requests_total", "HTTP requests by response status (error = no response)", ["status"]))
+        self.retries = self.registry.register(Counter(
+            "yfbzb_request_retries_total", "HTTP request retries"))
+        self.hedges = self.registry.register(Counter(
+            "yfbzb_request_hedges_total", "Hedged duplicate requests by which response was used", ["result"]))
+        self.cache_hits = self.registry.register(Counter(
+            "yfbzb_cache_hits_total", "Detail fetches avoided by a cache", ["cache"]))
+        self.records = self.registry.register(Counter(
+            "yfbzb_records_scraped_total", "Announcements scraped"))
+        self.request_latency = self.registry.register(Histogram(
+            "yfbzb_request_duration_seconds", "HTTP request latency", buckets))
+        self.parse_latency = self.registry.register(Histogram(
+            "yfbzb_parse_duration_seconds", "HTML parse and extraction latency", buckets, ["kind"]))
+        self.last_success = self.registry.register(Gauge(
+            "yfbzb_last_success_timestamp_seconds", "Unix time of the last crawl that completed"))
+        self.concurrency_limit = self.registry.register(Gauge(
+            "yfbzb_concurrency_limit", "Current adaptive limit on in-flight requests"))
+    
+    def observe_request(self, status, seconds: float = None):
+        """记录一次HTTP请求；status 为状态码或 'error'"""
+        self.requests.inc(status=status)
+        if seconds is not None:
+            self.request_latency.observe(seconds)
+    
+    def observe_retry(self):
+        """记录一次重试"""
+        self.retries.inc()
+    
+    def observe_hedge(self, won: bool):
+        """记录一次对冲请求；won 表示采用了对冲请求的响应"""
+        self.hedges.inc(result="won" if won else "lost")
+    
+    def observe_parse(self, kind: str, seconds: float):
+        """记录一次页面解析，kind 为 list/detail"""
+        self.parse_latency.observe(seconds, kind=kind)
+    
+    def cache_hit(self, cache: str):
+        """记录一次缓存命中"""
+        self.cache_hits.inc(cache=cache)
+    
+    def record_scraped(self, n: int = 1):
+        """记录抓取到的公告数"""
+        self.records.inc(n)
+    
+    def crawl_succeeded(self):
+        """记录一次完整结束的抓取"""
+        self.last_success.set(time.time())
+    
+    def set_concurrency_limit(self, limit: int):
+        """记录自适应并发的当前上限"""
+        self.concurrency_limit.set(limit)
+
+
+class NullMetrics:
+    """不记录任何指标的占位实现，未开启指标时使用"""
+    
+    def observe_request(self, status, seconds: float = None):
+        pass
+    
+    def observe_retry(self):
+        pass
+    
+    def observe_hedge(self, won: bool):
+        pass
+    
+    def observe_parse(self, kind: str, seconds: float):
+        pass
+    
+    def cache_hit(self, cache: str):
+        pass
+    
+    def record_scraped(self, n: int = 1):
+        pass
+    
+    def crawl_succeeded(self):
+        pass
+    
+    def set_concurrency_limit(self, limit: int):
+        pass
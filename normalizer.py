@@ -0,0 +1,179 @@
+# -*- coding: utf-8 -*-
+"""
+规范化模块 - 把金额、截止时间等文本字段转换为数值/时间列
+
+详情页提取出的字段是原文（如 "186.5万元"、"2025年6月27日 10:00"），
+排序和筛选前在整个结果集上做一次向量化转换（pandas 字符串方法），
+新增 budget_yuan 等类型列，原文字段保持不变。
+"""
+
+import re
+from datetime import datetime
+from typing import List, Dict, Optional, Iterable, Iterator
+import logging
+
+import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+# 金额：数字（可带千分位和小数）+ 可选的万/亿单位
+AMOUNT_PATTERN = r'(\d[\d,]*(?:\.\d+)?)\s*(万|亿)?'
+AMOUNT_UNITS = {'万': 1e4, '亿': 1e8}
+
+# 日期时间：2025年6月27日 10:00 / 2025-06-27 10:00 / 2025/6/27 9时30分，时间部分可省略
+DATETIME_PATTERN = (
+    r'(?P<year>\d{4})\s*[年/.-]\s*(?P<month>\d{1,2})\s*[月/.-]\s*(?P<day>\d{1,2})\s*日?'
+    r'(?:\s*(?P<hour>\d{1,2})\s*[:：时]\s*(?P<minute>\d{1,2})?)?'
+)
+
+# 文本字段 -> 类型列
+AMOUNT_FIELDS = {
+    "project_budget": "budget_yuan",
+    "registration_fee": "registration_fee_yuan",
+    "bid_bond": "bid_bond_yuan",
+}
+DATETIME_FIELDS = {
+    "registration_deadline": "registration_deadline_at",
+}
+
+_amount_re = re.compile(AMOUNT_PATTERN)
+_datetime_re = re.compile(DATETIME_PATTERN)
+
+
+def parse_amount(text: str) -> Optional[float]:
+    """
+    把单个金额文本换算为元（逐条处理时使用，如命令行参数和记录流）
+    
+    Args:
+        text: 金额文本，如 "186.5万元"、"20,000元"、"50万"
+    
+    Returns:
+        金额（元），无法识别时为None
+    """
+    match = _amount_re.search(text or '')
+    if not match:
+        return None
+    return float(match.group(1).replace(',', '')) * AMOUNT_UNITS.get(match.group(2), 1)
+
+
+def parse_datetime(text: str) -> Optional[datetime]:
+    """
+    解析单个日期时间文本（逐条处理时使用，规则与 datetimes 一致）
+    
+    Args:
+        text: 日期时间文本，如 "2025-06-27"、"2025年6月27日 10:00"
+    
+    Returns:
+        日期时间，无法识别时为None
+    """
+    match = _datetime_re.search(text or '')
+    if not match:
+        return None
+    parts = {name: int(value) for name, value in match.groupdict().items() if value}
+    try:
+        return datetime(parts["year"], parts["month"], parts["day"], parts.get("hour", 0), parts.get("minute", 0))
+    except ValueError:
+        return None
+
+
+def amounts(series: pd.Series) -> pd.Series:
+    """
+    向量化换算一列金额文本
+    
+    Args:
+        series: 金额文本列
+    
+    Returns:
+        float列（元），无法识别的为NaN
+    """
+    parts = series.fillna('').astype(str).str.extract(AMOUNT_PATTERN)
+    values = pd.to_numeric(parts[0].str.replace(',', '', regex=False), errors='coerce')
+    return values * parts[1].map(AMOUNT_UNITS).fillna(1)
+
+
+def datetimes(series: pd.Series) -> pd.Series:
+    """
+    向量化解析一列日期时间文本（取文本中第一个完整日期）
+    
+    Args:
+        series: 日期时间文本列
+    
+    Returns:
+        datetime64列，无法识别的为NaT
+    """
+    parts = series.fillna('').astype(str).str.extract(DATETIME_PATTERN).apply(pd.to_numeric)
+    parts[["hour", "minute"]] = parts[["hour", "minute"]].fillna(0)
+    # 与 parse_datetime 一致：超出范围的时分视为无法识别，而不是由 to_datetime 进位到下一天/下一小时
+    complete = parts[["year", "month", "day"]].notna().all(axis=1) & (parts["hour"] < 24) & (parts["minute"] < 60)
+    result = pd.Series(pd.NaT, index=series.index, dtype='datetime64[ns]')
+    if complete.any():
+        result[complete] = pd.to_datetime(parts[complete], errors='coerce')
+    return result
+
+
+def normalize_records(records: List[Dict]) -> pd.DataFrame:
+    """
+    把一批记录转换为带类型列的DataFrame
+    
+    Args:
+        records: 抓取结果（英文字段名）
+    
+    Returns:
+        原字段加上 AMOUNT_FIELDS / DATETIME_FIELDS 中的类型列；缺少的原字段不生成对应类型列
+    """
+    frame = pd.DataFrame(records)
+    for field, column in AMOUNT_FIELDS.items():
+        if field in frame:
+            frame[column] = amounts(frame[field])
+    for field, column in DATETIME_FIELDS.items():
+        if field in frame:
+            frame[column] = datetimes(frame[field])
+    return frame
+
+
+def filter_by_budget(records: List[Dict], min_yuan: float = None, max_yuan: float = None) -> List[Dict]:
+    """
+    按预算金额筛选一批记录（预算未知的记录保留）
+    
+    Args:
+        records: 抓取结果
+        min_yuan: 最低预算（元），None表示不限
+        max_yuan: 最高预算（元），None表示不限
+    
+    Returns:
+        符合条件的记录（保持原顺序）
+    """
+    if not records or (min_yuan is None and max_yuan is None):
+        return records
+    budgets = amounts(pd.Series([record.get("project_budget", "") for record in records]))
+    keep = budgets.isna()
+    if min_yuan is not None and max_yuan is not None:
+        keep |= budgets.between(min_yuan, max_yuan)
+    elif min_yuan is not None:
+        keep |= budgets >= min_yuan
+    else:
+        keep |= budgets <= max_yuan
+    return [record for record, kept in zip(records, keep.tolist()) if kept]
+
+
+def iter_within_budget(records: Iterable[Dict], min_yuan: float = None,
+                       max_yuan: float = None) -> Iterator[Dict]:
+    """
+    按预算金额筛选记录流（逐条判断，规则与 filter_by_budget 一致）
+    
+    Args:
+        records: 记录迭代器
+        min_yuan: 最低预算（元），None表示不限
+        max_yuan: 最高预算（元），None表示不限
+    
+    Yields:
+        符合条件的记录
+    """
+    for record in records:
+        budget = parse_amount(record.get("project_budget", ""))
+        if budget is not None:
+            if min_yuan is not None and budget < min_yuan:
+                continue
+            if max_yuan is not None and budget > max_yuan:
+                continue
+        yield record
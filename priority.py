@@ -0,0 +1,202 @@
+# -*- coding: utf-8 -*-
+"""
+优先级模块 - 抓取预算与详情页的优先抓取顺序
+
+抓取有硬性时限（如定时任务只有5分钟）或请求配额时，按列表行数据给每条公告打分，
+先抓取得分最高的详情页；预算用尽后剩余公告只保留列表信息。
+"""
+
+import time
+import heapq
+import itertools
+import threading
+from datetime import datetime
+from typing import List, Dict, Optional, Callable, Union
+import logging
+
+from config import PRIORITY_CONFIG
+
+logger = logging.getLogger(__name__)
+
+
+class CrawlBudget:
+    """抓取预算：时间和/或请求次数（线程安全）"""
+    
+    def __init__(self, seconds: float = None, requests: int = None):
+        """
+        初始化预算
+        
+        Args:
+            seconds: 时间预算（秒），None表示不限
+            requests: 请求次数预算（含重试），None表示不限
+        """
+        self.seconds = seconds
+        self.requests = requests
+        self.requests_used = 0
+        self.deadline = None
+        self._lock = threading.Lock()
+    
+    def start(self):
+        """开始计时并清零请求计数（每次抓取开始时调用）"""
+        with self._lock:
+            self.requests_used = 0
+            self.deadline = time.monotonic() + self.seconds if self.seconds is not None else None
+    
+    def remaining_seconds(self) -> Optional[float]:
+        """剩余时间（秒），不限时为None"""
+        if self.deadline is None:
+            return None
+        return max(0.0, self.deadline - time.monotonic())
+    
+    @property
+    def exhausted(self) -> bool:
+        """预算是否已用尽"""
+        if self.deadline is not None and time.monotonic() >= self.deadline:
+            return True
+        return self.requests is not None and self.requests_used >= self.requests
+    
+    def try_spend(self) -> bool:
+        """
+        为一次请求扣减预算
+        
+        Returns:
+            是否还有预算发出这次请求
+        """
+        with self._lock:
+            if self.exhausted:
+                return False
+            self.requests_used += 1
+            return True
+    
+    def describe(self) -> str:
+        """预算描述，用于日志"""
+        parts = []
+        if self.seconds is not None:
+            parts.append(f"{self.seconds:.0f} 秒")
+        if self.requests is not None:
+            parts.append(f"{self.requests} 次请求")
+        return " / ".join(parts) or "不限"
+
+
+def _bigrams(text: str) -> set:
+    text = "".join(text.split())
+    return {text[i:i + 2] for i in range(len(text) - 1)} or ({text} if text else set())
+
+
+def match_keywords(title: str, keywords: List[str]) -> List[str]:
+    """
+    判断标题命中了哪些关键词（合并搜索时把返回的公告归属到各关键词）
+    
+    Args:
+        title: 公告标题
+        keywords: 同一次搜索的关键词
+    
+    Returns:
+        标题中完整出现的关键词；都未完整出现时取二元字组覆盖比例最高的关键词；
+        都没有重合时返回全部关键词（网站按分词或拼音命中，无法在本地区分）
+    """
+    title = title or ""
+    matched = [keyword for keyword in keywords if keyword and keyword in title]
+    if matched:
+        return matched
+    
+    title_bigrams = _bigrams(title)
+    coverage = {}
+    for keyword in keywords:
+        keyword_bigrams = _bigrams(keyword)
+        if keyword_bigrams:
+            coverage[keyword] = len(keyword_bigrams & title_bigrams) / len(keyword_bigrams)
+    best = max(coverage.values(), default=0)
+    if best == 0:
+        return list(keywords)
+    return [keyword for keyword in keywords if coverage.get(keyword) == best]
+
+
+class DetailPrioritizer:
+    """按列表行数据给公告打分，决定详情页的抓取顺序"""
+    
+    def __init__(self, keywords: Union[str, List[str]], cutoff_time: datetime, config: Dict = None,
+                 parse_date: Callable[[str], Optional[datetime]] = None):
+        """
+        初始化打分器
+        
+        Args:
+            keywords: 当前搜索关键词；合并搜索时为批次中的各关键词（标题按其中最相关的一个打分）
+            cutoff_time: 时间范围起点，发布时间越接近当前时间得分越高
+            config: 打分配置，默认取 PRIORITY_CONFIG
+            parse_date: 发布时间解析函数（通常为爬虫的 _parse_date）
+        """
+        self.config = config or PRIORITY_CONFIG
+        self.keywords = [keywords] if isinstance(keywords, str) else list(keywords)
+        # 分别计算各关键词的字组：合并成一个查询会混入跨关键词边界的字组，稀释相关度
+        self.keyword_bigrams = [(keyword, _bigrams(keyword)) for keyword in self.keywords]
+        self.cutoff_time = cutoff_time
+        self.parse_date = parse_date or (lambda value: None)
+    
+    def title_score(self, title: str) -> float:
+        """标题相关度：包含完整关键词为1，否则按关键词的二元字组覆盖比例计；多个关键词时取最高分"""
+        title_bigrams = None
+        best = 0.0
+        for keyword, keyword_bigrams in self.keyword_bigrams:
+            if not keyword_bigrams:
+                continue
+            if keyword in title:
+                return 1.0
+            if title_bigrams is None:
+                title_bigrams = _bigrams(title)
+            best = max(best, len(keyword_bigrams & title_bigrams) / len(keyword_bigrams))
+        return best
+    
+    def recency_score(self, publish_time: str) -> float:
+        """时效性：时间范围起点为0，当前时间为1，无法解析时为0.5"""
+        date = self.parse_date(publish_time)
+        if not date:
+            return 0.5
+        span = (datetime.now() - self.cutoff_time).total_seconds()
+        if span <= 0:
+            return 1.0
+        return min(1.0, max(0.0, (date - self.cutoff_time).total_seconds() / span))
+    
+    def region_score(self, region: str) -> float:
+        """地区：命中关注列表为1，否则为0（未配置关注列表时所有地区均为0）"""
+        allowlist = self.config["region_allowlist"]
+        return 1.0 if any(allowed in region for allowed in allowlist) else 0.0
+    
+    def type_score(self, announcement_type: str) -> float:
+        """公告类型得分"""
+        scores = self.config["type_scores"]
+        return scores.get(announcement_type, scores["default"])
+    
+    def score(self, item: Dict) -> float:
+        """
+        计算一条公告的综合得分
+        
+        Args:
+            item: 列表行（title/announcement_type/region/publish_time）
+        
+        Returns:
+            加权得分 (0-1)
+        """
+        weights = self.config["weights"]
+        return (
+            weights["title"] * self.title_score(item.get("title", ""))
+            + weights["recency"] * self.recency_score(item.get("publish_time", ""))
+            + weights["region"] * self.region_score(item.get("region", ""))
+            + weights["type"] * self.type_score(item.get("announcement_type", ""))
+        )
+    
+    def order(self, items: List[Dict]) -> List[Dict]:
+        """
+        按得分从高到低排列（得分相同保持原顺序）
+        
+        Args:
+            items: 待抓取详情的列表行
+        
+        Returns:
+            排序后的新列表
+        """
+        heap = []
+        counter = itertools.count()
+        for item in items:
+            heapq.heappush(heap, (-self.score(item), next(counter), item))
+        return [heapq.heappop(heap)[2] for _ in range(len(heap))]
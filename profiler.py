@@ -0,0 +1,197 @@
+# -*- coding: utf-8 -*-
+"""
+性能分析模块 - 分阶段耗时统计与运行报告
+"""
+
+import json
+import math
+import time
+import threading
+import unicodedata
+from collections import defaultdict, deque
+from contextlib import contextmanager
+from typing import List, Dict
+
+# 每个阶段保留的最近样本数（百分位数按这部分样本计算；次数、总计、最大值始终按全部样本统计）
+MAX_SAMPLES = 10000
+
+# 报告中阶段名一列的显示宽度
+STAGE_COLUMN_WIDTH = 24
+
+
+def percentile(sorted_values: List[float], pct: float) -> float:
+    """
+    计算百分位数（最近秩法）
+    
+    Args:
+        sorted_values: 已排序的样本
+        pct: 百分位 (0-100)
+    
+    Returns:
+        百分位数值，无样本时为0
+    """
+    if not sorted_values:
+        return 0.0
+    # 先乘后除并舍去浮点误差，避免 7% x 100 这类整数秩被向上取整到下一位
+    rank = max(1, math.ceil(round(pct * len(sorted_values) / 100, 9)))
+    return sorted_values[min(rank, len(sorted_values)) - 1]
+
+
+def _pad(text: str, width: int, right: bool = False) -> str:
+    """
+    按显示宽度补齐文本（中文等全角字符按两格计算）
+    
+    Args:
+        text: 文本
+        width: 显示宽度
+        right: 是否右对齐
+    
+    Returns:
+        补齐后的文本
+    """
+    display = sum(2 if unicodedata.east_asian_width(ch) in ('W', 'F') else 1 for ch in text)
+    padding = ' ' * max(0, width - display)
+    return padding + text if right else text + padding
+
+
+class StageProfiler:
+    """分阶段耗时统计（线程安全）"""
+    
+    def __init__(self):
+        self._samples: Dict[str, deque] = defaultdict(lambda: deque(maxlen=MAX_SAMPLES))
+        self._totals: Dict[str, List[float]] = defaultdict(lambda: [0, 0.0, 0.0])
+        self._bytes: Dict[str, int] = defaultdict(int)
+        self._counters: Dict[str, int] = defaultdict(int)
+        self._lock = threading.Lock()
+        self.started = time.perf_counter()
+    
+    def record(self, stage: str, seconds: float, nbytes: int = 0):
+        """
+        记录一次阶段耗时
+        
+        Args:
+            stage: 阶段名称，如 http.request、parse.detail_html
+            seconds: 耗时（秒）
+            nbytes: 处理的字节数（可选）
+        """
+        with self._lock:
+            self._samples[stage].append(seconds)
+            totals = self._totals[stage]
+            totals[0] += 1
+            totals[1] += seconds
+            totals[2] = max(totals[2], seconds)
+            if nbytes:
+                self._bytes[stage] += nbytes
+    
+    def count(self, name: str, n: int = 1):
+        """
+        计数器累加
+        
+        Args:
+            name: 计数器名称，如 http.status.200、http.retries
+            n: 增量
+        """
+        with self._lock:
+            self._counters[name] += n
+    
+    @contextmanager
+    def timer(self, stage: str):
+        """
+        计时上下文
+        
+        Args:
+            stage: 阶段名称
+        """
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(stage, time.perf_counter() - start)
+    
+    def summary(self) -> Dict:
+        """
+        生成统计汇总
+        
+        Returns:
+            包含总耗时、各阶段统计和计数器的字典
+        """
+        wall_time = time.perf_counter() - self.started
+        with self._lock:
+            samples = {stage: sorted(values) for stage, values in self._samples.items()}
+            totals = {stage: tuple(values) for stage, values in self._totals.items()}
+            nbytes = dict(self._bytes)
+            counters = dict(self._counters)
+        
+        stages = {}
+        for stage, values in sorted(samples.items()):
+            count, total, longest = totals[stage]
+            stages[stage] = {
+                "count": count,
+                "total": total,
+                "mean": total / count,
+                "p50": percentile(values, 50),
+                "p95": percentile(values, 95),
+                "p99": percentile(values, 99),
+                "max": longest,
+                # 吞吐量按整次运行的墙钟时间计算
+                "per_second": count / wall_time if wall_time > 0 else 0.0,
+            }
+            if stage in nbytes:
+                stages[stage]["bytes"] = nbytes[stage]
+                stages[stage]["bytes_per_second"] = nbytes[stage] / total if total > 0 else 0.0
+        
+        return {
+            "wall_time": wall_time,
+            "stages": stages,
+            "counters": dict(sorted(counters.items())),
+        }
+    
+    def format_report(self) -> str:
+        """
+        生成文本格式的运行报告
+        
+        Returns:
+            多行报告文本
+        """
+        summary = self.summary()
+        lines = [
+            f"性能报告 (总耗时 {summary['wall_time']:.2f} 秒)",
+            _pad('阶段', STAGE_COLUMN_WIDTH) + _pad('次数', 8, True) + _pad('总计(s)', 10, True)
+            + _pad('p50(ms)', 10, True) + _pad('p95(ms)', 10, True) + _pad('p99(ms)', 10, True)
+            + _pad('次/秒', 10, True),
+        ]
+        for stage, stats in summary["stages"].items():
+            lines.append(
+                f"{_pad(stage, STAGE_COLUMN_WIDTH)}{stats['count']:>8}{stats['total']:>10.3f}"
+                f"{stats['p50'] * 1000:>10.1f}{stats['p95'] * 1000:>10.1f}{stats['p99'] * 1000:>10.1f}"
+                f"{stats['per_second']:>10.2f}"
+            )
+            if "bytes" in stats:
+                lines.append(f"{'':<{STAGE_COLUMN_WIDTH}}字节 {stats['bytes']}，{stats['bytes_per_second'] / 1024:.1f} KB/s")
+        if summary["counters"]:
+            lines.append("计数: " + ", ".join(f"{name}={value}" for name, value in summary["counters"].items()))
+        return "\n".join(lines)
+    
+    def write_json(self, path: str):
+        """
+        以JSON格式保存报告
+        
+        Args:
+            path: 输出文件路径
+        """
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(self.summary(), f, ensure_ascii=False, indent=2)
+
+
+class NullProfiler:
+    """不做任何统计的占位实现，未开启性能分析时使用"""
+    
+    def record(self, stage: str, seconds: float, nbytes: int = 0):
+        pass
+    
+    def count(self, name: str, n: int = 1):
+        pass
+    
+    @contextmanager
+    def timer(self, stage: str):
+        yield
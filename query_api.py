@@ -0,0 +1,416 @@
+# -*- coding: utf-8 -*-
+"""
+本地查询服务 - 以只读HTTP接口提供公告库中已抓取的公告
+
+多人各自运行抓取会成倍增加对网站的请求，并且每次都要等待抓取完成。查询服务读取公告库
+（store.AnnouncementStore 的 announcements 表），可选地在后台按间隔抓取增量写入公告库；
+任意数量的使用者通过HTTP查询，不再访问网站。
+
+接口（GET）：
+- /api/announcements        JSON：{"total", "page", "page_size", "items"}
+- /api/announcements.csv    下载CSV（不分页，最多 max_export_rows 条）
+- /api/announcements.xlsx   下载Excel（同上）
+- /api/status               记录数、数据版本、后台抓取状态
+
+查询参数：keyword（标题或匹配关键词）、region、from / to（发布日期，YYYY-MM-DD，含）、
+min_budget / max_budget（如 500000、50万，预算未知的保留）、page、page_size
+
+响应带 ETag（数据版本 + 查询参数）；请求带 If-None-Match 且数据未变化时返回 304，
+客户端可以放心轮询。
+"""
+
+import os
+import sys
+import json
+import signal
+import hashlib
+import argparse
+import tempfile
+import threading
+from datetime import datetime, timedelta
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from urllib.parse import urlsplit, parse_qs, urlencode, quote
+from typing import List, Dict, Tuple, Optional
+import logging
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from store import AnnouncementStore
+from exporter import ExcelExporter
+from normalizer import parse_amount
+from config import QUERY_API_CONFIG, SEARCH_CONFIG, REQUEST_CONFIG, OUTPUT_CONFIG
+
+logger = logging.getLogger(__name__)
+
+# 后台抓取写入公告库时每批的记录数
+STORE_BATCH_SIZE = 200
+
+DOWNLOAD_TYPES = {
+    "csv": "text/csv; charset=utf-8",
+    "xlsx": "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+}
+
+
+class QueryError(ValueError):
+    """查询参数无效（返回400）"""
+
+
+def _single(query: Dict[str, List[str]], name: str) -> Optional[str]:
+    values = query.get(name)
+    if not values or not values[-1].strip():
+        return None
+    return values[-1].strip()
+
+
+def parse_filters(query: Dict[str, List[str]]) -> Dict:
+    """
+    解析筛选参数
+    
+    Args:
+        query: parse_qs 的结果
+    
+    Returns:
+        AnnouncementStore.query 的筛选参数
+    
+    Raises:
+        QueryError: 日期或金额无法识别
+    """
+    filters = {"keyword": _single(query, "keyword"), "region": _single(query, "region")}
+    
+    for name, key, days in (("from", "date_from", 0), ("to", "date_to", 1)):
+        value = _single(query, name)
+        if value is None:
+            continue
+        try:
+            # to 为含当天，转换为次日零点（不含）
+            filters[key] = datetime.strptime(value, '%Y-%m-%d') + timedelta(days=days)
+        except ValueError:
+            raise QueryError(f"无效的日期 {name}={value}（示例: 2025-01-01）")
+    
+    for name in ("min_budget", "max_budget"):
+        value = _single(query, name)
+        if value is None:
+            continue
+        amount = parse_amount(value)
+        if amount is None:
+            raise QueryError(f"无效的金额 {name}={value}（示例: 500000、50万）")
+        filters[name] = amount
+    
+    return filters
+
+
+def _positive_int(query: Dict[str, List[str]], name: str, default: int) -> int:
+    value = _single(query, name)
+    if value is None:
+        return default
+    try:
+        number = int(value)
+    except ValueError:
+        raise QueryError(f"{name} 必须是整数")
+    if number < 1:
+        raise QueryError(f"{name} 必须大于等于1")
+    return number
+
+
+class BackgroundCrawler:
+    """后台按间隔抓取增量，写入公告库"""
+    
+    def __init__(self, scraper, store: AnnouncementStore, interval: float = None, fetch_details: bool = True):
+        """
+        初始化后台抓取
+        
+        Args:
+            scraper: YfbzbScraper 实例（整个服务期间复用，每轮只抓取新出现的公告）
+            store: 公告库
+            interval: 抓取间隔（秒），默认取 QUERY_API_CONFIG["crawl_interval"]
+            fetch_details: 是否抓取详情页
+        """
+        self.scraper = scraper
+        self.store = store
+        self.interval = interval or QUERY_API_CONFIG["crawl_interval"]
+        self.fetch_details = fetch_details
+        
+        self.cycles = 0
+        self.running = False
+        self.last_started: Optional[str] = None
+        self.last_finished: Optional[str] = None
+        self.last_count = 0
+        self.last_error: Optional[str] = None
+        
+        self._shutdown = threading.Event()
+        self._thread = None
+    
+    def start(self):
+        """在后台线程中开始循环抓取"""
+        self._thread = threading.Thread(target=self._run, name="query-api-crawler", daemon=True)
+        self._thread.start()
+    
+    def stop(self, timeout: float = None):
+        """
+        停止抓取（中断进行中的请求）
+        
+        Args:
+            timeout: 最长等待秒数
+        """
+        self._shutdown.set()
+        self.scraper.stop()
+        if self._thread is not None:
+            self._thread.join(timeout)
+    
+    def status(self) -> Dict:
+        """抓取状态"""
+        return {
+            "running": self.running,
+            "cycles": self.cycles,
+            "interval": self.interval,
+            "last_started": self.last_started,
+            "last_finished": self.last_finished,
+            "last_count": self.last_count,
+            "last_error": self.last_error,
+        }
+    
+    def run_once(self) -> int:
+        """
+        抓取一轮并写入公告库
+        
+        Returns:
+            本轮写入的记录数
+        """
+        self.scraper.refresh_cutoff()
+        count = 0
+        batch = []
+        for record in self.scraper.iter_records(fetch_details=self.fetch_details, show_progress=False,
+                                                skip_seen=True):
+            batch.append(record)
+            if len(batch) >= STORE_BATCH_SIZE:
+                count += self.store.save_records(batch)
+                batch = []
+        if batch:
+            count += self.store.save_records(batch)
+        return count
+    
+    def _run(self):
+        while not self._shutdown.is_set():
+            self.cycles += 1
+            self.running = True
+            self.last_started = datetime.now().isoformat(timespec='seconds')
+            started = datetime.now()
+            try:
+                self.last_count = self.run_once()
+                self.last_error = None
+                logger.info(f"后台抓取第 {self.cycles} 轮完成，写入 {self.last_count} 条公告")
+            except Exception as e:
+                # 单轮失败不影响查询和后续轮次
+                self.last_error = str(e)
+                logger.error(f"后台抓取第 {self.cycles} 轮出错: {e}")
+            finally:
+                self.running = False
+                self.last_finished = datetime.now().isoformat(timespec='seconds')
+            elapsed = (datetime.now() - started).total_seconds()
+            self._shutdown.wait(max(0.0, self.interval - elapsed))
+        # 公告库连接属于抓取线程
+        self.store.close()
+
+
+class QueryService:
+    """公告查询（与HTTP无关，handle 返回状态码、响应头和响应体）"""
+    
+    def __init__(self, store: AnnouncementStore, crawler: BackgroundCrawler = None, config: Dict = None):
+        """
+        初始化查询服务
+        
+        Args:
+            store: 公告库
+            crawler: 后台抓取（可选），状态在 /api/status 中返回
+            config: 服务配置，默认取 QUERY_API_CONFIG
+        """
+        self.store = store
+        self.crawler = crawler
+        self.config = config or QUERY_API_CONFIG
+    
+    def _etag(self, path: str, query: Dict[str, List[str]]) -> str:
+        canonical = urlencode(sorted((name, values[-1]) for name, values in query.items()))
+        digest = hashlib.blake2b(f"{self.store.version()}|{path}|{canonical}".encode('utf-8'), digest_size=12)
+        return f'"{digest.hexdigest()}"'
+    
+    @staticmethod
+    def _json(status: int, data: Dict, headers: Dict = None) -> Tuple[int, Dict, bytes]:
+        body = json.dumps(data, ensure_ascii=False, default=str).encode('utf-8')
+        return status, dict(headers or {}, **{"Content-Type": "application/json; charset=utf-8"}), body
+    
+    def handle(self, path: str, query_string: str = "", if_none_match: str = None) -> Tuple[int, Dict, bytes]:
+        """
+        处理一个GET请求
+        
+        Args:
+            path: 请求路径
+            query_string: 查询字符串
+            if_none_match: If-None-Match 请求头
+        
+        Returns:
+            (状态码, 响应头, 响应体)
+        """
+        query = parse_qs(query_string)
+        try:
+            if path == "/api/status":
+                return self._json(200, self.status())
+            
+            download = None
+            if path.startswith("/api/announcements."):
+                download = path.rsplit(".", 1)[1]
+                if download not in DOWNLOAD_TYPES:
+                    return self._json(404, {"error": f"不支持的下载格式: {download}"})
+            elif path != "/api/announcements":
+                return self._json(404, {"error": "未知的接口"})
+            
+            filters = parse_filters(query)
+            etag = self._etag(path, query)
+            headers = {"ETag": etag, "Cache-Control": "no-cache"}
+            if if_none_match and (if_none_match.strip() == "*" or
+                                  etag in [tag.strip() for tag in if_none_match.split(",")]):
+                return 304, headers, b""
+            
+            if download:
+                return self._download(download, filters, headers)
+            
+            page = _positive_int(query, "page", 1)
+            page_size = min(_positive_int(query, "page_size", self.config["page_size"]),
+                            self.config["max_page_size"])
+            total, items = self.store.query(offset=(page - 1) * page_size, limit=page_size, **filters)
+            return self._json(200, {"total": total, "page": page, "page_size": page_size, "items": items}, headers)
+        except QueryError as e:
+            return self._json(400, {"error": str(e)})
+    
+    def _download(self, kind: str, filters: Dict, headers: Dict) -> Tuple[int, Dict, bytes]:
+        total, records = self.store.query(limit=self.config["max_export_rows"], **filters)
+        if not records:
+            return self._json(404, {"error": "没有符合条件的公告"})
+        
+        # 与命令行导出使用同一个导出器，导出到临时目录后读回
+        filename = f"{OUTPUT_CONFIG['file_prefix']}_{datetime.now().strftime(OUTPUT_CONFIG['datetime_format'])}.{kind}"
+        with tempfile.TemporaryDirectory() as directory:
+            exporter = ExcelExporter(output_dir=directory)
+            filepath = exporter.export_csv(records, filename) if kind == "csv" else exporter.export(records, filename)
+            with open(filepath, 'rb') as f:
+                body = f.read()
+        
+        headers = dict(headers, **{
+            "Content-Type": DOWNLOAD_TYPES[kind],
+            "Content-Disposition": f"attachment; filename*=UTF-8''{quote(filename)}",
+            "X-Total-Count": str(total),
+        })
+        if total > len(records):
+            headers["X-Truncated"] = "true"
+        return 200, headers, body
+    
+    def status(self) -> Dict:
+        """公告库和后台抓取的状态"""
+        total, _ = self.store.query(limit=0)
+        return {
+            "records": total,
+            "version": self.store.version(),
+            "crawler": self.crawler.status() if self.crawler else None,
+        }
+    
+    def start_http_server(self, port: int = None, host: str = None) -> ThreadingHTTPServer:
+        """
+        在后台线程启动HTTP服务
+        
+        Args:
+            port: 监听端口，默认取配置
+            host: 监听地址，默认取配置（只监听本机）
+        
+        Returns:
+            HTTP服务器实例（调用 shutdown() 停止）
+        """
+        service = self
+        
+        class QueryHandler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                url = urlsplit(self.path)
+                try:
+                    status, headers, body = service.handle(url.path, url.query, self.headers.get("If-None-Match"))
+                finally:
+                    # 每个请求在独立线程中处理，用完即关闭该线程的数据库连接
+                    service.store.close()
+                self.send_response(status)
+                for name, value in headers.items():
+                    self.send_header(name, value)
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+            
+            def log_message(self, format, *args):
+                logger.debug(f"query_api: {format % args}")
+        
+        host = host or self.config["listen_host"]
+        server = ThreadingHTTPServer((host, port if port is not None else self.config["port"]), QueryHandler)
+        thread = threading.Thread(target=server.serve_forever, name="query-api-http", daemon=True)
+        thread.start()
+        logger.info(f"查询服务已启动: http://{host}:{server.server_port}/api/announcements")
+        return server
+
+
+def main():
+    """启动查询服务"""
+    from main import setup_logging, parse_interval
+    
+    parser = argparse.ArgumentParser(
+        description='乙方宝招标公告 - 本地只读查询服务',
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog="""
+示例:
+  python query_api.py --store data/yfbzb.db                     # 只提供查询
+  python query_api.py --store data/yfbzb.db --crawl --interval 30m   # 同时在后台每30分钟抓取增量
+  curl 'http://127.0.0.1:8780/api/announcements?keyword=无纸化&region=北京&min_budget=50万'
+        """
+    )
+    parser.add_argument('--store', required=True, metavar='PATH', help='公告库（SQLite文件）')
+    parser.add_argument('--host', default=QUERY_API_CONFIG["listen_host"], help='监听地址（默认只监听本机）')
+    parser.add_argument('--port', type=int, default=QUERY_API_CONFIG["port"], help='监听端口')
+    parser.add_argument('--crawl', action='store_true', help='在后台按 --interval 抓取增量写入公告库')
+    parser.add_argument('--interval', type=parse_interval, default=QUERY_API_CONFIG["crawl_interval"],
+                        help='后台抓取间隔，如 30m、1h（默认1h）')
+    parser.add_argument('-k', '--keywords', nargs='+', default=SEARCH_CONFIG["keywords"], help='后台抓取的关键词')
+    parser.add_argument('-w', '--workers', type=int, default=REQUEST_CONFIG["max_workers"], help='详情页并发抓取数')
+    parser.add_argument('--no-details', action='store_true', help='后台抓取不抓取详情页')
+    args = parser.parse_args()
+    
+    setup_logging()
+    
+    store = AnnouncementStore(args.store)
+    # 后台抓取写入时不阻塞查询
+    store.use_wal()
+    
+    crawler = None
+    if args.crawl:
+        from scraper import YfbzbScraper
+        scraper = YfbzbScraper(keywords=args.keywords, max_workers=args.workers, store=store)
+        crawler = BackgroundCrawler(scraper, store, args.interval, fetch_details=not args.no_details)
+    
+    service = QueryService(store, crawler)
+    server = service.start_http_server(args.port, args.host)
+    if crawler:
+        crawler.start()
+    
+    shutdown = threading.Event()
+    
+    def handle_signal(signum, frame):
+        logger.info(f"收到信号 {signum}，停止服务...")
+        shutdown.set()
+    
+    signal.signal(signal.SIGTERM, handle_signal)
+    signal.signal(signal.SIGINT, handle_signal)
+    while not shutdown.wait(1):
+        pass
+    
+    if crawler:
+        crawler.stop(timeout=5)
+        crawler.scraper.transport.close()
+    server.shutdown()
+    store.close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
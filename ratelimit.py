@@ -0,0 +1,130 @@
+# -*- coding: utf-8 -*-
+"""
+限速模块 - 控制请求发出的节奏
+"""
+
+import time
+import threading
+from typing import Dict, Optional
+from urllib.parse import urlsplit
+
+
+class RateLimiter:
+    """
+    全局请求限速器（线程安全）
+    
+    保证任意两次请求的发出时间至少间隔 min_interval 秒，
+    多个线程共用同一个限速器时按到达顺序依次排队。
+    """
+    
+    def __init__(self, min_interval: float):
+        """
+        初始化限速器
+        
+        Args:
+            min_interval: 两次请求之间的最小间隔（秒），0表示不限速
+        """
+        self.min_interval = min_interval
+        self._next_slot = 0.0
+        self._lock = threading.Lock()
+    
+    def acquire(self, stop_event: threading.Event = None) -> bool:
+        """
+        等待下一个可用的请求时间点
+        
+        Args:
+            stop_event: 停止信号，置位时立即返回
+        
+        Returns:
+            是否可以发出请求（收到停止信号时为False）
+        """
+        if self.min_interval <= 0:
+            return not (stop_event and stop_event.is_set())
+        
+        with self._lock:
+            now = time.monotonic()
+            slot = max(now, self._next_slot)
+            self._next_slot = slot + self.min_interval
+        
+        wait = slot - now
+        if stop_event is not None:
+            return not stop_event.wait(wait) if wait > 0 else not stop_event.is_set()
+        if wait > 0:
+            time.sleep(wait)
+        return True
+    
+    def try_acquire(self, stop_event: threading.Event = None) -> Optional[float]:
+        """
+        不预占地等待下一个可用的请求时间点
+        
+        acquire 先占用时间点再等待，等待中放弃时该时间点已被占用，之后的请求都会推迟；
+        这里只在时间点到来时才占用，适合可能中途放弃的请求（如对冲请求）。
+        
+        Args:
+            stop_event: 放弃信号，置位时立即返回且不占用时间点
+        
+        Returns:
+            占用的时间点（可传给 refund 归还）；收到放弃信号时为None
+        """
+        while True:
+            if stop_event is not None and stop_event.is_set():
+                return None
+            with self._lock:
+                now = time.monotonic()
+                if now >= self._next_slot:
+                    self._next_slot = now + self.min_interval
+                    return now
+                wait = self._next_slot - now
+            if stop_event is not None:
+                stop_event.wait(wait)
+            else:
+                time.sleep(wait)
+    
+    def refund(self, slot: float):
+        """
+        归还 try_acquire 占用但最终没有发出请求的时间点（之后已有其他请求占用时不归还）
+        
+        Args:
+            slot: try_acquire 返回的时间点
+        """
+        with self._lock:
+            if self._next_slot == slot + self.min_interval:
+                self._next_slot = slot
+
+
+class HostRateLimiters:
+    """
+    按域名分组的限速器（线程安全）
+    
+    同一域名的请求共用一个 RateLimiter，不同域名各自限速、互不等待；
+    多个数据源同时抓取时，每个网站仍只承受其自身的请求间隔。
+    """
+    
+    def __init__(self, default_interval: float, intervals: Dict[str, float] = None):
+        """
+        初始化
+        
+        Args:
+            default_interval: 未单独设置的域名使用的请求间隔（秒）
+            intervals: 按域名设置的请求间隔 {域名: 秒}
+        """
+        self.default_interval = default_interval
+        self.intervals = dict(intervals or {})
+        self._limiters: Dict[str, RateLimiter] = {}
+        self._lock = threading.Lock()
+    
+    def for_url(self, url: str) -> RateLimiter:
+        """
+        获取链接所属域名的限速器
+        
+        Args:
+            url: 该网站的任一链接（通常为数据源的 base_url）
+        
+        Returns:
+            该域名共用的 RateLimiter
+        """
+        host = urlsplit(url).hostname or url
+        with self._lock:
+            if host not in self._limiters:
+                self._limiters[host] = RateLimiter(self.intervals.get(host, self.default_interval))
+            return self._limiters[host]
@@ -1,19 +1,28 @@
 # -*- coding: utf-8 -*-
 """
-爬虫模块 - 乙方宝招标公告抓取
+爬虫模块 - 招标公告抓取流程（网站相关的解析见 sources.py）
 """
 
-import re
 import time
+import threading
 import requests
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from datetime import datetime, timedelta
-from urllib.parse import urljoin, urlencode, quote
+from urllib.parse import urljoin, urlsplit
 from bs4 import BeautifulSoup
-from typing import List, Dict, Optional, Tuple
+from typing import List, Dict, Optional, Tuple, Iterator, Callable
 from tqdm import tqdm
 import logging
 
-from config import YFBZB_CONFIG, REQUEST_CONFIG, SEARCH_CONFIG
+from config import REQUEST_CONFIG, SEARCH_CONFIG, FIELD_MAPPING, CONCURRENCY_CONFIG
+from profiler import NullProfiler
+from metrics import NullMetrics
+from ratelimit import RateLimiter
+from priority import CrawlBudget, DetailPrioritizer, match_keywords
+from store import content_fingerprint
+from concurrency import AIMDConcurrency
+from transport import create_transport, HedgedTransport, TransportError, HTTPStatusError
+from sources import YfbzbAdapter
 
 # 配置日志
 logging.basicConfig(
@@ -24,34 +33,231 @@ logger = logging.getLogger(__name__)
 
 
 class YfbzbScraper:
-    """乙方宝招标公告爬虫"""
+    """
+    招标公告爬虫
     
-    def __init__(self, keywords: List[str] = None, time_range_hours: int = None):
+    请求、限速、重试、缓存、断点和去重等抓取流程与网站无关；搜索参数、列表行解析和
+    详情字段提取由数据源适配器（sources.SourceAdapter）提供，默认为乙方宝。
+    """
+    
+    # 等待进行中的请求时检查停止信号的间隔（秒）
+    CANCEL_POLL_INTERVAL = 0.2
+    
+    def __init__(self, keywords: List[str] = None, time_range_hours: int = None,
+                 profiler=None, metrics=None, max_workers: int = None,
+                 rate_limiter: RateLimiter = None, archive=None, budget: CrawlBudget = None,
+                 dedup=None, store=None, transport=None, shared_details=None, hedge: bool = False,
+                 adaptive: bool = False, keyword_batch_size: int = None, source=None):
         """
         初始化爬虫
         
         Args:
             keywords: 搜索关键词列表
             time_range_hours: 时间范围（小时）
+            profiler: 性能统计器（可选），见 profiler.StageProfiler
+            metrics: 运行指标（可选），见 metrics.CrawlMetrics
+            max_workers: 详情页并发抓取数，默认取 REQUEST_CONFIG["max_workers"]
+            rate_limiter: 请求限速器，默认按 request_delay 新建；多个爬虫可共用
+            archive: 响应存档（可选），见 archive.ResponseArchive；设置后录制每个成功的响应
+            budget: 抓取预算（可选），见 priority.CrawlBudget；设置后按优先级抓取详情，
+                    预算用尽时剩余公告只保留列表信息
+            dedup: 近似重复标题索引（可选），见 dedup.NearDuplicateIndex；设置后近似重复的公告
+                   不单独抓取详情，沿用代表公告的详情并标记 duplicate_of
+            store: 公告库（可选），见 store.AnnouncementStore；设置后详情页内容未变化时跳过提取，
+                   变化时记录字段变更，记录中增加 updated_at / updated_fields
+            transport: HTTP传输，见 transport.create_transport；默认按 REQUEST_CONFIG["transport"] 新建，
+                       多个爬虫并行时可共用（连接池需足够大）
+            shared_details: 多个爬虫共用的详情结果（可选），见 job.SharedDetails；
+                            同一详情链接只请求一次
+            hedge: 是否启用请求对冲，见 transport.HedgedTransport；耗时超过近期p95的请求
+                   再发出一个重复请求，取先完成的一个
+            adaptive: 是否自适应调整并发数，见 concurrency.AIMDConcurrency；以 max_workers 为初始上限，
+                      在 CONCURRENCY_CONFIG 的范围内随请求结果增减
+            keyword_batch_size: 每次搜索合并的关键词数，默认取 SEARCH_CONFIG["keyword_batch_size"]；
+                                大于1时几个关键词合并为一次搜索，返回的公告按标题归属到各关键词
+            source: 数据源适配器，见 sources.create_source；默认为乙方宝 (YfbzbAdapter)
         """
-        self.base_url = YFBZB_CONFIG["base_url"]
-        self.search_url = YFBZB_CONFIG["search_url"]
-        self.page_size = YFBZB_CONFIG["page_size"]
-        self.max_pages = YFBZB_CONFIG["max_pages"]
+        self.source = source or YfbzbAdapter()
+        self.base_url = self.source.base_url
+        self.search_url = self.source.search_url
+        self.page_size = self.source.page_size
+        self.max_pages = self.source.max_pages
         
         self.keywords = keywords or SEARCH_CONFIG["keywords"]
         self.time_range_hours = time_range_hours or SEARCH_CONFIG["time_range_hours"]
+        self.keyword_batch_size = max(1, keyword_batch_size or SEARCH_CONFIG["keyword_batch_size"])
         
         self.headers = REQUEST_CONFIG["headers"]
         self.timeout = REQUEST_CONFIG["timeout"]
         self.request_delay = REQUEST_CONFIG["request_delay"]
         self.max_retries = REQUEST_CONFIG["max_retries"]
+        self.max_workers = max_workers or REQUEST_CONFIG["max_workers"]
         
-        self.session = requests.Session()
-        self.session.headers.update(self.headers)
+        # 所有请求（含重试、并发的详情请求）共用一个限速器
+        self.rate_limiter = rate_limiter or RateLimiter(self.request_delay)
+        
+        self.transport = transport or create_transport(
+            headers=self.headers,
+            pool_maxsize=max(REQUEST_CONFIG["pool_maxsize"], self.max_workers,
+                             CONCURRENCY_CONFIG["max"] if adaptive else 0)
+        )
+        self.prewarm = REQUEST_CONFIG["prewarm"]
         
         # 计算时间范围
         self.cutoff_time = datetime.now() - timedelta(hours=self.time_range_hours)
+        # 时间范围终点（不含），仅回溯抓取时设置，见 set_window
+        self.window_end: Optional[datetime] = None
+        
+        # 列表是否因达到 max_pages 而未抓完；stop_when_truncated 时此后不再抓取详情
+        self.list_truncated = False
+        self.stop_when_truncated = False
+        
+        # 停止信号：置位后抓取循环和重试等待会尽快退出
+        self.stop_event = threading.Event()
+        
+        # 跨轮次状态（常驻模式下复用）：已产出记录的键 -> 首次产出时间，详情URL -> 详情字段
+        self.seen: Dict[str, datetime] = {}
+        self.detail_cache: Dict[str, Dict] = {}
+        
+        # 断点（可选），见 use_checkpoint
+        self.checkpoint = None
+        
+        self.archive = archive
+        self.budget = budget
+        self.dedup = dedup
+        self.store = store
+        self.shared_details = shared_details
+        
+        self.profiler = profiler or NullProfiler()
+        self.metrics = metrics or NullMetrics()
+        
+        # 自适应并发：详情线程池按上限的最大值创建，实际同时进行的请求数由控制器限制
+        self.concurrency = AIMDConcurrency(self.max_workers, metrics=self.metrics) if adaptive else None
+        
+        # 请求对冲（对冲请求同样经过限速器、预算和自适应并发）
+        if hedge:
+            self.transport = HedgedTransport(self.transport, self.rate_limiter, self.budget,
+                                             concurrency=self.concurrency)
+    
+    def set_window(self, start: datetime, end: datetime):
+        """
+        限定抓取的时间窗口（回溯抓取）：按日期检索，只保留发布时间在 [start, end) 内的公告
+        
+        Args:
+            start: 窗口起点
+            end: 窗口终点（不含）
+        """
+        self.cutoff_time = start
+        self.window_end = end
+    
+    def use_checkpoint(self, checkpoint, fetch_details: bool, resume: bool = False) -> bool:
+        """
+        启用断点：抓取过程中持续保存进度，中断后可从断点继续
+        
+        Args:
+            checkpoint: CrawlCheckpoint 实例
+            fetch_details: 是否抓取详情页（参与断点参数校验）
+            resume: 是否尝试从已有断点恢复
+        
+        Returns:
+            是否从已有断点恢复
+        """
+        params = {
+            "keywords": list(self.keywords),
+            "time_range_hours": self.time_range_hours,
+            "fetch_details": fetch_details,
+        }
+        if self.keyword_batch_size > 1:
+            # 断点按搜索批次记录进度，批次划分不同的断点不能沿用
+            params["keyword_batch_size"] = self.keyword_batch_size
+        resumed = resume and checkpoint.resume(params)
+        if resumed:
+            # 沿用断点的时间范围，保证前后两段抓取口径一致
+            self.cutoff_time = checkpoint.cutoff_time
+        else:
+            checkpoint.start(params, self.cutoff_time)
+        self.checkpoint = checkpoint
+        return resumed
+    
+    def stop(self):
+        """请求停止抓取"""
+        self.stop_event.set()
+    
+    @property
+    def stopped(self) -> bool:
+        """是否已请求停止"""
+        return self.stop_event.is_set()
+    
+    def _call_cancellable(self, func: Callable):
+        """
+        在后台线程中执行阻塞调用（如HTTP请求），收到停止请求时不再等待其完成
+        
+        被放弃的调用在后台线程中自行结束（最长为请求超时），结果被丢弃；
+        因此停止请求可在约 CANCEL_POLL_INTERVAL 秒内生效，而不必等待进行中的请求超时。
+        
+        Args:
+            func: 无参数的调用
+        
+        Returns:
+            func 的返回值；收到停止请求时为None
+        
+        Raises:
+            func 抛出的异常
+        """
+        outcome = {}
+        finished = threading.Event()
+        
+        def run():
+            try:
+                outcome["value"] = func()
+            except BaseException as e:
+                outcome["error"] = e
+            finally:
+                finished.set()
+        
+        threading.Thread(target=run, name="request", daemon=True).start()
+        while not finished.wait(self.CANCEL_POLL_INTERVAL):
+            if self.stopped:
+                return None
+        if "error" in outcome:
+            raise outcome["error"]
+        return outcome["value"]
+    
+    def _sleep(self, seconds: float):
+        """
+        等待指定时间，收到停止请求时提前返回
+        
+        Args:
+            seconds: 等待秒数
+        """
+        self.stop_event.wait(seconds)
+    
+    def refresh_cutoff(self):
+        """
+        按当前时间重新计算时间范围，并清理已超出范围的跨轮次状态
+        
+        常驻模式下每轮抓取前调用。发布时间只精确到日，额外保留一天余量。
+        """
+        now = datetime.now()
+        self.cutoff_time = now - timedelta(hours=self.time_range_hours)
+        
+        expire_before = self.cutoff_time - timedelta(days=1)
+        expired = [key for key, seen_at in self.seen.items() if seen_at < expire_before]
+        for key in expired:
+            del self.seen[key]
+            self.detail_cache.pop(key, None)
+        if expired:
+            logger.debug(f"清理过期记录 {len(expired)} 条")
+    
+    @staticmethod
+    def _record_key(item: Dict) -> str:
+        """记录去重键：优先使用详情链接"""
+        return item.get("detail_url") or f"{item.get('title', '')}|{item.get('publish_time', '')}"
+    
+    @staticmethod
+    def _request_url(url: str, params: dict = None) -> str:
+        """拼接完整请求URL（与requests实际发出的一致），作为存档的键"""
+        return requests.Request('GET', url, params=params).prepare().url
     
     def _make_request(self, url: str, params: dict = None) -> Optional[str]:
         """
@@ -60,7 +266,7 @@ class YfbzbScraper:
         Args:
             url: 请求URL
             params: 请求参数
-            
+        
         Returns:
             响应HTML内容
         """
@@ -69,71 +275,108 @@ class YfbzbScraper:
         headers.pop('Accept-Encoding', None)  # 让requests自动处理压缩
         
         for attempt in range(self.max_retries):
+            if self.stopped:
+                return None
+            if attempt > 0:
+                self.profiler.count("http.retries")
+                self.metrics.observe_retry()
+            
+            if self.budget and not self.budget.try_spend():
+                logger.debug(f"抓取预算已用尽，跳过请求: {url}")
+                return None
+            
+            if not self.rate_limiter.acquire(self.stop_event):
+                return None
+            
+            # 自适应并发：限速等待之后再占用名额（排队时间不计入进行中的请求），请求结束后按结果调整上限
+            slot = None
+            if self.concurrency:
+                slot = self.concurrency.acquire(self.stop_event)
+                if slot is None:
+                    return None
+            # (耗时, 是否拥塞, 原因)
+            outcome = (None, False, "")
+            
             try:
-                response = self.session.get(
-                    url,
-                    params=params,
-                    headers=headers,
-                    timeout=self.timeout
-                )
-                response.raise_for_status()
+                # 有时间预算时，单次请求不超过剩余时间
+                timeout = self.timeout
+                remaining = self.budget.remaining_seconds() if self.budget else None
+                if remaining is not None:
+                    timeout = max(1.0, min(timeout, remaining))
                 
-                # 自动检测编码
-                if response.encoding is None or response.encoding == 'ISO-8859-1':
-                    response.encoding = response.apparent_encoding or 'utf-8'
+                start = time.perf_counter()
                 
-                return response.text
-            except requests.RequestException as e:
-                logger.warning(f"请求失败 (尝试 {attempt + 1}/{self.max_retries}): {e}")
-                if attempt < self.max_retries - 1:
-                    time.sleep(self.request_delay * 2)
+                try:
+                    # 在后台线程中发出请求：停止时不必等待进行中的请求超时
+                    response = self._call_cancellable(
+                        lambda: self.transport.get(url, params=params, headers=headers, timeout=timeout)
+                    )
+                    if response is None:
+                        return None
+                    
+                    ttfb = response.ttfb
+                    if response.hedged:
+                        self.profiler.count("http.hedges")
+                        self.metrics.observe_hedge(response.hedge_won)
+                        if response.hedge_won:
+                            self.profiler.count("http.hedge_wins")
+                    self.profiler.count(f"http.status.{response.status_code}")
+                    if not response.ok:
+                        self.metrics.observe_request(response.status_code, ttfb)
+                        if response.status_code == 429 or response.status_code >= 500:
+                            outcome = (None, True, f"HTTP {response.status_code}")
+                    response.raise_for_status()
+                    
+                    content = response.content
+                    elapsed = response.elapsed
+                    outcome = (elapsed, False, "")
+                    self.profiler.record("http.ttfb", ttfb)
+                    self.profiler.record("http.download", elapsed - ttfb, len(content))
+                    self.profiler.record("http.request", elapsed)
+                    self.metrics.observe_request(response.status_code, elapsed)
+                    
+                    # 自动检测编码
+                    if response.encoding is None:
+                        response.encoding = response.apparent_encoding or 'utf-8'
+                    
+                    if self.archive:
+                        self.archive.record(
+                            self._request_url(url, params),
+                            response.status_code,
+                            response.encoding,
+                            content
+                        )
+                    
+                    return response.text
+                except TransportError as e:
+                    self.profiler.count("http.errors")
+                    # HTTP错误状态已按状态码记录过指标
+                    if not isinstance(e, HTTPStatusError):
+                        self.metrics.observe_request("error", time.perf_counter() - start)
+                        outcome = (None, True, "请求错误或超时")
+                    logger.warning(f"请求失败 (尝试 {attempt + 1}/{self.max_retries}): {e}")
+            finally:
+                if slot is not None:
+                    self.concurrency.release(slot, *outcome)
+            
+            if attempt < self.max_retries - 1:
+                self._sleep(self.request_delay * 2)
         
         logger.error(f"请求失败，已达最大重试次数: {url}")
         return None
     
     def _parse_date(self, date_str: str) -> Optional[datetime]:
         """
-        解析日期字符串
+        解析日期字符串（格式由数据源决定）
         
         Args:
             date_str: 日期字符串
-            
+        
         Returns:
             datetime对象
         """
-        if not date_str:
-            return None
-        
-        # 清理日期字符串
-        date_str = date_str.strip().replace('****', '').strip()
-        
-        # 常见日期格式
-        formats = [
-            "%Y/%m/%d",
-            "%Y-%m-%d",
-            "%Y年%m月%d日",
-            "%Y/%m/%d %H:%M:%S",
-            "%Y-%m-%d %H:%M:%S",
-            "%Y年%m月%d日 %H:%M:%S",
-            "%Y/%m/%d %H:%M",
-            "%Y-%m-%d %H:%M",
-        ]
-        
-        for fmt in formats:
-            try:
-                return datetime.strptime(date_str, fmt)
-            except ValueError:
-                continue
-        
-        # 尝试提取年月日
-        match = re.search(r'(\d{4})[/-年](\d{1,2})[/-月](\d{1,2})', date_str)
-        if match:
-            try:
-                return datetime(int(match.group(1)), int(match.group(2)), int(match.group(3)))
-            except ValueError:
-                pass
-        
-        return None
+        with self.profiler.timer("parse.date"):
+            return self.source.parse_date(date_str)
     
     def _is_within_time_range(self, date: Optional[datetime]) -> bool:
         """
@@ -141,7 +384,7 @@ class YfbzbScraper:
         
         Args:
             date: 日期对象
-            
+        
         Returns:
             是否在范围内
         """
@@ -149,6 +392,34 @@ class YfbzbScraper:
             return True  # 无法解析日期时，保留该记录
         return date >= self.cutoff_time
     
+    def keyword_batches(self) -> List[List[str]]:
+        """
+        按 keyword_batch_size 划分的搜索批次
+        
+        Returns:
+            关键词批次列表，每个批次对应一次搜索（断点中的关键词序号即批次序号）
+        """
+        size = self.keyword_batch_size
+        return [list(self.keywords[i:i + size]) for i in range(0, len(self.keywords), size)]
+    
+    @staticmethod
+    def batch_query(batch: List[str]) -> str:
+        """一个批次的搜索词"""
+        return SEARCH_CONFIG["keyword_batch_separator"].join(batch)
+    
+    @staticmethod
+    def attribute_keywords(rows: List[Dict], batch: List[str]):
+        """
+        按标题给列表行标记命中的关键词（matched_keywords，多个时以“、”分隔）
+        
+        Args:
+            rows: 一次搜索返回的列表行
+            batch: 该次搜索的关键词
+        """
+        for item in rows:
+            matched = match_keywords(item.get("title", ""), batch) if len(batch) > 1 else batch
+            item["matched_keywords"] = "、".join(matched)
+    
     def search_list(self, keyword: str, page: int = 1) -> Tuple[List[Dict], bool]:
         """
         搜索招标公告列表
@@ -156,284 +427,368 @@ class YfbzbScraper:
         Args:
             keyword: 搜索关键词
             page: 页码
-            
+        
         Returns:
             (公告列表, 是否还有更多)
         """
-        # 构建搜索URL - 使用正确的参数格式
-        params = {
-            "type": 0,
-            "defaultSearch": "false",
-            "keyword": keyword,  # 注意是小写的keyword
-            "pageNo": page,
-            "pageSize": self.page_size,
-            "noticeType": 3,
-            "invitedBidType": 3,
-            "timeType": 1,
-            "searchType": 2,
-            "searchMode": 1,
-        }
-        
-        html = self._make_request(self.search_url, params)
+        html = self._make_request(self.search_url, self._search_params(keyword, page))
         if not html:
-            logger.error("请求返回空内容")
+            if not self.stopped:
+                logger.error("请求返回空内容")
             return [], False
         
-        logger.debug(f"获取到HTML内容，长度: {len(html)}")
+        return self.parse_list(html)
+    
+    def _search_params(self, keyword: str, page: int) -> dict:
+        """构建搜索请求参数（见数据源的 search_params）"""
+        window = (self.cutoff_time, self.window_end) if self.window_end is not None else None
+        return self.source.search_params(keyword, page, batched=self.keyword_batch_size > 1, window=window)
+    
+    def parse_list(self, html: str) -> Tuple[List[Dict], bool]:
+        """
+        解析招标公告列表页
         
-        soup = BeautifulSoup(html, 'lxml')
-        results = []
-        has_more = False
-        
-        # 查找表格 - 使用id定位
-        table = soup.find('table', id='treeTable')
-        if not table:
-            # 回退到class查找
-            table = soup.find('table', class_='table-hover')
-        if not table:
-            # 再回退到普通查找
-            tables = soup.find_all('table')
-            logger.debug(f"页面中的表格数量: {len(tables)}")
-            if tables:
-                table = tables[0]
-        if not table:
-            logger.warning("未找到招标列表表格")
-            # 打印部分HTML帮助调试
-            logger.debug(f"HTML预览: {html[:1000]}")
-            return [], False
+        Args:
+            html: 列表页HTML
         
-        logger.debug(f"找到表格，id={table.get('id')}, class={table.get('class')}")
+        Returns:
+            (公告列表, 是否还有更多)
+        """
+        logger.debug(f"获取到HTML内容，长度: {len(html)}")
         
-        # 查找所有行（跳过表头）
-        rows = table.find_all('tr')[1:]  # 跳过表头行
+        start = time.perf_counter()
+        with self.profiler.timer("parse.list_html"):
+            soup = BeautifulSoup(html, 'lxml')
         
-        for row in rows:
-            cells = row.find_all('td')
-            if len(cells) >= 4:
-                try:
-                    # 提取标题和链接
-                    title_cell = cells[0]
-                    link_tag = title_cell.find('a')
-                    
-                    if link_tag:
-                        title = link_tag.get_text(strip=True)
-                        detail_url = link_tag.get('href', '')
-                        if detail_url and not detail_url.startswith('http'):
-                            detail_url = urljoin(self.base_url, detail_url)
-                    else:
-                        title = title_cell.get_text(strip=True)
-                        detail_url = ""
-                    
-                    # 提取其他字段
-                    announcement_type = cells[1].get_text(strip=True) if len(cells) > 1 else ""
-                    region = cells[2].get_text(strip=True) if len(cells) > 2 else ""
-                    publish_date = cells[3].get_text(strip=True) if len(cells) > 3 else ""
-                    
-                    # 解析并检查日期
-                    date_obj = self._parse_date(publish_date)
-                    if not self._is_within_time_range(date_obj):
-                        # 已超出时间范围，停止抓取
-                        logger.info(f"发现超出时间范围的公告: {publish_date}")
-                        return results, False
-                    
-                    results.append({
-                        "title": title,
-                        "announcement_type": announcement_type,
-                        "region": region,
-                        "publish_time": publish_date,
-                        "detail_url": detail_url,
-                    })
-                except Exception as e:
-                    logger.warning(f"解析列表行失败: {e}")
-                    continue
-        
-        # 检查是否有下一页
-        pagination = soup.find('ul', class_='pagination') or soup.find_all('a', string=re.compile(r'下一页'))
-        if pagination:
-            has_more = True
+        with self.profiler.timer("extract.list_rows"):
+            result = self._extract_list(soup, html)
+        self.metrics.observe_parse("list", time.perf_counter() - start)
+        return result
+    
+    def _extract_list(self, soup: BeautifulSoup, html: str) -> Tuple[List[Dict], bool]:
+        """从已解析的列表页中提取公告行（行解析见数据源的 extract_rows），遇到超出时间范围的公告时停止"""
+        rows, has_more = self.source.extract_rows(soup, html)
         
-        # 如果当前页有结果，可能还有更多
-        if len(rows) >= self.page_size:
-            has_more = True
+        results = []
+        for item in rows:
+            if item["detail_url"] and not item["detail_url"].startswith('http'):
+                item["detail_url"] = urljoin(self.base_url, item["detail_url"])
+            
+            # 解析并检查日期
+            date_obj = self._parse_date(item["publish_time"])
+            if date_obj and self.window_end is not None and date_obj >= self.window_end:
+                # 晚于回溯窗口的公告：跳过，继续向后查找
+                continue
+            if not self._is_within_time_range(date_obj):
+                # 已超出时间范围，停止抓取
+                logger.info(f"发现超出时间范围的公告: {item['publish_time']}")
+                return results, False
+            
+            item["source"] = self.source.label
+            results.append(item)
         
         return results, has_more
     
+    def _empty_details(self) -> Dict:
+        """详情字段的空白模板"""
+        return self.source.empty_details()
+    
     def get_detail(self, url: str) -> Dict:
         """
         获取招标公告详情
         
         Args:
             url: 详情页URL
-            
+        
         Returns:
             详情信息字典
         """
-        details = {
-            "publish_unit": "",
-            "project_budget": "",
-            "bid_file_time": "",
-            "registration_deadline": "",
-            "registration_fee": "",
-            "bid_bond": "",
-            "project_type": "",
-        }
-        
         html = self._make_request(url)
         if not html:
-            return details
+            return self._empty_details()
         
-        soup = BeautifulSoup(html, 'lxml')
+        return self.parse_detail(html, url)
+    
+    def parse_detail(self, html: str, url: str = None) -> Dict:
+        """
+        解析招标公告详情页
         
-        try:
-            # 查找详情内容区域
-            content = soup.find('div', class_='detail-content') or soup.find('div', class_='content')
-            if not content:
-                # 尝试查找包含公告内容的区域
-                content = soup
-            
-            text = content.get_text()
-            
-            # 提取发布单位/采购单位
-            patterns_unit = [
-                r'(?:采购单位|招标单位|发布单位|项目单位|采购人)[：:]\s*([^\n\r]+)',
-                r'企\s*业[：:]\s*([^\n\r]+)',
-            ]
-            for pattern in patterns_unit:
-                match = re.search(pattern, text)
-                if match:
-                    unit = match.group(1).strip()
-                    # 清理隐藏内容标记
-                    unit = re.sub(r'\*+|点击登录查看', '', unit).strip()
-                    if unit and unit != '':
-                        details["publish_unit"] = unit
-                        break
-            
-            # 提取项目预算
-            patterns_budget = [
-                r'(?:项目预算|预算金额|采购预算|预算)[：:]\s*([\d,.]+)\s*(?:万)?元',
-                r'(?:总投资|投资额|合同金额)[：:]\s*([\d,.]+)\s*(?:万)?元',
-            ]
-            for pattern in patterns_budget:
-                match = re.search(pattern, text)
-                if match:
-                    details["project_budget"] = match.group(1) + "元"
-                    break
-            
-            # 提取招标文件获取时间
-            patterns_file_time = [
-                r'(?:采购文件|招标文件)(?:.*?)(?:获取|下载)(?:.*?)(?:时间|日期)[：:]\s*([^\n\r]+)',
-                r'(?:文件获取时间|获取招标文件时间)[：:]\s*([^\n\r]+)',
-                r'获取时间[：:]\s*([^\n\r]+)',
-            ]
-            for pattern in patterns_file_time:
-                match = re.search(pattern, text)
-                if match:
-                    file_time = match.group(1).strip()
-                    file_time = re.sub(r'\*+', '', file_time).strip()
-                    if file_time:
-                        details["bid_file_time"] = file_time[:100]  # 限制长度
-                        break
-            
-            # 提取报名截止时间/报价截止时间
-            patterns_deadline = [
-                r'(?:报名截止|投标截止|报价截止)(?:时间|日期)?[：:]\s*([^\n\r]+)',
-                r'(?:截止时间|截止日期)[：:]\s*([^\n\r]+)',
-                r'报名.*?(?:至|到)\s*(\d{4}[/-年]\d{1,2}[/-月]\d{1,2}[日]?\s*\d{1,2}[：:]\d{1,2})',
-            ]
-            for pattern in patterns_deadline:
-                match = re.search(pattern, text)
-                if match:
-                    deadline = match.group(1).strip()
-                    deadline = re.sub(r'\*+', '', deadline).strip()
-                    if deadline:
-                        details["registration_deadline"] = deadline[:100]
-                        break
-            
-            # 提取报名费用/标书费
-            patterns_fee = [
-                r'(?:报名费|标书费|招标文件费|资料费)[：:]\s*([\d,.]+)\s*元?',
-                r'(?:报名费|标书费)[：:]\s*(?:人民币)?\s*([\d,.]+)',
-            ]
-            for pattern in patterns_fee:
-                match = re.search(pattern, text)
-                if match:
-                    fee = match.group(1).strip()
-                    if fee and fee != '0':
-                        details["registration_fee"] = fee + "元"
-                    else:
-                        details["registration_fee"] = "0元/免费"
-                    break
-            
-            # 提取投标保证金
-            patterns_bond = [
-                r'(?:投标保证金|保证金金额|保证金)[：:]\s*([\d,.]+)(?:\s*元)?',
-                r'保证金[：:]\s*(?:人民币)?\s*([\d,.]+)',
-            ]
-            for pattern in patterns_bond:
-                match = re.search(pattern, text)
-                if match:
-                    bond = match.group(1).strip()
-                    if bond and float(bond.replace(',', '')) > 0:
-                        details["bid_bond"] = bond + "元"
-                    break
-            
-            # 提取项目类型
-            patterns_type = [
-                r'(?:项目类型|采购类型|招标类型)[：:]\s*([^\n\r]+)',
-                r'(?:采购方式|招标方式)[：:]\s*([^\n\r]+)',
-            ]
-            for pattern in patterns_type:
-                match = re.search(pattern, text)
-                if match:
-                    project_type = match.group(1).strip()
-                    project_type = re.sub(r'\*+', '', project_type).strip()
-                    if project_type:
-                        details["project_type"] = project_type[:50]
-                        break
+        设置了公告库且给出 url 时，先比较内容区域指纹：未变化则直接沿用库中的字段，
+        变化则重新提取并记录字段变更。
         
-        except Exception as e:
-            logger.warning(f"解析详情页失败: {e}")
+        Args:
+            html: 详情页HTML
+            url: 详情页URL（用于查询公告库）
         
+        Returns:
+            详情信息字典
+        """
+        start = time.perf_counter()
+        with self.profiler.timer("parse.detail_html"):
+            soup = BeautifulSoup(html, 'lxml')
+        
+        text = fingerprint = None
+        if self.store is not None and url:
+            with self.profiler.timer("extract.fingerprint"):
+                text = self._content_text(soup)
+                fingerprint = f"{self.source.DETAIL_RULES_VERSION}:{content_fingerprint(text)}"
+                known = self.store.lookup(url)
+            if known and known["fingerprint"] == fingerprint:
+                self.store.touch(url)
+                details = dict(self._empty_details(), **known["fields"])
+                details.update(self._update_flags(known["updated_at"], known["updated_fields"]))
+                self.metrics.observe_parse("detail", time.perf_counter() - start)
+                return details
+        
+        with self.profiler.timer("extract.detail"):
+            details = self._extract_detail(soup, text)
+        
+        # 未提取到任何字段（如需要登录）时不入库，避免把空白当作一次更新
+        if fingerprint is not None and any(details.values()):
+            rules_changed = known is not None and not known["fingerprint"].startswith(f"{self.source.DETAIL_RULES_VERSION}:")
+            changed = self.store.save(url, fingerprint, details, track_changes=not rules_changed)
+            if changed:
+                flags = self._update_flags(datetime.now().isoformat(timespec='seconds'), changed)
+                logger.info(f"公告内容有更新: {url} ({flags['updated_fields']})")
+            elif known:
+                flags = self._update_flags(known["updated_at"], known["updated_fields"])
+            else:
+                flags = self._update_flags("", [])
+            details.update(flags)
+        self.metrics.observe_parse("detail", time.perf_counter() - start)
         return details
     
-    def scrape(self, fetch_details: bool = True, show_progress: bool = True) -> List[Dict]:
+    @staticmethod
+    def _update_flags(updated_at: str, fields: List[str]) -> Dict:
+        """公告库的更新标记字段：最近一次更新时间和更新的字段（中文名）"""
+        return {
+            "updated_at": updated_at.replace('T', ' '),
+            "updated_fields": "、".join(FIELD_MAPPING.get(name, name) for name in fields),
+        }
+    
+    def _content_text(self, soup: BeautifulSoup) -> str:
+        """详情内容区域的文本（见数据源的 content_text）"""
+        return self.source.content_text(soup)
+    
+    def _extract_detail(self, soup: BeautifulSoup, text: str = None) -> Dict:
         """
-        执行抓取任务
+        从已解析的详情页中提取各字段（规则见数据源的 extract_detail）
         
         Args:
-            fetch_details: 是否抓取详情页
-            show_progress: 是否显示进度条
-            
+            soup: 已解析的详情页
+            text: 已取得的内容区域文本（可选，省去重复查找）
+        """
+        if text is None:
+            text = self._content_text(soup)
+        return self.source.extract_detail(text)
+    
+    def _get_detail_within_budget(self, url: str) -> Optional[Dict]:
+        """
+        在预算内抓取详情页
+        
         Returns:
-            抓取结果列表
+            详情字段；预算已用尽而未能抓取时为None
+        """
+        if self.budget and self.budget.exhausted:
+            return None
+        if self.shared_details is not None:
+            details = self.shared_details.fetch(url, self.get_detail, self.stop_event)
+            if details is None:
+                return None
+        else:
+            details = self.get_detail(url)
+        if self.budget and self.budget.exhausted and not any(details.values()):
+            return None
+        return details
+    
+    def _fetch_details(self, items: List[Dict]) -> Iterator[Tuple[Dict, Optional[Dict]]]:
+        """
+        抓取一批详情页
+        
+        max_workers 大于1（或启用自适应并发）时并发抓取并按完成顺序产出；同一详情链接只请求一次。
+        请求节奏由共用的限速器控制，请求按 items 的顺序发出。
+        
+        Args:
+            items: 需要抓取详情的列表记录
+        
+        Yields:
+            (列表记录, 详情字段)，预算用尽未抓取的详情字段为None
+        """
+        workers = self.concurrency.max_limit if self.concurrency else self.max_workers
+        if workers <= 1:
+            for item in items:
+                yield item, self._get_detail_within_budget(item["detail_url"])
+            return
+        
+        by_url: Dict[str, List[Dict]] = {}
+        for item in items:
+            by_url.setdefault(item["detail_url"], []).append(item)
+        
+        executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="detail")
+        futures = {executor.submit(self._get_detail_within_budget, url): url for url in by_url}
+        try:
+            for future in as_completed(futures):
+                details = future.result()
+                for item in by_url[futures[future]]:
+                    yield item, dict(details) if details is not None else None
+        finally:
+            # 提前结束（停止或消费方不再读取）时取消尚未开始的请求
+            # （逐个取消而非 cancel_futures=True，兼容 Python 3.8）
+            for future in futures:
+                future.cancel()
+            executor.shutdown(wait=False)
+    
+    def _representative_details(self, url: str) -> Optional[Dict]:
+        """
+        近似重复公告的代表公告的详情：本轮缓存，其次公告库
+        
+        Args:
+            url: 代表公告的详情链接
+        
+        Returns:
+            详情字段；都没有（或字段全空）时为None
+        """
+        details = self.detail_cache.get(url)
+        if not details and self.store is not None:
+            known = self.store.lookup(url)
+            if known is not None:
+                details = dict(self._empty_details(), **known["fields"])
+        return details if details and any(details.values()) else None
+    
+    def _finish_record(self, keyword_index: int, item: Dict):
+        """
+        登记一条已完成的记录（去重状态和断点）
+        
+        Args:
+            keyword_index: 关键词序号
+            item: 完整记录
         """
-        all_results = []
+        self.seen[self._record_key(item)] = datetime.now()
+        self.metrics.record_scraped()
+        if self.checkpoint:
+            self.checkpoint.record_done(keyword_index, item)
+    
+    def _on_stopped(self):
+        """响应停止请求：保存断点"""
+        logger.info("抓取已停止")
+        if self.checkpoint:
+            self.checkpoint.save()
+            logger.info(f"进度已保存到断点: {self.checkpoint.path}")
+    
+    def iter_records(self, fetch_details: bool = True, show_progress: bool = True,
+                     skip_seen: bool = False,
+                     progress_callback: Callable[[str, int, int], None] = None) -> Iterator[Dict]:
+        """
+        逐条产出抓取结果（记录流）
+        
+        每条公告在其数据完整后立即产出：不抓取详情时为列表行解析完成后，
+        抓取详情时为该条详情抓取完成后。调用方可以边抓取边消费。
+        启用断点时，从断点恢复的记录会先被重新产出，保证结果完整。
+        
+        Args:
+            fetch_details: 是否抓取详情页
+            show_progress: 是否显示进度条
+            skip_seen: 是否跳过本实例已产出过的公告（常驻模式只抓增量）
+            progress_callback: 进度回调 (阶段 'list'/'detail', 已完成数, 总数)
         
-        for keyword in self.keywords:
+        Yields:
+            单条公告记录
+        """
+        checkpoint = self.checkpoint
+        self.list_truncated = False
+        if self.budget:
+            self.budget.start()
+            logger.info(f"抓取预算: {self.budget.describe()}")
+        if self.prewarm:
+            # 按详情并发数预先建立连接，第一批请求不再承担DNS解析和TLS握手
+            with self.profiler.timer("http.prewarm"):
+                self.transport.prewarm(self.base_url, self.max_workers if fetch_details else 1)
+        
+        for index, batch in enumerate(self.keyword_batches()):
+            keyword = self.batch_query(batch)
+            if self.stopped:
+                self._on_stopped()
+                return
+            
+            # 断点中已完成的关键词：直接产出保存的记录
+            if checkpoint and index < checkpoint.keyword_index:
+                logger.info(f"关键词 '{keyword}' 已在断点中完成，跳过抓取")
+                yield from checkpoint.records_for(index)
+                continue
+            
             logger.info(f"开始搜索关键词: {keyword}")
             logger.info(f"时间范围: 最近 {self.time_range_hours} 小时")
             
             page = 1
             keyword_results = []
+            list_done = False
+            done = {}
             
-            while page <= self.max_pages:
+            # 断点中未完成的关键词：恢复列表行、页码和已完成的详情
+            if checkpoint and index == checkpoint.keyword_index:
+                keyword_results = list(checkpoint.rows)
+                page = checkpoint.pages_done + 1
+                list_done = checkpoint.list_done
+                done = {self._record_key(record): record for record in checkpoint.records_for(index)}
+                if keyword_results:
+                    logger.info(f"从断点恢复: 已完成 {checkpoint.pages_done} 页, {len(done)} 条记录")
+                if not fetch_details:
+                    yield from checkpoint.records_for(index)
+            
+            while not list_done and page <= self.max_pages and not self.stopped:
+                if self.budget and self.budget.exhausted:
+                    logger.info("抓取预算已用尽，停止翻页")
+                    break
+                
                 logger.info(f"正在抓取第 {page} 页...")
                 
                 results, has_more = self.search_list(keyword, page)
+                self.attribute_keywords(results, batch)
                 
                 if not results:
                     logger.info("当前页无结果，停止抓取")
                     break
                 
+                if skip_seen:
+                    new_results = [item for item in results if self._record_key(item) not in self.seen]
+                    if not new_results:
+                        # 列表按发布时间倒序，整页都已抓过说明后面也都是旧公告
+                        logger.info("本页公告均已抓取过，停止翻页")
+                        break
+                    results = new_results
+                
                 keyword_results.extend(results)
                 logger.info(f"本页获取 {len(results)} 条公告")
                 
+                if checkpoint:
+                    checkpoint.page_done(page, keyword_results)
+                if progress_callback:
+                    progress_callback('list', page, self.max_pages)
+                
+                # 不抓取详情时，列表行即为完整记录
+                if not fetch_details:
+                    for item in results:
+                        self._finish_record(index, item)
+                        yield item
+                
                 if not has_more:
                     logger.info("已到达最后一页或超出时间范围")
                     break
                 
                 page += 1
-                time.sleep(self.request_delay)
+            
+            if self.stopped:
+                self._on_stopped()
+                return
+            
+            if not list_done and page > self.max_pages:
+                self.list_truncated = True
+                logger.warning(f"已达到最大页数 {self.max_pages}，之后的公告未抓取")
+                if self.stop_when_truncated:
+                    return
+            
+            if checkpoint and not list_done:
+                checkpoint.list_finished()
             
             logger.info(f"关键词 '{keyword}' 共获取 {len(keyword_results)} 条公告")
             
@@ -441,15 +796,187 @@ class YfbzbScraper:
             if fetch_details and keyword_results:
                 logger.info("开始抓取公告详情...")
                 
-                iterator = tqdm(keyword_results, desc="抓取详情") if show_progress else keyword_results
+                total = len(keyword_results)
+                completed = 0
+                progress_bar = tqdm(total=total, desc="抓取详情") if show_progress else None
+                
+                def advance():
+                    nonlocal completed
+                    completed += 1
+                    if progress_bar:
+                        progress_bar.update(1)
+                    if progress_callback:
+                        progress_callback('detail', completed, total)
                 
-                for item in iterator:
-                    if item.get("detail_url"):
-                        details = self.get_detail(item["detail_url"])
+                try:
+                    # 无需请求的记录（断点已完成、缓存命中、无详情链接）直接产出
+                    to_fetch = []
+                    duplicates = []
+                    for item in keyword_results:
+                        key = self._record_key(item)
+                        url = item.get("detail_url")
+                        if key in done:
+                            # 断点中已完成
+                            item.update(done[key])
+                            self.metrics.cache_hit("checkpoint")
+                        elif url in self.detail_cache:
+                            item.update(self.detail_cache[url])
+                            self.metrics.cache_hit("detail")
+                            self._finish_record(index, item)
+                        elif url:
+                            representative = self.dedup.check(url, item.get("title", "")) if self.dedup is not None else None
+                            if representative:
+                                item["duplicate_of"] = representative["key"]
+                                duplicates.append(item)
+                            else:
+                                to_fetch.append(item)
+                            continue
+                        else:
+                            self._finish_record(index, item)
+                        advance()
+                        yield item
+                    
+                    if self.budget:
+                        # 有预算限制时，先抓取得分最高的详情
+                        prioritizer = DetailPrioritizer(batch, self.cutoff_time, parse_date=self._parse_date)
+                        to_fetch = prioritizer.order(to_fetch)
+                    
+                    list_only = 0
+                    
+                    def fetched(items):
+                        nonlocal list_only
+                        for item, details in self._fetch_details(items):
+                            if self.stopped:
+                                # 请求被中断，不产出不完整的记录
+                                return
+                            if details is None:
+                                # 预算用尽：只产出列表信息，不登记为已完成，下次抓取时仍会补抓详情
+                                item.update(self._empty_details())
+                                list_only += 1
+                                self.metrics.record_scraped()
+                            elif any(details.values()):
+                                self.detail_cache[item["detail_url"]] = details
+                                item.update(details)
+                                self._finish_record(index, item)
+                            else:
+                                # 请求或提取失败：不缓存、不登记为已完成，下一轮重试
+                                item.update(details)
+                                self.metrics.record_scraped()
+                            advance()
+                            yield item
+                    
+                    yield from fetched(to_fetch)
+                    if self.stopped:
+                        self._on_stopped()
+                        return
+                    
+                    # 近似重复的公告放在最后，沿用代表公告（本轮或之前抓到的）的详情；
+                    # 代表公告的详情不可用时（之前运行登记的代表、代表公告抓取失败或预算用尽）单独抓取
+                    fallback = []
+                    for item in duplicates:
+                        details = self._representative_details(item["duplicate_of"])
+                        if details is None:
+                            fallback.append(item)
+                            continue
                         item.update(details)
-                        time.sleep(self.request_delay)
+                        self.metrics.cache_hit("duplicate")
+                        self._finish_record(index, item)
+                        advance()
+                        yield item
+                    
+                    yield from fetched(fallback)
+                finally:
+                    if progress_bar:
+                        progress_bar.close()
+                
+                if list_only:
+                    logger.info(f"抓取预算已用尽，{list_only} 条公告只有列表信息")
+                if duplicates:
+                    reused = len(duplicates) - len(fallback)
+                    logger.info(f"{len(duplicates)} 条公告与已有公告近似重复，{reused} 条沿用代表公告的详情"
+                                + (f"，{len(fallback)} 条代表公告详情不可用，已单独抓取" if fallback else ""))
+                
+                if self.stopped:
+                    self._on_stopped()
+                    return
             
-            all_results.extend(keyword_results)
+            if checkpoint:
+                checkpoint.keyword_done(index)
+        
+        if self.stopped:
+            return
+        
+        if isinstance(self.transport, HedgedTransport):
+            logger.info(self.transport.describe())
+        if self.concurrency:
+            logger.info(self.concurrency.describe())
+        self.metrics.crawl_succeeded()
+        if checkpoint:
+            checkpoint.clear()
+            logger.info("抓取完成，已清除断点")
+    
+    def iter_archived_records(self, archive, fetch_details: bool = True) -> Iterator[Dict]:
+        """
+        从响应存档回放：离线重新解析，不发出任何网络请求
+        
+        按录制顺序解析存档中的全部列表页，每页按其抓取时间重新计算时间范围，
+        与当时的过滤结果一致；详情字段取该链接最近一次存档的详情页。
+        同一公告出现在多个列表页（如常驻模式的多轮抓取）时只产出一次。
+        
+        Args:
+            archive: ResponseArchive 实例
+            fetch_details: 是否解析详情页
+        
+        Yields:
+            单条公告记录
+        """
+        latest = archive.latest()
+        search_path = urlsplit(self.search_url).path
+        produced = set()
+        
+        for entry in archive.entries():
+            if self.stopped:
+                logger.info("回放已停止")
+                return
+            if urlsplit(entry["url"]).path != search_path:
+                continue
+            
+            response = archive.read(entry)
+            self.cutoff_time = response.fetched_at - timedelta(hours=self.time_range_hours)
+            rows, _ = self.parse_list(response.text)
+            
+            for item in rows:
+                key = self._record_key(item)
+                if key in produced:
+                    continue
+                produced.add(key)
+                
+                if fetch_details:
+                    details = self._empty_details()
+                    detail_entry = latest.get(self._request_url(item["detail_url"])) if item["detail_url"] else None
+                    if detail_entry:
+                        details = self.parse_detail(archive.read(detail_entry).text)
+                    else:
+                        logger.debug(f"存档中没有详情页: {item['detail_url']}")
+                    item.update(details)
+                
+                self.metrics.record_scraped()
+                yield item
+        
+        logger.info(f"回放完成，共解析 {len(produced)} 条公告")
+    
+    def scrape(self, fetch_details: bool = True, show_progress: bool = True) -> List[Dict]:
+        """
+        执行抓取任务
+        
+        Args:
+            fetch_details: 是否抓取详情页
+            show_progress: 是否显示进度条
+        
+        Returns:
+            抓取结果列表
+        """
+        all_results = list(self.iter_records(fetch_details=fetch_details, show_progress=show_progress))
         
         logger.info(f"抓取完成，共获取 {len(all_results)} 条公告")
         return all_results
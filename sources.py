@@ -0,0 +1,397 @@
+# -*- coding: utf-8 -*-
+"""
+数据源模块 - 各招标网站的适配器
+
+每个网站一个 SourceAdapter：搜索参数、列表行解析、详情字段提取等网站相关的规则；
+请求、限速、重试、缓存、断点、去重和导出由爬虫（scraper.YfbzbScraper）统一处理。
+新增网站时实现一个适配器并登记到 SOURCES，即可用 --sources 与其他网站同时抓取。
+"""
+
+import re
+from datetime import datetime, timedelta
+from typing import List, Dict, Optional, Tuple
+from bs4 import BeautifulSoup
+import logging
+
+from config import YFBZB_CONFIG, SEARCH_CONFIG, BACKFILL_CONFIG
+
+logger = logging.getLogger(__name__)
+
+
+class SourceAdapter:
+    """数据源适配器基类"""
+    
+    # 数据源标识（--sources 参数）和显示名称（记录的 source 字段）
+    name = ""
+    label = ""
+    
+    # 详情字段提取规则的版本：规则变化时递增，公告库中按旧规则提取的字段会被重新提取（不记为内容更新）
+    DETAIL_RULES_VERSION = 1
+    
+    def __init__(self, config: Dict):
+        """
+        初始化数据源
+        
+        Args:
+            config: 网站配置，包含 base_url / search_url / page_size / max_pages
+        """
+        self.base_url = config["base_url"]
+        self.search_url = config["search_url"]
+        self.page_size = config["page_size"]
+        self.max_pages = config["max_pages"]
+    
+    def search_params(self, keyword: str, page: int, batched: bool = False,
+                      window: Tuple[datetime, datetime] = None) -> dict:
+        """
+        构建搜索请求参数
+        
+        Args:
+            keyword: 搜索词（合并搜索时为几个关键词）
+            page: 页码
+            batched: 是否为合并搜索
+            window: 回溯抓取的时间窗口 (起点, 终点不含)
+        
+        Returns:
+            请求参数
+        """
+        raise NotImplementedError
+    
+    def extract_rows(self, soup: BeautifulSoup, html: str) -> Tuple[List[Dict], bool]:
+        """
+        从已解析的列表页中提取公告行
+        
+        每行包含 title / announcement_type / region / publish_time / detail_url；
+        时间范围的判断由爬虫完成。
+        
+        Returns:
+            (公告行, 是否还有更多)
+        """
+        raise NotImplementedError
+    
+    def parse_date(self, date_str: str) -> Optional[datetime]:
+        """解析列表行的发布时间，无法识别时为None"""
+        raise NotImplementedError
+    
+    @staticmethod
+    def empty_details() -> Dict:
+        """详情字段的空白模板"""
+        return {
+            "publish_unit": "",
+            "project_budget": "",
+            "bid_file_time": "",
+            "registration_deadline": "",
+            "registration_fee": "",
+            "bid_bond": "",
+            "project_type": "",
+        }
+    
+    def content_text(self, soup: BeautifulSoup) -> str:
+        """详情内容区域的文本（用于提取字段和计算内容指纹）"""
+        return soup.get_text()
+    
+    def extract_detail(self, text: str) -> Dict:
+        """从详情内容文本中提取字段（键同 empty_details）"""
+        raise NotImplementedError
+
+
+class YfbzbAdapter(SourceAdapter):
+    """乙方宝 (www.yfbzb.com)"""
+    
+    name = "yfbzb"
+    label = "乙方宝"
+    
+    DETAIL_RULES_VERSION = 2
+    
+    def __init__(self, config: Dict = None):
+        """
+        初始化数据源
+        
+        Args:
+            config: 网站配置，默认取 YFBZB_CONFIG
+        """
+        super().__init__(config or YFBZB_CONFIG)
+    
+    def search_params(self, keyword: str, page: int, batched: bool = False,
+                      window: Tuple[datetime, datetime] = None) -> dict:
+        """构建搜索请求参数"""
+        # 使用正确的参数格式
+        params = {
+            "type": 0,
+            "defaultSearch": "false",
+            "keyword": keyword,  # 注意是小写的keyword
+            "pageNo": page,
+            "pageSize": self.page_size,
+            "noticeType": 3,
+            "invitedBidType": 3,
+            "timeType": 1,
+            "searchType": 2,
+            "searchMode": 1,
+        }
+        if batched:
+            params.update(SEARCH_CONFIG["keyword_batch_params"])
+        if window is not None:
+            date_format = BACKFILL_CONFIG["date_format"]
+            start = window[0].strftime(date_format)
+            end = (window[1] - timedelta(days=1)).strftime(date_format)
+            for name, value in BACKFILL_CONFIG["date_params"].items():
+                params[name] = value.format(start=start, end=end) if isinstance(value, str) else value
+        return params
+    
+    def extract_rows(self, soup: BeautifulSoup, html: str) -> Tuple[List[Dict], bool]:
+        """
+        从已解析的列表页中提取公告行
+        
+        Args:
+            soup: 已解析的列表页
+            html: 列表页HTML（调试日志用）
+        
+        Returns:
+            (公告行, 是否还有更多)；详情链接可以是相对路径
+        """
+        results = []
+        has_more = False
+        
+        # 查找表格 - 使用id定位
+        table = soup.find('table', id='treeTable')
+        if not table:
+            # 回退到class查找
+            table = soup.find('table', class_='table-hover')
+        if not table:
+            # 再回退到普通查找
+            tables = soup.find_all('table')
+            logger.debug(f"页面中的表格数量: {len(tables)}")
+            if tables:
+                table = tables[0]
+        if not table:
+            logger.warning("未找到招标列表表格")
+            # 打印部分HTML帮助调试
+            logger.debug(f"HTML预览: {html[:1000]}")
+            return [], False
+        
+        logger.debug(f"找到表格，id={table.get('id')}, class={table.get('class')}")
+        
+        # 查找所有行（跳过表头）
+        rows = table.find_all('tr')[1:]  # 跳过表头行
+        
+        for row in rows:
+            cells = row.find_all('td')
+            if len(cells) >= 4:
+                try:
+                    # 提取标题和链接
+                    title_cell = cells[0]
+                    link_tag = title_cell.find('a')
+                    
+                    if link_tag:
+                        title = link_tag.get_text(strip=True)
+                        detail_url = link_tag.get('href', '')
+                    else:
+                        title = title_cell.get_text(strip=True)
+                        detail_url = ""
+                    
+                    # 提取其他字段
+                    announcement_type = cells[1].get_text(strip=True) if len(cells) > 1 else ""
+                    region = cells[2].get_text(strip=True) if len(cells) > 2 else ""
+                    publish_date = cells[3].get_text(strip=True) if len(cells) > 3 else ""
+                    
+                    results.append({
+                        "title": title,
+                        "announcement_type": announcement_type,
+                        "region": region,
+                        "publish_time": publish_date,
+                        "detail_url": detail_url,
+                    })
+                except Exception as e:
+                    logger.warning(f"解析列表行失败: {e}")
+                    continue
+        
+        # 检查是否有下一页
+        pagination = soup.find('ul', class_='pagination') or soup.find_all('a', string=re.compile(r'下一页'))
+        if pagination:
+            has_more = True
+        
+        # 如果当前页有结果，可能还有更多
+        if len(rows) >= self.page_size:
+            has_more = True
+        
+        return results, has_more
+    
+    def parse_date(self, date_str: str) -> Optional[datetime]:
+        """按常见格式依次尝试解析日期字符串"""
+        if not date_str:
+            return None
+        
+        # 清理日期字符串
+        date_str = date_str.strip().replace('****', '').strip()
+        
+        # 常见日期格式
+        formats = [
+            "%Y/%m/%d",
+            "%Y-%m-%d",
+            "%Y年%m月%d日",
+            "%Y/%m/%d %H:%M:%S",
+            "%Y-%m-%d %H:%M:%S",
+            "%Y年%m月%d日 %H:%M:%S",
+            "%Y/%m/%d %H:%M",
+            "%Y-%m-%d %H:%M",
+        ]
+        
+        for fmt in formats:
+            try:
+                return datetime.strptime(date_str, fmt)
+            except ValueError:
+                continue
+        
+        # 尝试提取年月日
+        match = re.search(r'(\d{4})[/-年](\d{1,2})[/-月](\d{1,2})', date_str)
+        if match:
+            try:
+                return datetime(int(match.group(1)), int(match.group(2)), int(match.group(3)))
+            except ValueError:
+                pass
+        
+        return None
+    
+    def content_text(self, soup: BeautifulSoup) -> str:
+        """详情内容区域的文本"""
+        content = soup.find('div', class_='detail-content') or soup.find('div', class_='content')
+        if not content:
+            # 尝试查找包含公告内容的区域
+            content = soup
+        return content.get_text()
+    
+    def extract_detail(self, text: str) -> Dict:
+        """
+        从详情内容文本中用正则提取各字段
+        
+        Args:
+            text: 内容区域文本（见 content_text）
+        
+        Returns:
+            详情字段
+        """
+        details = self.empty_details()
+        
+        try:
+            # 提取发布单位/采购单位
+            patterns_unit = [
+                r'(?:采购单位|招标单位|发布单位|项目单位|采购人)[：:]\s*([^\n\r]+)',
+                r'企\s*业[：:]\s*([^\n\r]+)',
+            ]
+            for pattern in patterns_unit:
+                match = re.search(pattern, text)
+                if match:
+                    unit = match.group(1).strip()
+                    # 清理隐藏内容标记
+                    unit = re.sub(r'\*+|点击登录查看', '', unit).strip()
+                    if unit and unit != '':
+                        details["publish_unit"] = unit
+                        break
+            
+            # 提取项目预算（保留“万”单位，数值换算见 normalizer）
+            patterns_budget = [
+                r'(?:项目预算|预算金额|采购预算|预算)[：:]\s*([\d,.]+)\s*(万)?元',
+                r'(?:总投资|投资额|合同金额)[：:]\s*([\d,.]+)\s*(万)?元',
+            ]
+            for pattern in patterns_budget:
+                match = re.search(pattern, text)
+                if match:
+                    details["project_budget"] = match.group(1) + (match.group(2) or "") + "元"
+                    break
+            
+            # 提取招标文件获取时间
+            patterns_file_time = [
+                r'(?:采购文件|招标文件)(?:.*?)(?:获取|下载)(?:.*?)(?:时间|日期)[：:]\s*([^\n\r]+)',
+                r'(?:文件获取时间|获取招标文件时间)[：:]\s*([^\n\r]+)',
+                r'获取时间[：:]\s*([^\n\r]+)',
+            ]
+            for pattern in patterns_file_time:
+                match = re.search(pattern, text)
+                if match:
+                    file_time = match.group(1).strip()
+                    file_time = re.sub(r'\*+', '', file_time).strip()
+                    if file_time:
+                        details["bid_file_time"] = file_time[:100]  # 限制长度
+                        break
+            
+            # 提取报名截止时间/报价截止时间
+            patterns_deadline = [
+                r'(?:报名截止|投标截止|报价截止)(?:时间|日期)?[：:]\s*([^\n\r]+)',
+                r'(?:截止时间|截止日期)[：:]\s*([^\n\r]+)',
+                r'报名.*?(?:至|到)\s*(\d{4}[/-年]\d{1,2}[/-月]\d{1,2}[日]?\s*\d{1,2}[：:]\d{1,2})',
+            ]
+            for pattern in patterns_deadline:
+                match = re.search(pattern, text)
+                if match:
+                    deadline = match.group(1).strip()
+                    deadline = re.sub(r'\*+', '', deadline).strip()
+                    if deadline:
+                        details["registration_deadline"] = deadline[:100]
+                        break
+            
+            # 提取报名费用/标书费
+            patterns_fee = [
+                r'(?:报名费|标书费|招标文件费|资料费)[：:]\s*([\d,.]+)\s*元?',
+                r'(?:报名费|标书费)[：:]\s*(?:人民币)?\s*([\d,.]+)',
+            ]
+            for pattern in patterns_fee:
+                match = re.search(pattern, text)
+                if match:
+                    fee = match.group(1).strip()
+                    if fee and fee != '0':
+                        details["registration_fee"] = fee + "元"
+                    else:
+                        details["registration_fee"] = "0元/免费"
+                    break
+            
+            # 提取投标保证金
+            patterns_bond = [
+                r'(?:投标保证金|保证金金额|保证金)[：:]\s*([\d,.]+)(?:\s*元)?',
+                r'保证金[：:]\s*(?:人民币)?\s*([\d,.]+)',
+            ]
+            for pattern in patterns_bond:
+                match = re.search(pattern, text)
+                if match:
+                    bond = match.group(1).strip()
+                    if bond and float(bond.replace(',', '')) > 0:
+                        details["bid_bond"] = bond + "元"
+                    break
+            
+            # 提取项目类型
+            patterns_type = [
+                r'(?:项目类型|采购类型|招标类型)[：:]\s*([^\n\r]+)',
+                r'(?:采购方式|招标方式)[：:]\s*([^\n\r]+)',
+            ]
+            for pattern in patterns_type:
+                match = re.search(pattern, text)
+                if match:
+                    project_type = match.group(1).strip()
+                    project_type = re.sub(r'\*+', '', project_type).strip()
+                    if project_type:
+                        details["project_type"] = project_type[:50]
+                        break
+        
+        except Exception as e:
+            logger.warning(f"解析详情页失败: {e}")
+        
+        return details
+
+
+# 数据源标识 -> 适配器类
+SOURCES = {
+    YfbzbAdapter.name: YfbzbAdapter,
+}
+
+
+def create_source(name: str) -> SourceAdapter:
+    """
+    按标识创建数据源适配器
+    
+    Args:
+        name: 数据源标识（SOURCES 的键）
+    
+    Returns:
+        适配器实例
+    """
+    if name not in SOURCES:
+        raise ValueError(f"未知的数据源: {name}（可选: {', '.join(SOURCES)}）")
+    return SOURCES[name]()
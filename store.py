@@ -0,0 +1,325 @@
+# -*- coding: utf-8 -*-
+"""
+公告库模块 - 详情页内容指纹与字段变更历史
+
+每个详情链接保存一份内容区域（归一化空白后）的指纹和提取出的字段：
+- 再次抓取时指纹未变：直接沿用保存的字段，不再运行整套正则提取
+- 指纹变化：重新提取，与保存的字段逐项比较，变化的字段连同新旧值和时间写入变更历史，
+  公告记为“有更新”（如报名截止时间延期）
+
+另外可保存完整的公告记录（save_records），附带发布日期、预算金额等查询列，
+供回溯抓取落盘和本地查询（query / version，见 query_api）使用。
+
+数据保存在 SQLite 文件中，多线程并发抓取详情时每个线程使用各自的连接。
+"""
+
+import os
+import json
+import hashlib
+import sqlite3
+import threading
+from datetime import datetime
+from typing import List, Dict, Optional, Iterable, Tuple
+import logging
+
+from normalizer import parse_amount, parse_datetime
+
+logger = logging.getLogger(__name__)
+
+
+def content_fingerprint(text: str) -> str:
+    """
+    内容区域文本的指纹（空白归一化后取哈希，排版变化不影响指纹）
+    
+    Args:
+        text: 内容区域文本
+    
+    Returns:
+        十六进制指纹
+    """
+    normalized = " ".join(text.split())
+    return hashlib.blake2b(normalized.encode('utf-8'), digest_size=16).hexdigest()
+
+
+class AnnouncementStore:
+    """详情页指纹与变更历史（SQLite，多线程安全）"""
+    
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS details (
+            url TEXT PRIMARY KEY,
+            fingerprint TEXT NOT NULL,
+            fields TEXT NOT NULL,
+            first_seen TEXT NOT NULL,
+            checked_at TEXT NOT NULL,
+            updated_at TEXT,
+            updated_fields TEXT
+        );
+        CREATE TABLE IF NOT EXISTS changes (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            url TEXT NOT NULL,
+            field TEXT NOT NULL,
+            old_value TEXT,
+            new_value TEXT,
+            changed_at TEXT NOT NULL
+        );
+        CREATE INDEX IF NOT EXISTS idx_changes_url ON changes (url, id);
+        CREATE TABLE IF NOT EXISTS announcements (
+            key TEXT PRIMARY KEY,
+            title TEXT NOT NULL,
+            region TEXT,
+            announcement_type TEXT,
+            publish_date TEXT,
+            budget_yuan REAL,
+            matched_keywords TEXT,
+            record TEXT NOT NULL,
+            first_seen TEXT NOT NULL,
+            saved_at TEXT NOT NULL
+        );
+        CREATE INDEX IF NOT EXISTS idx_announcements_date ON announcements (publish_date);
+        CREATE INDEX IF NOT EXISTS idx_announcements_saved ON announcements (saved_at);
+    """
+    
+    def __init__(self, path: str):
+        """
+        初始化公告库
+        
+        Args:
+            path: SQLite 数据库文件路径，不存在时自动创建
+        """
+        self.path = path
+        
+        directory = os.path.dirname(path)
+        if directory and not os.path.exists(directory):
+            os.makedirs(directory)
+        
+        # sqlite3 连接不能跨线程使用，每个线程各用一个
+        self._local = threading.local()
+        self._connect().executescript(self.SCHEMA)
+    
+    def _connect(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+            conn.row_factory = sqlite3.Row
+            self._local.conn = conn
+        return conn
+    
+    def lookup(self, url: str) -> Optional[Dict]:
+        """
+        读取已保存的详情
+        
+        Args:
+            url: 详情链接
+        
+        Returns:
+            {"fingerprint", "fields", "updated_at", "updated_fields"}，未保存过时为None
+        """
+        row = self._connect().execute(
+            "SELECT fingerprint, fields, updated_at, updated_fields FROM details WHERE url = ?",
+            (url,)
+        ).fetchone()
+        if row is None:
+            return None
+        return {
+            "fingerprint": row["fingerprint"],
+            "fields": json.loads(row["fields"]),
+            "updated_at": row["updated_at"] or "",
+            "updated_fields": json.loads(row["updated_fields"]) if row["updated_fields"] else [],
+        }
+    
+    def touch(self, url: str):
+        """记录一次内容未变化的检查"""
+        self._connect().execute(
+            "UPDATE details SET checked_at = ? WHERE url = ?",
+            (datetime.now().isoformat(timespec='seconds'), url)
+        )
+    
+    def save(self, url: str, fingerprint: str, fields: Dict, track_changes: bool = True) -> List[str]:
+        """
+        保存新提取的详情，与已保存的字段比较并记录变更
+        
+        Args:
+            url: 详情链接
+            fingerprint: 内容区域指纹
+            fields: 提取出的字段
+            track_changes: 是否记录字段变更；提取规则变化后重新提取时为False，直接覆盖
+        
+        Returns:
+            发生变化的字段名（首次保存、字段均未变化或不记录变更时为空列表）
+        """
+        now = datetime.now().isoformat(timespec='seconds')
+        conn = self._connect()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            row = conn.execute("SELECT fields FROM details WHERE url = ?", (url,)).fetchone()
+            if row is None:
+                conn.execute(
+                    "INSERT INTO details (url, fingerprint, fields, first_seen, checked_at) "
+                    "VALUES (?, ?, ?, ?, ?)",
+                    (url, fingerprint, json.dumps(fields, ensure_ascii=False), now, now)
+                )
+                conn.execute("COMMIT")
+                return []
+            
+            old_fields = json.loads(row["fields"])
+            changed = [name for name in fields if fields[name] != old_fields.get(name, "")] if track_changes else []
+            for name in changed:
+                conn.execute(
+                    "INSERT INTO changes (url, field, old_value, new_value, changed_at) VALUES (?, ?, ?, ?, ?)",
+                    (url, name, old_fields.get(name, ""), fields[name], now)
+                )
+            if changed:
+                conn.execute(
+                    "UPDATE details SET fingerprint = ?, fields = ?, checked_at = ?, "
+                    "updated_at = ?, updated_fields = ? WHERE url = ?",
+                    (fingerprint, json.dumps(fields, ensure_ascii=False), now,
+                     now, json.dumps(changed), url)
+                )
+            else:
+                # 内容区域有变化但提取的字段相同（如浏览次数），或按新规则重新提取：不记为更新
+                conn.execute(
+                    "UPDATE details SET fingerprint = ?, fields = ?, checked_at = ? WHERE url = ?",
+                    (fingerprint, json.dumps(fields, ensure_ascii=False), now, url)
+                )
+            conn.execute("COMMIT")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        return changed
+    
+    @staticmethod
+    def record_key(record: Dict) -> str:
+        """公告记录的键（与 YfbzbScraper._record_key 一致：优先使用详情链接）"""
+        return record.get("detail_url") or f"{record.get('title', '')}|{record.get('publish_time', '')}"
+    
+    def save_records(self, records: Iterable[Dict]) -> int:
+        """
+        保存一批完整的公告记录
+        
+        同一公告再次保存时覆盖字段、保留首次保存时间，matched_keywords 与已保存的合并
+        （同一公告可能先后由不同关键词搜到）。
+        
+        Args:
+            records: 公告记录（英文字段名）
+        
+        Returns:
+            保存的记录数
+        """
+        # 保存时间精确到微秒，作为查询结果的版本（见 version）
+        now = datetime.now().isoformat()
+        conn = self._connect()
+        count = 0
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            for record in records:
+                key = self.record_key(record)
+                row = conn.execute("SELECT matched_keywords FROM announcements WHERE key = ?", (key,)).fetchone()
+                keywords = [k for k in (row["matched_keywords"] or "").split("、") if k] if row else []
+                for keyword in (record.get("matched_keywords") or "").split("、"):
+                    if keyword and keyword not in keywords:
+                        keywords.append(keyword)
+                record = dict(record, matched_keywords="、".join(keywords))
+                
+                published = parse_datetime(record.get("publish_time", ""))
+                conn.execute(
+                    "INSERT INTO announcements (key, title, region, announcement_type, publish_date, budget_yuan, "
+                    "matched_keywords, record, first_seen, saved_at) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?) "
+                    "ON CONFLICT (key) DO UPDATE SET title = excluded.title, region = excluded.region, "
+                    "announcement_type = excluded.announcement_type, publish_date = excluded.publish_date, "
+                    "budget_yuan = excluded.budget_yuan, matched_keywords = excluded.matched_keywords, "
+                    "record = excluded.record, saved_at = excluded.saved_at",
+                    (key, record.get("title", ""), record.get("region", ""), record.get("announcement_type", ""),
+                     published.isoformat(sep=' ') if published else None,
+                     parse_amount(record.get("project_budget", "")), record["matched_keywords"],
+                     json.dumps(record, ensure_ascii=False, default=str), now, now)
+                )
+                count += 1
+            conn.execute("COMMIT")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        return count
+    
+    def use_wal(self):
+        """切换为WAL日志模式：写入时不阻塞读取（设置保存在数据库文件中）"""
+        self._connect().execute("PRAGMA journal_mode=WAL")
+    
+    def version(self) -> str:
+        """公告记录的版本：新增记录或任何记录被重新保存后都会变化（两个索引查找，不扫描全表）"""
+        row = self._connect().execute(
+            "SELECT (SELECT MAX(rowid) FROM announcements) AS last, "
+            "(SELECT MAX(saved_at) FROM announcements) AS saved"
+        ).fetchone()
+        return f"{row['last'] or 0}-{row['saved'] or ''}"
+    
+    def query(self, keyword: str = None, region: str = None, date_from: datetime = None,
+              date_to: datetime = None, min_budget: float = None, max_budget: float = None,
+              offset: int = 0, limit: int = None) -> Tuple[int, List[Dict]]:
+        """
+        查询已保存的公告记录（按发布时间倒序）
+        
+        Args:
+            keyword: 标题或匹配关键词包含该文本
+            region: 地区包含该文本
+            date_from: 发布时间不早于
+            date_to: 发布时间早于（不含）
+            min_budget: 最低预算（元），预算未知的记录保留
+            max_budget: 最高预算（元），预算未知的记录保留
+            offset: 跳过的记录数
+            limit: 最多返回的记录数，None表示不限
+        
+        Returns:
+            (符合条件的总数, 本页记录)
+        """
+        conditions, params = [], []
+        if keyword:
+            conditions.append("(title LIKE ? OR matched_keywords LIKE ?)")
+            params += [f"%{keyword}%"] * 2
+        if region:
+            conditions.append("region LIKE ?")
+            params.append(f"%{region}%")
+        if date_from is not None:
+            conditions.append("publish_date >= ?")
+            params.append(date_from.isoformat(sep=' '))
+        if date_to is not None:
+            conditions.append("publish_date < ?")
+            params.append(date_to.isoformat(sep=' '))
+        # 与 normalizer.filter_by_budget 一致：预算未知的记录保留
+        if min_budget is not None:
+            conditions.append("(budget_yuan IS NULL OR budget_yuan >= ?)")
+            params.append(min_budget)
+        if max_budget is not None:
+            conditions.append("(budget_yuan IS NULL OR budget_yuan <= ?)")
+            params.append(max_budget)
+        where = f" WHERE {' AND '.join(conditions)}" if conditions else ""
+        
+        conn = self._connect()
+        total = conn.execute(f"SELECT COUNT(*) FROM announcements{where}", params).fetchone()[0]
+        rows = conn.execute(
+            f"SELECT record FROM announcements{where} ORDER BY publish_date DESC, key LIMIT ? OFFSET ?",
+            params + [-1 if limit is None else limit, offset]
+        ).fetchall()
+        return total, [json.loads(row["record"]) for row in rows]
+    
+    def history(self, url: str) -> List[Dict]:
+        """
+        某条公告的字段变更历史
+        
+        Args:
+            url: 详情链接
+        
+        Returns:
+            按时间顺序排列的 {"field", "old_value", "new_value", "changed_at"}
+        """
+        rows = self._connect().execute(
+            "SELECT field, old_value, new_value, changed_at FROM changes WHERE url = ? ORDER BY id",
+            (url,)
+        ).fetchall()
+        return [dict(row) for row in rows]
+    
+    def close(self):
+        """关闭当前线程的连接"""
+        conn = getattr(self._local, "conn", None)
+        if conn is not None:
+            conn.close()
+            self._local.conn = None
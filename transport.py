@@ -0,0 +1,481 @@
+# -*- coding: utf-8 -*-
+"""
+传输层模块 - 发出HTTP请求的可替换实现
+
+爬虫通过传输对象发出所有请求，不直接依赖具体的HTTP库：
+- RequestsTransport：requests 会话（HTTP/1.1），默认，始终可用
+- HttpxTransport：httpx 客户端（HTTP/2），多个并发请求在同一个连接上多路复用，
+  需要安装 httpx[http2]；未安装时 create_transport 回退到 RequestsTransport
+
+两者都支持预热（prewarm）：抓取开始前建立连接（含DNS解析和TLS握手），
+第一批请求不再承担冷启动开销。连接池大小取 REQUEST_CONFIG。
+
+HedgedTransport 包装任一传输，为耗时异常长的请求发出对冲请求，压低尾部延迟。
+"""
+
+import time
+import queue
+import threading
+from collections import deque
+from typing import Dict, Optional
+import logging
+
+import requests
+from requests.adapters import HTTPAdapter
+from requests.compat import chardet
+
+from config import REQUEST_CONFIG, HEDGE_CONFIG
+from profiler import percentile
+
+logger = logging.getLogger(__name__)
+
+# HTTP/2 不允许逐跳头部，发送前去掉
+HOP_BY_HOP_HEADERS = {"connection", "keep-alive", "proxy-connection", "transfer-encoding", "upgrade"}
+
+# 预热请求的超时时间（秒）
+PREWARM_TIMEOUT = 10
+
+
+class TransportError(Exception):
+    """请求失败（连接错误、超时等）"""
+
+
+class HTTPStatusError(TransportError):
+    """响应状态码表示错误（4xx/5xx）"""
+    
+    def __init__(self, status_code: int, url: str):
+        super().__init__(f"{status_code} Error for url: {url}")
+        self.status_code = status_code
+
+
+class TransportResponse:
+    """一次请求的响应（响应体已读取完毕，连接已归还连接池）"""
+    
+    def __init__(self, url: str, status_code: int, content: bytes, encoding: Optional[str],
+                 ttfb: float, elapsed: float, http_version: str = "HTTP/1.1"):
+        """
+        Args:
+            url: 最终请求的URL
+            status_code: 状态码
+            content: 响应体（状态码表示错误时为空）
+            encoding: 响应头声明的编码，未声明时为None
+            ttfb: 首字节时间（秒，从发出请求算起）
+            elapsed: 总耗时（秒，含下载响应体）
+            http_version: 实际使用的协议版本
+        """
+        self.url = url
+        self.status_code = status_code
+        self.content = content
+        self.encoding = encoding
+        self.ttfb = ttfb
+        self.elapsed = elapsed
+        self.http_version = http_version
+        # 由 HedgedTransport 设置：是否发出了对冲请求、返回的是否为对冲请求的响应
+        self.hedged = False
+        self.hedge_won = False
+    
+    @property
+    def ok(self) -> bool:
+        """状态码是否表示成功"""
+        return self.status_code < 400
+    
+    @property
+    def apparent_encoding(self) -> Optional[str]:
+        """按响应体内容推测的编码"""
+        return chardet.detect(self.content)["encoding"]
+    
+    @property
+    def text(self) -> str:
+        """按 encoding 解码的响应文本"""
+        return self.content.decode(self.encoding or "utf-8", errors="replace")
+    
+    def raise_for_status(self):
+        """状态码表示错误时抛出 HTTPStatusError"""
+        if not self.ok:
+            raise HTTPStatusError(self.status_code, self.url)
+
+
+class RequestsTransport:
+    """基于 requests 会话的传输（HTTP/1.1，每个进行中的请求占用一个连接）"""
+    
+    name = "requests"
+    
+    def __init__(self, headers: Dict = None, pool_connections: int = None, pool_maxsize: int = None):
+        """
+        初始化传输
+        
+        Args:
+            headers: 默认请求头
+            pool_connections: 缓存连接池的主机数，默认取 REQUEST_CONFIG["pool_connections"]
+            pool_maxsize: 每个主机保持的最大连接数，默认取 REQUEST_CONFIG["pool_maxsize"]
+        """
+        self.pool_maxsize = pool_maxsize or REQUEST_CONFIG["pool_maxsize"]
+        self.session = requests.Session()
+        self.session.headers.update(headers or {})
+        adapter = HTTPAdapter(
+            pool_connections=pool_connections or REQUEST_CONFIG["pool_connections"],
+            pool_maxsize=self.pool_maxsize
+        )
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+    
+    def get(self, url: str, params: dict = None, headers: Dict = None, timeout: float = None) -> TransportResponse:
+        """
+        发送GET请求
+        
+        Args:
+            url: 请求URL
+            params: 查询参数
+            headers: 本次请求的请求头（与默认请求头合并）
+            timeout: 超时时间（秒）
+        
+        Returns:
+            响应
+        
+        Raises:
+            TransportError: 连接错误、超时等
+        """
+        start = time.perf_counter()
+        try:
+            # stream=True 时响应头到达即返回，可分别统计首字节时间和下载时间
+            response = self.session.get(url, params=params, headers=headers, timeout=timeout, stream=True)
+            with response:
+                ttfb = time.perf_counter() - start
+                # 读取并缓存响应体，连接随即归还连接池
+                content = response.content if response.ok else b""
+                elapsed = time.perf_counter() - start
+        except requests.RequestException as e:
+            raise TransportError(str(e)) from e
+        
+        # requests 对未声明编码的 text/* 响应默认为 ISO-8859-1，视为未声明
+        encoding = response.encoding if response.encoding != "ISO-8859-1" else None
+        return TransportResponse(response.url, response.status_code, content, encoding, ttfb, elapsed)
+    
+    def prewarm(self, url: str, connections: int = 1):
+        """
+        预热：建立连接（含DNS解析和TLS握手）放入连接池
+        
+        Args:
+            url: 目标站点的任意URL（通常为首页）
+            connections: 预先建立的连接数（不超过连接池大小），通常为详情并发数
+        """
+        connections = max(1, min(connections, self.pool_maxsize))
+        
+        def open_connection():
+            try:
+                self.session.head(url, timeout=PREWARM_TIMEOUT).close()
+            except requests.RequestException as e:
+                logger.debug(f"连接预热失败: {e}")
+        
+        # 并发发出，才能各自占用一个连接
+        threads = [threading.Thread(target=open_connection, daemon=True) for _ in range(connections)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+    
+    def close(self):
+        """关闭全部连接"""
+        self.session.close()
+
+
+class HttpxTransport:
+    """基于 httpx 的HTTP/2传输：并发请求在同一个连接上多路复用"""
+    
+    name = "http2"
+    
+    def __init__(self, headers: Dict = None, pool_connections: int = None, pool_maxsize: int = None):
+        """
+        初始化传输
+        
+        Args:
+            headers: 默认请求头（逐跳头部会被去掉）
+            pool_connections: 保持空闲的最大连接数，默认取 REQUEST_CONFIG["pool_connections"]
+            pool_maxsize: 最大连接数，默认取 REQUEST_CONFIG["pool_maxsize"]；
+                          HTTP/2 下同一站点通常只用一个连接
+        
+        Raises:
+            ImportError: 未安装 httpx 或 h2
+        """
+        try:
+            import httpx
+            import h2  # noqa: F401  httpx 的HTTP/2支持依赖 h2
+        except ImportError as e:
+            raise ImportError("HTTP/2 传输需要安装 httpx[http2]: pip install 'httpx[http2]'") from e
+        
+        self._httpx = httpx
+        self.client = httpx.Client(
+            http2=True,
+            headers=self._strip_hop_by_hop(headers),
+            follow_redirects=True,
+            limits=httpx.Limits(
+                max_connections=pool_maxsize or REQUEST_CONFIG["pool_maxsize"],
+                max_keepalive_connections=pool_connections or REQUEST_CONFIG["pool_connections"]
+            )
+        )
+    
+    @staticmethod
+    def _strip_hop_by_hop(headers: Optional[Dict]) -> Dict:
+        return {key: value for key, value in (headers or {}).items() if key.lower() not in HOP_BY_HOP_HEADERS}
+    
+    def get(self, url: str, params: dict = None, headers: Dict = None, timeout: float = None) -> TransportResponse:
+        """
+        发送GET请求
+        
+        Args:
+            url: 请求URL
+            params: 查询参数
+            headers: 本次请求的请求头（与默认请求头合并）
+            timeout: 超时时间（秒）
+        
+        Returns:
+            响应
+        
+        Raises:
+            TransportError: 连接错误、超时等
+        """
+        httpx = self._httpx
+        start = time.perf_counter()
+        try:
+            with self.client.stream(
+                "GET", url, params=params, headers=self._strip_hop_by_hop(headers), timeout=timeout
+            ) as response:
+                ttfb = time.perf_counter() - start
+                content = response.read() if not response.is_error else b""
+                elapsed = time.perf_counter() - start
+        except httpx.HTTPError as e:
+            raise TransportError(str(e)) from e
+        
+        return TransportResponse(
+            str(response.url), response.status_code, content, response.charset_encoding,
+            ttfb, elapsed, response.http_version
+        )
+    
+    def prewarm(self, url: str, connections: int = 1):
+        """
+        预热：建立连接（含DNS解析和TLS握手）；HTTP/2 只需一个连接，connections 被忽略
+        
+        Args:
+            url: 目标站点的任意URL（通常为首页）
+            connections: 为与 RequestsTransport 接口一致而保留
+        """
+        try:
+            response = self.client.head(url, timeout=PREWARM_TIMEOUT)
+            logger.debug(f"连接预热完成: {response.http_version}")
+        except self._httpx.HTTPError as e:
+            logger.debug(f"连接预热失败: {e}")
+    
+    def close(self):
+        """关闭全部连接"""
+        self.client.close()
+
+
+class HedgedTransport:
+    """
+    请求对冲：请求耗时超过近期请求耗时的分位数（默认p95）仍未完成时，再发出一个相同的请求，
+    取先成功的响应
+    
+    对冲请求与普通请求一样经过限速器、抓取预算和自适应并发；原请求在等待限速期间完成则不再发出
+    （等待期间不占用限速时间点），自适应并发已满时不对冲。
+    落后的请求无法中断，在后台线程中自行结束（最长为请求超时），结果被丢弃，
+    其耗时仍计入分位数统计，避免对冲本身把分位数越压越低。
+    """
+    
+    def __init__(self, transport, rate_limiter, budget=None, config: Dict = None, concurrency=None):
+        """
+        初始化对冲传输
+        
+        Args:
+            transport: 实际发出请求的传输
+            rate_limiter: 请求限速器（与爬虫共用），对冲请求同样排队
+            budget: 抓取预算（可选），见 priority.CrawlBudget；对冲请求同样扣减
+            config: 对冲配置，默认取 HEDGE_CONFIG
+            concurrency: 自适应并发控制（可选），见 concurrency.AIMDConcurrency；对冲请求同样占用名额
+        """
+        config = config or HEDGE_CONFIG
+        self.transport = transport
+        self.name = transport.name
+        self.rate_limiter = rate_limiter
+        self.budget = budget
+        self.concurrency = concurrency
+        self.percentile = config["percentile"]
+        self.min_samples = config["min_samples"]
+        self.min_delay = config["min_delay"]
+        
+        self._latencies = deque(maxlen=config["window"])
+        self._lock = threading.Lock()
+        self.requests = 0
+        self.hedged = 0
+        self.hedge_wins = 0
+    
+    def hedge_delay(self) -> Optional[float]:
+        """
+        当前的对冲等待时间
+        
+        Returns:
+            近期请求耗时的分位数（不低于 min_delay）；样本不足时为None，表示不对冲
+        """
+        with self._lock:
+            samples = sorted(self._latencies)
+        if len(samples) < self.min_samples:
+            return None
+        return max(self.min_delay, percentile(samples, self.percentile * 100))
+    
+    def _observe(self, response: TransportResponse) -> TransportResponse:
+        # 很快返回的5xx等错误响应不代表正常耗时，不计入样本，否则会拉低对冲阈值
+        if response.ok:
+            with self._lock:
+                self._latencies.append(response.elapsed)
+        return response
+    
+    def get(self, url: str, params: dict = None, headers: Dict = None, timeout: float = None) -> TransportResponse:
+        """
+        发送GET请求，超过对冲等待时间时发出对冲请求
+        
+        Args:
+            url: 请求URL
+            params: 查询参数
+            headers: 本次请求的请求头
+            timeout: 超时时间（秒）
+        
+        Returns:
+            先成功的响应（hedged / hedge_won 标出对冲情况）
+        
+        Raises:
+            TransportError: 所有已发出的请求都失败
+        """
+        delay = self.hedge_delay()
+        with self._lock:
+            self.requests += 1
+        if delay is None:
+            return self._observe(self.transport.get(url, params=params, headers=headers, timeout=timeout))
+        
+        outcomes = queue.Queue()
+        primary_done = threading.Event()
+        
+        def attempt(is_hedge: bool, slot: float = None):
+            # (耗时, 是否拥塞, 原因)：对冲请求结束后按结果归还自适应并发名额
+            outcome = (None, False, "")
+            try:
+                response = self._observe(self.transport.get(url, params=params, headers=headers, timeout=timeout))
+                if response.ok:
+                    outcome = (response.elapsed, False, "")
+                elif response.status_code == 429 or response.status_code >= 500:
+                    outcome = (None, True, f"HTTP {response.status_code}")
+                outcomes.put((is_hedge, response, None))
+            except TransportError as e:
+                outcome = (None, True, "请求错误或超时")
+                outcomes.put((is_hedge, None, e))
+            finally:
+                if slot is not None:
+                    self.concurrency.release(slot, *outcome)
+                if not is_hedge:
+                    primary_done.set()
+        
+        threading.Thread(target=attempt, args=(False,), name="request", daemon=True).start()
+        try:
+            is_hedge, response, error = outcomes.get(timeout=delay)
+        except queue.Empty:
+            # 超过分位数仍未完成：限速、并发和预算允许时发出对冲请求（原请求先完成则放弃）
+            launched = 1
+            if self._acquire_hedge(primary_done, attempt):
+                launched = 2
+                with self._lock:
+                    self.hedged += 1
+            
+            is_hedge, response, error = outcomes.get()
+            if launched == 2 and (error is not None or not response.ok):
+                # 先结束的请求失败了（连接错误或5xx等错误状态），等待另一个；
+                # 另一个也失败时，有响应的优先（交给调用方按状态码处理）
+                other = outcomes.get()
+                if other[2] is None and (error is not None or other[1].ok):
+                    is_hedge, response, error = other
+            if error is None:
+                response.hedged = launched == 2
+                response.hedge_won = is_hedge
+                if is_hedge:
+                    with self._lock:
+                        self.hedge_wins += 1
+        
+        if error is not None:
+            raise error
+        return response
+    
+    def _acquire_hedge(self, primary_done: threading.Event, attempt) -> bool:
+        """
+        取得限速时间点、并发名额和预算后发出对冲请求
+        
+        Args:
+            primary_done: 原请求结束信号，等待限速期间置位则放弃
+            attempt: 发出请求的函数 (是否对冲, 并发名额)
+        
+        Returns:
+            是否已发出对冲请求
+        """
+        rate_slot = self.rate_limiter.try_acquire(primary_done)
+        if rate_slot is None:
+            return False
+        slot = None
+        if self.concurrency is not None:
+            slot = self.concurrency.try_acquire()
+            if slot is None:
+                self.rate_limiter.refund(rate_slot)
+                return False
+        if self.budget is not None and not self.budget.try_spend():
+            if slot is not None:
+                self.concurrency.release(slot)
+            self.rate_limiter.refund(rate_slot)
+            return False
+        threading.Thread(target=attempt, args=(True, slot), name="request-hedge", daemon=True).start()
+        return True
+    
+    def describe(self) -> str:
+        """对冲统计，用于日志"""
+        with self._lock:
+            requests, hedged, wins = self.requests, self.hedged, self.hedge_wins
+        hedge_rate = hedged / requests if requests else 0.0
+        win_rate = wins / hedged if hedged else 0.0
+        return (f"请求对冲: {requests} 次请求中对冲 {hedged} 次 ({hedge_rate:.1%})，"
+                f"对冲请求先完成 {wins} 次 ({win_rate:.1%})")
+    
+    def prewarm(self, url: str, connections: int = 1):
+        """预热（见被包装的传输）"""
+        self.transport.prewarm(url, connections)
+    
+    def close(self):
+        """关闭被包装的传输"""
+        self.transport.close()
+
+
+TRANSPORTS = {
+    RequestsTransport.name: RequestsTransport,
+    HttpxTransport.name: HttpxTransport,
+}
+
+
+def create_transport(name: str = None, headers: Dict = None, pool_connections: int = None,
+                     pool_maxsize: int = None):
+    """
+    按名称创建传输
+    
+    Args:
+        name: "requests" 或 "http2"，默认取 REQUEST_CONFIG["transport"]
+        headers: 默认请求头
+        pool_connections: 见各传输类
+        pool_maxsize: 见各传输类
+    
+    Returns:
+        传输对象；请求 http2 但未安装 httpx[http2] 时回退为 RequestsTransport
+    
+    Raises:
+        ValueError: 未知的传输名称
+    """
+    name = name or REQUEST_CONFIG["transport"]
+    if name not in TRANSPORTS:
+        raise ValueError(f"未知的传输: {name}，可选: {', '.join(TRANSPORTS)}")
+    
+    try:
+        return TRANSPORTS[name](headers, pool_connections, pool_maxsize)
+    except ImportError as e:
+        logger.warning(f"{e}，改用 requests 传输 (HTTP/1.1)")
+        return RequestsTransport(headers, pool_connections, pool_maxsize)
@@ -0,0 +1,301 @@
+# -*- coding: utf-8 -*-
+"""
+工作队列模块 - 多进程/多机协同抓取的持久化任务队列
+
+任务的生命周期：
+- pending：等待领取（available_at 之前不会被领取，用于失败后的延迟重试）
+- leased：已被某个工作者领取；超过可见性超时仍未完成时，视为工作者失联，重新可被领取
+- done / failed：已完成 / 超过最大尝试次数
+
+WorkQueue 定义后端接口，SQLiteWorkQueue 为基于 SQLite 文件的实现，
+放在共享卷上即可供多台机器使用；需要其他后端（如Redis）时实现同样的接口即可。
+"""
+
+import os
+import json
+import time
+import uuid
+import sqlite3
+import threading
+from typing import List, Dict, Optional, Any
+import logging
+
+from config import QUEUE_CONFIG
+
+logger = logging.getLogger(__name__)
+
+
+class Task:
+    """已领取的任务"""
+    
+    def __init__(self, task_id: int, kind: str, payload: Dict, attempts: int, lease_token: str):
+        self.id = task_id
+        self.kind = kind
+        self.payload = payload
+        self.attempts = attempts
+        self.lease_token = lease_token
+    
+    def __repr__(self):
+        return f"Task({self.id}, {self.kind}, attempts={self.attempts})"
+
+
+class WorkQueue:
+    """工作队列接口"""
+    
+    def reset(self):
+        """清空队列和运行参数，开始新的一次抓取"""
+        raise NotImplementedError
+    
+    def set_meta(self, key: str, value: Any):
+        """保存运行参数（JSON可序列化）"""
+        raise NotImplementedError
+    
+    def get_meta(self, key: str) -> Any:
+        """读取运行参数，不存在时为None"""
+        raise NotImplementedError
+    
+    def enqueue(self, kind: str, payload: Dict, key: str, priority: int = 0) -> bool:
+        """
+        添加任务
+        
+        Args:
+            kind: 任务类型
+            payload: 任务参数
+            key: 去重键，同一个键只会入队一次
+            priority: 优先级，数值大的先被领取
+        
+        Returns:
+            是否新入队
+        """
+        raise NotImplementedError
+    
+    def lease(self, owner: str) -> Optional[Task]:
+        """
+        领取一个任务
+        
+        Args:
+            owner: 工作者标识
+        
+        Returns:
+            任务，暂无可领取的任务时为None
+        """
+        raise NotImplementedError
+    
+    def complete(self, task: Task, result: Dict) -> bool:
+        """
+        提交任务结果
+        
+        Returns:
+            是否提交成功（租约已过期并被其他工作者领取时为False）
+        """
+        raise NotImplementedError
+    
+    def fail(self, task: Task, error: str) -> bool:
+        """
+        报告任务失败，未超过最大尝试次数时延迟后重新入队
+        
+        Returns:
+            是否报告成功（租约已失效时为False）
+        """
+        raise NotImplementedError
+    
+    def counts(self) -> Dict[str, int]:
+        """各状态的任务数"""
+        raise NotImplementedError
+    
+    def results(self, kind: str) -> List[Dict]:
+        """
+        某类任务的全部结果
+        
+        Returns:
+            按入队顺序排列的 {"payload", "status", "result", "error"}
+        """
+        raise NotImplementedError
+    
+    def is_drained(self) -> bool:
+        """是否已没有待处理或处理中的任务"""
+        counts = self.counts()
+        return counts.get("pending", 0) == 0 and counts.get("leased", 0) == 0
+
+
+class SQLiteWorkQueue(WorkQueue):
+    """基于 SQLite 文件的工作队列（多进程、多线程安全）"""
+    
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS tasks (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            key TEXT UNIQUE NOT NULL,
+            kind TEXT NOT NULL,
+            payload TEXT NOT NULL,
+            priority INTEGER NOT NULL DEFAULT 0,
+            status TEXT NOT NULL DEFAULT 'pending',
+            attempts INTEGER NOT NULL DEFAULT 0,
+            available_at REAL NOT NULL DEFAULT 0,
+            lease_owner TEXT,
+            lease_token TEXT,
+            lease_expires REAL,
+            result TEXT,
+            error TEXT
+        );
+        CREATE INDEX IF NOT EXISTS idx_tasks_ready ON tasks (status, priority, id);
+        CREATE TABLE IF NOT EXISTS meta (
+            key TEXT PRIMARY KEY,
+            value TEXT NOT NULL
+        );
+    """
+    
+    def __init__(self, path: str, visibility_timeout: float = None, max_attempts: int = None,
+                 retry_delay: float = None):
+        """
+        初始化队列
+        
+        Args:
+            path: SQLite 数据库文件路径（多台机器协同时放在共享卷上）
+            visibility_timeout: 租约超时（秒）
+            max_attempts: 每个任务最多尝试次数
+            retry_delay: 失败后重新可被领取前的等待时间（秒）
+        """
+        self.path = path
+        self.visibility_timeout = visibility_timeout or QUEUE_CONFIG["visibility_timeout"]
+        self.max_attempts = max_attempts or QUEUE_CONFIG["max_attempts"]
+        self.retry_delay = QUEUE_CONFIG["retry_delay"] if retry_delay is None else retry_delay
+        
+        directory = os.path.dirname(path)
+        if directory and not os.path.exists(directory):
+            os.makedirs(directory)
+        
+        # sqlite3 连接不能跨线程使用，每个线程各用一个
+        self._local = threading.local()
+        self._connect().executescript(self.SCHEMA)
+    
+    def _connect(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            # 自动提交模式，需要原子性的操作显式使用 BEGIN IMMEDIATE
+            conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+            conn.row_factory = sqlite3.Row
+            self._local.conn = conn
+        return conn
+    
+    def reset(self):
+        conn = self._connect()
+        conn.execute("BEGIN IMMEDIATE")
+        conn.execute("DELETE FROM tasks")
+        conn.execute("DELETE FROM meta")
+        conn.execute("COMMIT")
+    
+    def set_meta(self, key: str, value: Any):
+        self._connect().execute(
+            "INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)",
+            (key, json.dumps(value, ensure_ascii=False))
+        )
+    
+    def get_meta(self, key: str) -> Any:
+        row = self._connect().execute("SELECT value FROM meta WHERE key = ?", (key,)).fetchone()
+        return json.loads(row["value"]) if row else None
+    
+    def enqueue(self, kind: str, payload: Dict, key: str, priority: int = 0) -> bool:
+        cursor = self._connect().execute(
+            "INSERT OR IGNORE INTO tasks (key, kind, payload, priority) VALUES (?, ?, ?, ?)",
+            (key, kind, json.dumps(payload, ensure_ascii=False), priority)
+        )
+        return cursor.rowcount > 0
+    
+    def _expire_leases(self, conn: sqlite3.Connection, now: float):
+        """租约超时的任务：未用完尝试次数的重新入队，否则标记失败"""
+        conn.execute(
+            "UPDATE tasks SET status = 'failed', error = 'lease expired' "
+            "WHERE status = 'leased' AND lease_expires < ? AND attempts >= ?",
+            (now, self.max_attempts)
+        )
+        conn.execute(
+            "UPDATE tasks SET status = 'pending', available_at = 0 "
+            "WHERE status = 'leased' AND lease_expires < ?",
+            (now,)
+        )
+    
+    def lease(self, owner: str) -> Optional[Task]:
+        conn = self._connect()
+        now = time.time()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            self._expire_leases(conn, now)
+            row = conn.execute(
+                "SELECT id, kind, payload, attempts FROM tasks "
+                "WHERE status = 'pending' AND available_at <= ? "
+                "ORDER BY priority DESC, id LIMIT 1",
+                (now,)
+            ).fetchone()
+            if row is None:
+                conn.execute("COMMIT")
+                return None
+            
+            token = uuid.uuid4().hex
+            conn.execute(
+                "UPDATE tasks SET status = 'leased', attempts = attempts + 1, "
+                "lease_owner = ?, lease_token = ?, lease_expires = ? WHERE id = ?",
+                (owner, token, now + self.visibility_timeout, row["id"])
+            )
+            conn.execute("COMMIT")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        
+        return Task(row["id"], row["kind"], json.loads(row["payload"]), row["attempts"] + 1, token)
+    
+    def complete(self, task: Task, result: Dict) -> bool:
+        cursor = self._connect().execute(
+            "UPDATE tasks SET status = 'done', result = ?, error = NULL, lease_token = NULL "
+            "WHERE id = ? AND status = 'leased' AND lease_token = ?",
+            (json.dumps(result, ensure_ascii=False), task.id, task.lease_token)
+        )
+        if cursor.rowcount == 0:
+            logger.warning(f"任务租约已失效，结果未提交: {task}")
+            return False
+        return True
+    
+    def fail(self, task: Task, error: str) -> bool:
+        if task.attempts >= self.max_attempts:
+            status, available_at = 'failed', 0
+        else:
+            status, available_at = 'pending', time.time() + self.retry_delay
+        cursor = self._connect().execute(
+            "UPDATE tasks SET status = ?, available_at = ?, error = ?, lease_token = NULL "
+            "WHERE id = ? AND status = 'leased' AND lease_token = ?",
+            (status, available_at, error, task.id, task.lease_token)
+        )
+        return cursor.rowcount > 0
+    
+    def counts(self) -> Dict[str, int]:
+        conn = self._connect()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            self._expire_leases(conn, time.time())
+            rows = conn.execute("SELECT status, COUNT(*) AS n FROM tasks GROUP BY status").fetchall()
+            conn.execute("COMMIT")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        return {row["status"]: row["n"] for row in rows}
+    
+    def results(self, kind: str) -> List[Dict]:
+        rows = self._connect().execute(
+            "SELECT payload, status, result, error FROM tasks WHERE kind = ? ORDER BY id",
+            (kind,)
+        ).fetchall()
+        return [
+            {
+                "payload": json.loads(row["payload"]),
+                "status": row["status"],
+                "result": json.loads(row["result"]) if row["result"] else None,
+                "error": row["error"],
+            }
+            for row in rows
+        ]
+    
+    def close(self):
+        """关闭当前线程的连接"""
+        conn = getattr(self._local, "conn", None)
+        if conn is not None:
+            conn.close()
+            self._local.conn = None